@@ -0,0 +1,298 @@
+"""
+IxNetwork Chassis Information Collector (asyncio)
+
+Async counterparts of the IxOSRestCallerModifier collectors, to be used with
+RestApi.IxOSAsyncRestInterface.AsyncIxRestSession. Only the fetch step differs;
+the returned records are built by the same process_* functions, so both
+variants return identical data.
+
+Functions:
+    - get_chassis_information: Get chassis hardware and system details
+    - get_chassis_cards_information: Get information about cards installed
+    - get_chassis_ports_information: Get port status and configuration
+    - get_license_activation: Get licensing information
+    - get_sensor_information: Get chassis sensor readings
+    - get_perf_metrics: Get performance metrics
+    - get_port_statistics: Get traffic and error counters of every port
+    - get_chassis_full: Get several of the above in one round of requests
+"""
+
+import asyncio
+import logging
+import time
+
+from IxOSRestCallerModifier import (
+    process_perf_metrics,
+    process_chassis_information,
+    process_cards_information,
+    process_ports_information,
+    process_license_activation,
+    process_sensor_information,
+    process_port_statistics,
+    is_license_info_complete,
+    license_placeholder,
+)
+from RestApi.IxOSRequestMetrics import instrument_collector
+
+logger = logging.getLogger(__name__)
+
+# sections of get_chassis_full and the IxOS resources each one is built from
+FULL_SECTIONS = {
+    "summary": ("chassis", "perfcounters"),
+    "cards": ("cards",),
+    "ports": ("ports",),
+    "sensors": ("sensors",),
+    "performance": ("perfcounters",),
+}
+
+@instrument_collector('perf')
+async def get_perf_metrics(session, chassisIp):
+    """
+    Get chassis performance metrics including CPU and memory utilization.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+        chassisIp (str): IP address of the chassis
+
+    Returns:
+        dict: Performance metrics, see IxOSRestCallerModifier.get_perf_metrics
+    """
+    logger.info(f"Getting performance metrics for chassis {chassisIp}")
+    try:
+        perf = (await session.get_perfcounters()).data[0]
+    except Exception as e:
+        logger.error(f"Error getting performance metrics: {str(e)}")
+        perf = None
+    return process_perf_metrics(perf, chassisIp)
+
+@instrument_collector('chassis')
+async def get_chassis_information(session):
+    """
+    Get comprehensive chassis information including hardware details and system metrics.
+    /chassis and /perfcounters are fetched concurrently.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+
+    Returns:
+        dict: Chassis information, see IxOSRestCallerModifier.get_chassis_information
+    """
+    logger.info("Getting chassis information")
+    try:
+        chassisInfo, perf = await asyncio.gather(
+            session.get_chassis(),
+            session.get_perfcounters(),
+            return_exceptions=True
+        )
+        if isinstance(chassisInfo, BaseException):
+            raise chassisInfo
+
+        try:
+            perf = perf.data[0]
+        except Exception:
+            perf = None
+
+        return process_chassis_information(chassisInfo.data[0], perf)
+    except Exception as e:
+        logger.error(f"Error getting chassis information: {str(e)}")
+        raise
+
+@instrument_collector('cards')
+async def get_chassis_cards_information(session, ip, type_of_chassis, params=None):
+    """
+    Get detailed information about all cards installed in the chassis.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+        ip (str): IP address of the chassis
+        type_of_chassis (str): Type of the chassis
+        params (dict): Optional IxOS query filters, e.g. {'cardNumber': 1}
+
+    Returns:
+        list: Card records, see IxOSRestCallerModifier.get_chassis_cards_information
+    """
+    logger.info(f"Getting card information for chassis {ip}")
+    try:
+        card_list = (await session.get_cards(params=params)).data
+        return process_cards_information(card_list, ip, type_of_chassis)
+    except Exception as e:
+        logger.error(f"Error getting card information: {str(e)}")
+        raise
+
+@instrument_collector('ports')
+async def get_chassis_ports_information(session, chassisIp, chassisType, params=None):
+    """
+    Get detailed information about all ports in the chassis.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+        chassisIp (str): IP address of the chassis
+        chassisType (str): Type of the chassis
+        params (dict): Optional IxOS query filters, e.g. {'cardNumber': 1}
+
+    Returns:
+        list: Port records, see IxOSRestCallerModifier.get_chassis_ports_information
+    """
+    logger.info(f"Getting port information for chassis {chassisIp}")
+    try:
+        port_list = (await session.get_ports(params=params)).data
+        return process_ports_information(port_list, chassisIp, chassisType)
+    except Exception as e:
+        logger.error(f"Error getting port information: {str(e)}")
+        raise
+
+@instrument_collector('licenses')
+async def get_license_activation(session, chassis_ip, chassis_type):
+    """Get license activation details from chassis
+    Args:
+        session: AsyncIxRestSession object
+        chassis_ip: IP address of chassis
+        chassis_type: Type of chassis
+    Returns:
+        List of dictionaries containing license information
+    """
+    try:
+        # the session awaits the completion of the retrievelicenses operation
+        # before fetching its result
+        license_info = (await session.get_license_activation()).data
+        if not is_license_info_complete(license_info):
+            logger.warning(f"Incomplete license information returned by chassis {chassis_ip}")
+            return license_placeholder(chassis_ip, chassis_type)
+
+        return process_license_activation(license_info, chassis_ip, chassis_type)
+
+    except Exception as e:
+        logger.error(f"Error getting license activation for chassis {chassis_ip}: {str(e)}")
+        return license_placeholder(chassis_ip, chassis_type)
+
+@instrument_collector('sensors')
+async def get_sensor_information(session, chassis, type_chassis):
+    """
+    Get sensor readings from the chassis.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+        chassis (str): IP address of the chassis
+        type_chassis (str): Type of the chassis
+
+    Returns:
+        list: Sensor records, see IxOSRestCallerModifier.get_sensor_information
+    """
+    logger.info(f"Getting sensor information for chassis {chassis}")
+    try:
+        sensor_list = (await session.get_sensors()).json()
+        return process_sensor_information(sensor_list, chassis, type_chassis)
+    except Exception as e:
+        logger.error(f"Error getting sensor information: {str(e)}")
+        raise
+
+@instrument_collector('portstats')
+async def get_port_statistics(session, chassisIp, chassisType=None):
+    """
+    Get the cumulative traffic and error counters of every port in one call.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+        chassisIp (str): IP address of the chassis
+        chassisType (str): Type of the chassis (unused, for collector symmetry)
+
+    Returns:
+        list: Port statistics records, see IxOSRestCallerModifier.get_port_statistics
+    """
+    logger.info(f"Getting port statistics for chassis {chassisIp}")
+    try:
+        stats_list = (await session.get_portstats()).data
+        return process_port_statistics(stats_list, chassisIp)
+    except Exception as e:
+        logger.error(f"Error getting port statistics: {str(e)}")
+        raise
+
+@instrument_collector('full')
+async def get_chassis_full(session, chassisIp, chassisType="", sections=tuple(FULL_SECTIONS)):
+    """
+    Collect several sections of a chassis in one round of requests. Every
+    distinct IxOS resource the sections need is fetched once, all of them at
+    the same time, and shared by the process_* steps; /perfcounters serves
+    both summary and performance.
+
+    Args:
+        session (AsyncIxRestSession): Open REST session to the chassis
+        chassisIp (str): IP address of the chassis
+        chassisType (str): Type of the chassis, taken from the summary instead
+            when it is collected
+        sections (iterable): Names from FULL_SECTIONS
+
+    Returns:
+        dict: With
+            - sections: Records of every collected section, as returned by
+              its own collector (the summary includes chassisIp)
+            - errors: Error message of every section that failed
+            - timing: Per section the seconds spent fetching its slowest
+              resource and processing, and the fetch seconds per resource
+    """
+    fetchers = {
+        "chassis": session.get_chassis,
+        "perfcounters": session.get_perfcounters,
+        "cards": session.get_cards,
+        "ports": session.get_ports,
+        "sensors": session.get_sensors,
+    }
+    sections = sorted(set(sections), key=list(FULL_SECTIONS).index)
+    resources = sorted({resource for section in sections for resource in FULL_SECTIONS[section]})
+    fetch_seconds = {}
+
+    async def fetch(resource):
+        started = time.perf_counter()
+        try:
+            return (await fetchers[resource]()).data
+        finally:
+            fetch_seconds[resource] = round(time.perf_counter() - started, 4)
+
+    logger.info(f"Getting {', '.join(sections)} for chassis {chassisIp}")
+    fetched = dict(zip(resources, await asyncio.gather(*(fetch(r) for r in resources), return_exceptions=True)))
+
+    def listing(resource):
+        if isinstance(fetched[resource], BaseException):
+            raise fetched[resource]
+        return fetched[resource]
+
+    def perf():
+        try:
+            return listing("perfcounters")[0]
+        except Exception:
+            return None
+
+    def summary():
+        record = process_chassis_information(listing("chassis")[0], perf())
+        record["chassisIp"] = chassisIp
+        return record
+
+    processors = {
+        "summary": summary,
+        "cards": lambda: process_cards_information(listing("cards"), chassisIp, chassisType),
+        "ports": lambda: process_ports_information(listing("ports"), chassisIp, chassisType),
+        "sensors": lambda: process_sensor_information(listing("sensors"), chassisIp, chassisType),
+        "performance": lambda: process_perf_metrics(perf(), chassisIp),
+    }
+    collected = {}
+    errors = {}
+    timing = {}
+    for section in sections:
+        started = time.perf_counter()
+        try:
+            collected[section] = processors[section]()
+        except Exception as e:
+            logger.error(f"Error getting {section} for chassis {chassisIp}: {str(e)}")
+            errors[section] = str(e)
+        timing[section] = {
+            "fetch_seconds": max(fetch_seconds[r] for r in FULL_SECTIONS[section]),
+            "process_seconds": round(time.perf_counter() - started, 4)
+        }
+        if section == "summary" and section in collected:
+            chassisType = collected[section].get("chassisType", chassisType)
+
+    return {
+        "sections": collected,
+        "errors": errors,
+        "timing": {"sections": timing, "resources": fetch_seconds}
+    }
@@ -0,0 +1,99 @@
+"""
+Bulk port operations
+
+Runs take ownership / release ownership / reboot on many ports across many
+chassis in one call. Ports are grouped per chassis so each chassis needs one
+session, and every (card, port) is resolved to its internal port ID from the
+chassis port index, which costs at most a single /ports listing; the
+operations themselves are then issued concurrently.
+
+Functions:
+    - run_bulk_port_operation: Apply one port operation to a list of ports
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# operation name -> IxRestSession method
+PORT_OPERATIONS = {
+    "take_ownership": "take_ownership",
+    "release_ownership": "release_ownership",
+    "reboot": "reboot_port",
+}
+
+def _resolve_chassis_ports(chassis_ip, session_factory, card_ports):
+    session = session_factory(chassis_ip)
+    port_ids = {
+        card_port: session.get_port_id(*card_port)
+        for card_port in card_ports
+    }
+    return session, port_ids
+
+def _run_port_operation(session, method, port_id):
+    getattr(session, method)(port_id)
+
+def run_bulk_port_operation(ports, operation, session_factory, max_concurrency=8):
+    """
+    Apply one port operation to many ports.
+
+    Args:
+        ports (list): (chassis_ip, card_number, port_number) tuples
+        operation (str): One of PORT_OPERATIONS
+        session_factory (callable): Returns an authenticated session for an IP
+        max_concurrency (int): Maximum number of REST calls in flight
+
+    Returns:
+        list: One result per requested port, in request order, with:
+            - chassisIp, cardNumber, portNumber: The requested port
+            - portId: Internal port ID, if it was resolved
+            - success: Whether the operation succeeded
+            - message: Outcome or error description
+    """
+    method = PORT_OPERATIONS[operation]
+    last_update_at = datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+    results = [{
+        "chassisIp": ip,
+        "cardNumber": card_number,
+        "portNumber": port_number,
+        "success": False,
+        "lastUpdatedAt_UTC": last_update_at
+    } for ip, card_number, port_number in ports]
+    if not results:
+        return results
+
+    chassis_ips = list(dict.fromkeys(result["chassisIp"] for result in results))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(results)))) as executor:
+        # one session and at most one /ports listing per chassis
+        resolved = {
+            ip: executor.submit(_resolve_chassis_ports, ip, session_factory,
+                                [(r["cardNumber"], r["portNumber"]) for r in results if r["chassisIp"] == ip])
+            for ip in chassis_ips
+        }
+
+        pending = []
+        for result in results:
+            try:
+                session, port_ids = resolved[result["chassisIp"]].result()
+            except Exception as e:
+                logger.error(f"Error resolving ports on chassis {result['chassisIp']}: {str(e)}")
+                result["message"] = f"Error resolving ports on chassis: {str(e)}"
+                continue
+            port_id = port_ids.get((result["cardNumber"], result["portNumber"]))
+            if port_id is None:
+                result["message"] = f"Port {result['cardNumber']}/{result['portNumber']} not found on chassis"
+                continue
+            result["portId"] = port_id
+            pending.append((result, executor.submit(_run_port_operation, session, method, port_id)))
+
+        for result, future in pending:
+            try:
+                future.result()
+                result["success"] = True
+                result["message"] = f"{operation} succeeded"
+            except Exception as e:
+                logger.error(f"Error running {operation} on port {result['portId']} of {result['chassisIp']}: {str(e)}")
+                result["message"] = f"Error running {operation}: {str(e)}"
+    return results
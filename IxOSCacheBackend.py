@@ -0,0 +1,227 @@
+"""
+Cache backends for inventory snapshots and chassis API keys
+
+The in-process LRU backend keeps everything in the memory of one worker. The
+SQLite backend keeps entries in a local file shared by every uvicorn worker
+(or every container replica mounting the same volume), so a snapshot
+collected, or an API key obtained, by one worker is reused by the others.
+
+Both backends also provide refresh leases: a named, expiring lock that only
+one owner can hold at a time. Workers take a lease before refreshing a
+chassis resource so the chassis is polled once for the whole deployment,
+not once per worker.
+
+Classes:
+    - LRUCacheBackend: In-process LRU, no sharing between processes
+    - SQLiteCacheBackend: Shared local SQLite file
+
+Functions:
+    - make_cache_backend: Build a backend from its name
+"""
+
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+def _owner_token():
+    return "%d-%s" % (os.getpid(), uuid.uuid4().hex[:8])
+
+
+class LRUCacheBackend(object):
+    """
+    In-process cache keeping the max_entries most recently used entries.
+    Values are stored as they are, without serialization.
+    """
+    shared = False
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.owner = _owner_token()
+        self._entries = collections.OrderedDict()
+        self._leases = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        """
+        (value, stored_at) of an entry, or None if it is missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[2] is not None and entry[2] < now):
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0], entry[1]
+
+    def stamp(self, key):
+        """
+        stored_at of an entry without reading its value, or None
+        """
+        entry = self.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key, value, ttl=None, stored_at=None):
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            self._entries[key] = (value, stored_at, stored_at + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stamps(self, prefix=""):
+        """
+        key -> stored_at of every live entry whose key starts with prefix
+        """
+        now = time.time()
+        with self._lock:
+            return {k: e[1] for k, e in self._entries.items()
+                    if k.startswith(prefix) and (e[2] is None or e[2] >= now)}
+
+    def acquire_lease(self, name, ttl):
+        """
+        take or renew the lease name for ttl seconds; False if another owner holds it
+        """
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(name)
+            if lease is not None and lease[0] != self.owner and lease[1] >= now:
+                return False
+            self._leases[name] = (self.owner, now + ttl)
+            return True
+
+    def release_lease(self, name):
+        with self._lock:
+            lease = self._leases.get(name)
+            if lease is not None and lease[0] == self.owner:
+                del self._leases[name]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, backend="memory", size=len(self._entries), leases=len(self._leases))
+
+
+class SQLiteCacheBackend(object):
+    """
+    Cache in a local SQLite file shared by every process opening the same path.
+    Values are stored as JSON. Leases are taken with a single conditional
+    upsert, so two processes can never both hold the same lease.
+    """
+    shared = True
+
+    def __init__(self, path, busy_timeout=5):
+        self.path = path
+        self.owner = _owner_token()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+        # the file holds chassis API keys
+        if path != ":memory:":
+            try:
+                os.chmod(path, 0o600)
+            except OSError:
+                pass
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, time.time())
+            ).fetchone()
+            self._stats["hits" if row is not None else "misses"] += 1
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def stamp(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at FROM entries WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, key, value, ttl=None, stored_at=None):
+        stored_at = time.time() if stored_at is None else stored_at
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, payload, stored_at, stored_at + ttl if ttl else None)
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def stamps(self, prefix=""):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, stored_at FROM entries WHERE substr(key, 1, ?) = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (len(prefix), prefix, time.time())
+            ).fetchall()
+        return dict(rows)
+
+    def acquire_lease(self, name, ttl):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+                (name, self.owner, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self, name):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            leases = self._conn.execute("SELECT COUNT(*) FROM leases WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+            return dict(self._stats, backend="sqlite", path=self.path, size=size, leases=leases)
+
+
+def make_cache_backend(name, path=None, max_entries=4096):
+    """
+    build a cache backend
+
+    Args:
+        name (str): "memory" for the in-process LRU, "sqlite" for the shared file
+        path (str): SQLite file, required for "sqlite"
+        max_entries (int): Size of the in-process LRU
+    """
+    if name == "memory":
+        return LRUCacheBackend(max_entries=max_entries)
+    if name == "sqlite":
+        return SQLiteCacheBackend(path)
+    raise ValueError("unknown cache backend %r, expected memory or sqlite" % name)
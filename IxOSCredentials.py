@@ -0,0 +1,263 @@
+"""
+Chassis credentials provider
+
+Credentials come from the external credentials service, with config.json as
+the fallback while the service is unavailable. CredentialsProvider keeps the
+service off the request path:
+
+    - stale-while-revalidate: credentials older than the TTL are still
+      served while a single background thread fetches new ones
+    - negative caching: after a failed fetch the service is not asked again
+      for outage_backoff seconds, doubling with every further failure up to
+      max_outage_backoff; meanwhile the last credentials of the service, or
+      config.json if it never answered, are served
+    - config.json is only re-read when its modification time changes
+
+Only the first load and an explicit refresh wait for the service.
+
+Functions:
+    - fetch_credentials_from_service: Fetch credentials from the service once
+
+Classes:
+    - CredentialsServiceError: The service did not return usable credentials
+    - CredentialsProvider: Cached credentials of every chassis
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialsServiceError(Exception):
+    pass
+
+
+def fetch_credentials_from_service(url, timeout):
+    """
+    Fetch credentials from the external credentials service.
+
+    Args:
+        url (str): URL of the credentials service
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        dict: IP address -> {"username", "password"}
+
+    Raises:
+        CredentialsServiceError: The service is unavailable or its answer is invalid
+    """
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+    except requests.exceptions.ConnectionError:
+        raise CredentialsServiceError(f"Credentials service not available at {url}")
+    except requests.exceptions.Timeout:
+        raise CredentialsServiceError(f"Timeout connecting to credentials service")
+    except requests.exceptions.RequestException as e:
+        raise CredentialsServiceError(f"Error fetching from credentials service: {str(e)}")
+    except (json.JSONDecodeError, ValueError) as e:
+        raise CredentialsServiceError(f"Error parsing credentials service response: {str(e)}")
+
+    # Validate response structure
+    if not isinstance(data, dict) or not data.get("success") or "credentials" not in data:
+        raise CredentialsServiceError("Invalid response structure from credentials service")
+
+    # Transform the service response to our expected format
+    # From: {"credentials": [{"ip": "x.x.x.x", "username": "...", "password": "..."}]}
+    # To: {"x.x.x.x": {"username": "...", "password": "..."}}
+    try:
+        return {
+            cred["ip"]: {"username": cred.get("username", ""), "password": cred.get("password", "")}
+            for cred in data["credentials"] if cred.get("ip")
+        }
+    except (AttributeError, TypeError) as e:
+        raise CredentialsServiceError(f"Error parsing credentials service response: {str(e)}")
+
+
+class CredentialsProvider(object):
+    """
+    Cached chassis credentials from the credentials service or config.json;
+    thread-safe.
+    Constructor arguments:
+        service_url:        URL of the credentials service.
+        service_timeout:    Timeout of a service request in seconds.
+        config_path:        Fallback credentials file.
+        ttl:                Seconds after which the service credentials are
+                            refreshed in the background.
+        outage_backoff:     Seconds the service is left alone after a failed
+                            fetch; doubles with every further failure.
+        max_outage_backoff: Upper bound of outage_backoff.
+    """
+
+    def __init__(self, service_url, service_timeout=5, config_path="config.json", ttl=60,
+                 outage_backoff=30, max_outage_backoff=600):
+        self.service_url = service_url
+        self.service_timeout = service_timeout
+        self.config_path = config_path
+        self.ttl = ttl
+        self.outage_backoff = outage_backoff
+        self.max_outage_backoff = max_outage_backoff
+        self._lock = threading.Lock()
+        # held while fetching from the service, so there is one fetch at a time
+        self._fetch_lock = threading.Lock()
+        self._loaded = False
+        self._service_credentials = None
+        self._fetched_at = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error = None
+        self._last_attempt_at = None
+        self._file_credentials = {}
+        self._file_mtime = None
+        self._file_read = False
+        self._refresher = None
+
+    def get(self, force_refresh=False):
+        """
+        credentials of every chassis; waits for the service only on the first
+        call or with force_refresh, otherwise a due refresh runs in the
+        background and the current credentials are returned right away
+        """
+        if force_refresh:
+            self.refresh()
+        elif not self._loaded:
+            with self._fetch_lock:
+                # callers arriving during the first load share it
+                if not self._loaded:
+                    self._fetch()
+        elif self._refresh_due():
+            self._refresh_in_background()
+        return self.current()
+
+    def current(self):
+        """
+        credentials of the service, or of config.json if the service never answered
+        """
+        with self._lock:
+            if self._service_credentials is not None:
+                return self._service_credentials
+        return self._config_credentials()
+
+    def refresh(self):
+        """
+        fetch credentials from the service now, regardless of the backoff;
+        returns True if the service answered
+        """
+        with self._fetch_lock:
+            return self._fetch()
+
+    def status(self):
+        """
+        source, age and outage state of the credentials; never contacts the service
+        """
+        credentials = self.current()
+        now = time.time()
+        with self._lock:
+            age = now - self._fetched_at if self._fetched_at is not None else None
+            return {
+                "source": ("credentials_service" if self._service_credentials is not None
+                           else "config.json" if self._loaded else None),
+                "credentials_service_url": self.service_url,
+                # outcome of the last fetch, None before the first one
+                "credentials_service_available": (self._failures == 0) if self._last_attempt_at is not None else None,
+                "credentials_service_timeout": self.service_timeout,
+                "cache_ttl_seconds": self.ttl,
+                "cache_age_seconds": round(age, 2) if age is not None else None,
+                "cache_valid": age is not None and age < self.ttl,
+                "refreshing": self._refresher is not None and self._refresher.is_alive(),
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": round(max(0.0, self._retry_at - time.monotonic()), 1) if self._failures else None,
+                "last_error": self._last_error,
+                "config_path": self.config_path,
+                "config_mtime": self._file_mtime,
+                "chassis_count": len(credentials),
+                "chassis_ips": list(credentials.keys())
+            }
+
+    def _fetch(self):
+        """
+        one service fetch; called with _fetch_lock held
+        """
+        try:
+            credentials = fetch_credentials_from_service(self.service_url, self.service_timeout)
+            error = None
+        except CredentialsServiceError as e:
+            credentials = None
+            error = str(e)
+        with self._lock:
+            self._loaded = True
+            self._last_attempt_at = time.time()
+            if credentials is not None:
+                self._service_credentials = credentials
+                self._fetched_at = self._last_attempt_at
+                self._failures = 0
+                self._retry_at = 0.0
+                self._last_error = None
+            else:
+                self._failures += 1
+                backoff = min(self.max_outage_backoff, self.outage_backoff * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + backoff
+                self._last_error = error
+        if credentials is not None:
+            logger.info(f"Successfully fetched {len(credentials)} credentials from service")
+        else:
+            logger.warning(f"{error}; serving {'the last service' if self._service_credentials is not None else 'config.json'} "
+                           f"credentials, next try in {backoff:.0f}s")
+        return credentials is not None
+
+    def _refresh_due(self):
+        with self._lock:
+            if time.monotonic() < self._retry_at:
+                return False
+            return self._fetched_at is None or time.time() - self._fetched_at >= self.ttl
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._background_refresh, name='ixos-credentials-refresh',
+                                               daemon=True)
+            self._refresher.start()
+
+    def _background_refresh(self):
+        with self._fetch_lock:
+            # a forced refresh may have run in the meantime
+            if self._refresh_due():
+                self._fetch()
+
+    def _config_credentials(self):
+        """
+        credentials of config.json, re-read only when its modification time changed
+        """
+        try:
+            mtime = os.stat(self.config_path).st_mtime
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self._file_read and mtime == self._file_mtime:
+                return self._file_credentials
+        if mtime is None:
+            logger.warning(f"Config file {self.config_path} not found. Using empty credentials dictionary.")
+            credentials = {}
+        else:
+            try:
+                with open(self.config_path, "r") as f:
+                    credentials = json.load(f)
+                logger.info(f"Loaded {len(credentials)} credentials from {self.config_path}")
+            except Exception as e:
+                # e.g. caught while being rewritten: keep the previous credentials and read it again next time
+                logger.error(f"Error loading credentials from file: {str(e)}")
+                with self._lock:
+                    return self._file_credentials
+        with self._lock:
+            self._file_credentials = credentials
+            self._file_mtime = mtime
+            self._file_read = True
+        return credentials
@@ -0,0 +1,131 @@
+"""
+Fleet-wide inventory collection
+
+This module fans the IxOSRestCallerModifier collectors out across many chassis
+at once. Every chassis runs in its own worker with a bounded level of
+concurrency and a deadline, and results are yielded as soon as each chassis
+completes, so a single unreachable chassis never stalls the rest of the sweep.
+
+Functions:
+    - collect_chassis_inventory: Run the selected collectors against one chassis
+    - iter_fleet_inventory: Collect inventory from many chassis concurrently
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
+import time
+
+import IxOSRestCallerModifier as ixOSRestCaller
+
+logger = logging.getLogger(__name__)
+
+FLEET_RESOURCES = ("summary", "cards", "ports", "sensors", "performance", "license_host_ids")
+
+def collect_chassis_inventory(session, chassis_ip, resources):
+    """
+    Run the selected collectors against a single chassis.
+
+    Args:
+        session (IxRestSession): Active REST session to the chassis
+        chassis_ip (str): IP address of the chassis
+        resources (list): Names from FLEET_RESOURCES to collect
+
+    Returns:
+        dict: Collected data keyed by resource name, plus an "errors" dict
+              holding the error message of every resource that failed
+    """
+    inventory = {}
+    errors = {}
+    chassis_type = ""
+
+    if "summary" in resources:
+        try:
+            summary = ixOSRestCaller.get_chassis_information(session)
+            summary["chassisIp"] = chassis_ip
+            chassis_type = summary.get("chassisType", "")
+            inventory["summary"] = summary
+        except Exception as e:
+            errors["summary"] = str(e)
+
+    collectors = {
+        "cards": lambda: ixOSRestCaller.get_chassis_cards_information(session, chassis_ip, chassis_type),
+        "ports": lambda: ixOSRestCaller.get_chassis_ports_information(session, chassis_ip, chassis_type),
+        "sensors": lambda: ixOSRestCaller.get_sensor_information(session, chassis_ip, chassis_type),
+        "performance": lambda: ixOSRestCaller.get_perf_metrics(session, chassis_ip),
+        "license_host_ids": lambda: ixOSRestCaller.get_license_host_ids(session, chassis_ip, chassis_type)
+    }
+    for resource in resources:
+        if resource not in collectors:
+            continue
+        try:
+            inventory[resource] = collectors[resource]()
+        except Exception as e:
+            errors[resource] = str(e)
+
+    inventory["errors"] = errors
+    return inventory
+
+def _collect_one(chassis_ip, session_factory, resources, started):
+    started[chassis_ip] = time.monotonic()
+    session = session_factory(chassis_ip)
+    return collect_chassis_inventory(session, chassis_ip, resources)
+
+def iter_fleet_inventory(chassis_ips, session_factory, resources=FLEET_RESOURCES[:3],
+                         max_workers=8, chassis_deadline=30.0):
+    """
+    Collect inventory from many chassis concurrently, yielding one record per
+    chassis in completion order.
+
+    Args:
+        chassis_ips (list): IP addresses of the chassis to query
+        session_factory (callable): Returns an authenticated session for an IP
+        resources (list): Names from FLEET_RESOURCES to collect
+        max_workers (int): Maximum number of chassis queried at the same time
+        chassis_deadline (float): Seconds a chassis may take, counted from the
+            moment its worker starts, before it is reported as timed out
+
+    Yields:
+        dict: Per-chassis record with:
+            - chassisIp: IP address of the chassis
+            - status: "ok", "partial", "Not Reachable" or "Timed Out"
+            - elapsedSeconds: Time spent on the chassis
+            - one key per collected resource and an "errors" dict
+    """
+    if not chassis_ips:
+        return
+
+    started = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chassis_ips))))
+    try:
+        pending = {
+            executor.submit(_collect_one, ip, session_factory, resources, started): ip
+            for ip in chassis_ips
+        }
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+
+            for future in done:
+                ip = pending.pop(future)
+                elapsed = round(now - started.get(ip, now), 3)
+                try:
+                    inventory = future.result()
+                except Exception as e:
+                    logger.error(f"Error collecting inventory for chassis {ip}: {str(e)}")
+                    yield {"chassisIp": ip, "status": "Not Reachable",
+                           "elapsedSeconds": elapsed, "errors": {"chassis": str(e)}}
+                    continue
+                status = "partial" if inventory["errors"] else "ok"
+                yield dict(inventory, chassisIp=ip, status=status, elapsedSeconds=elapsed)
+
+            for future, ip in list(pending.items()):
+                if ip in started and now - started[ip] > chassis_deadline:
+                    # the worker cannot be interrupted; stop waiting for it
+                    pending.pop(future)
+                    future.cancel()
+                    logger.warning(f"Chassis {ip} exceeded the {chassis_deadline}s fleet deadline")
+                    yield {"chassisIp": ip, "status": "Timed Out",
+                           "elapsedSeconds": round(now - started[ip], 3),
+                           "errors": {"chassis": f"No response within {chassis_deadline}s"}}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
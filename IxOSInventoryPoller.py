@@ -0,0 +1,444 @@
+"""
+Background inventory poller
+
+Keeps an in-memory snapshot of every configured chassis so read endpoints can
+answer without touching the chassis. Each resource (summary, cards, ports,
+sensors, performance, portstats, licenses) is refreshed on its own interval by an asyncio task
+running on the application event loop, using the async collectors of
+IxOSAsyncRestCallerModifier.
+
+Classes:
+    - Snapshot: One collected payload and the time it was collected
+    - InventorySnapshotStore: Thread-safe store of the latest snapshots
+    - InventoryPoller: Periodically refreshes the store for all chassis
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import IxOSAsyncRestCallerModifier as ixOSAsyncRestCaller
+from IxOSCacheBackend import LRUCacheBackend
+from IxOSInventoryTable import InventoryTable, to_table
+
+logger = logging.getLogger(__name__)
+
+async def _collect_summary(session, ip, chassis_type):
+    summary = await ixOSAsyncRestCaller.get_chassis_information(session)
+    summary["chassisIp"] = ip
+    return summary
+
+async def _collect_licenses(session, ip, chassis_type):
+    licenses = await ixOSAsyncRestCaller.get_license_activation(session, ip, chassis_type)
+    # keep the previous snapshot rather than replacing it with the placeholder
+    if len(licenses) == 1 and licenses[0].get("hostId") == "NA" and licenses[0].get("activationCode") == "NA":
+        raise RuntimeError(f"License information of chassis {ip} could not be retrieved")
+    return licenses
+
+ASYNC_COLLECTORS = {
+    "summary": _collect_summary,
+    "cards": ixOSAsyncRestCaller.get_chassis_cards_information,
+    "ports": ixOSAsyncRestCaller.get_chassis_ports_information,
+    "sensors": ixOSAsyncRestCaller.get_sensor_information,
+    "performance": lambda session, ip, chassis_type: ixOSAsyncRestCaller.get_perf_metrics(session, ip),
+    "portstats": ixOSAsyncRestCaller.get_port_statistics,
+    "licenses": _collect_licenses,
+}
+
+class Snapshot(object):
+    """
+    One collected payload and the time it was collected (epoch seconds, so
+    snapshots shared between processes report a meaningful age).
+    """
+    __slots__ = ("data", "timestamp", "collected_at")
+
+    def __init__(self, data, timestamp=None):
+        self.data = data
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.collected_at = datetime.fromtimestamp(self.timestamp, timezone.utc)
+
+    def age(self):
+        return max(0.0, time.time() - self.timestamp)
+
+def _snapshot_key(chassis_ip, resource):
+    return "snapshot/%s/%s" % (chassis_ip, resource)
+
+def _encode_snapshot(data):
+    return {"table": data.to_dict()} if isinstance(data, InventoryTable) else data
+
+def _decode_snapshot(resource, value):
+    if isinstance(value, dict) and "table" in value:
+        return InventoryTable.from_dict(value["table"])
+    return to_table(resource, value)
+
+def _parse_snapshot_key(key):
+    chassis_ip, resource = key[len("snapshot/"):].rsplit("/", 1)
+    return chassis_ip, resource
+
+class InventorySnapshotStore(object):
+    """
+    Latest snapshot per (chassis IP, resource), plus the last refresh error.
+    Safe to use from the event loop and from worker threads.
+    Card, port and sensor listings are kept as InventoryTables (see
+    IxOSInventoryTable): their snapshot data is a table, and iterating it
+    yields the original records.
+    Snapshots are kept in a cache backend (see IxOSCacheBackend); with a
+    shared backend the snapshots put by other workers are picked up by get.
+    Listeners added with add_listener are called as listener(chassis_ip,
+    resource, data, collected_at) for every new snapshot, whether it was put
+    by this process or picked up from a shared backend, on the calling thread,
+    so they must not block. Removal listeners added with add_removal_listener
+    are called as listener(chassis_ip) when prune forgets a chassis.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else LRUCacheBackend()
+        self.shared = self.backend.shared
+        # last snapshot seen per key, so a shared backend is only read when it has a newer one
+        self._seen = {}
+        self._errors = {}
+        self._listeners = []
+        self._removal_listeners = []
+        self._lock = threading.Lock()
+
+    def use_backend(self, backend):
+        """
+        keep snapshots in backend from now on, e.g. a shared backend opened
+        on startup; snapshots put before are not carried over
+        """
+        with self._lock:
+            self.backend = backend
+            self.shared = backend.shared
+            self._seen = {}
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def add_removal_listener(self, listener):
+        self._removal_listeners.append(listener)
+
+    def get(self, chassis_ip, resource):
+        key = _snapshot_key(chassis_ip, resource)
+        if not self.shared:
+            entry = self.backend.get(key)
+            return Snapshot(*entry) if entry is not None else None
+
+        stamp = self.backend.stamp(key)
+        with self._lock:
+            seen = self._seen.get(key)
+        if stamp is None or (seen is not None and stamp <= seen.timestamp):
+            return seen if stamp is not None else None
+        entry = self.backend.get(key)
+        if entry is None:
+            return seen
+        snapshot = Snapshot(_decode_snapshot(resource, entry[0]), entry[1])
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and seen.timestamp >= snapshot.timestamp:
+                return seen
+            self._seen[key] = snapshot
+        # collected by another worker
+        self._notify(chassis_ip, resource, snapshot)
+        return snapshot
+
+    def put(self, chassis_ip, resource, data):
+        snapshot = Snapshot(to_table(resource, data))
+        key = _snapshot_key(chassis_ip, resource)
+        value = _encode_snapshot(snapshot.data) if self.shared else snapshot.data
+        self.backend.set(key, value, stored_at=snapshot.timestamp)
+        with self._lock:
+            if self.shared:
+                self._seen[key] = snapshot
+            self._errors.pop((chassis_ip, resource), None)
+        self._notify(chassis_ip, resource, snapshot)
+        return snapshot
+
+    def invalidate(self, chassis_ip, resource):
+        """
+        drop the snapshot of one chassis resource, so the next read fetches it
+        live; listeners keep the data they have until a new snapshot arrives
+        """
+        key = _snapshot_key(chassis_ip, resource)
+        self.backend.delete(key)
+        with self._lock:
+            self._seen.pop(key, None)
+
+    def mark_error(self, chassis_ip, resource, error):
+        with self._lock:
+            self._errors[(chassis_ip, resource)] = {
+                "error": str(error),
+                "at": datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+            }
+
+    def acquire_lease(self, name, ttl):
+        """
+        take the refresh lease name for ttl seconds; False if another worker holds it
+        """
+        return self.backend.acquire_lease(name, ttl)
+
+    def release_lease(self, name):
+        self.backend.release_lease(name)
+
+    def chassis_type(self, chassis_ip):
+        """
+        chassis type from the summary snapshot, or "" if not collected yet
+        """
+        snapshot = self.get(chassis_ip, "summary")
+        return snapshot.data.get("chassisType", "") if snapshot is not None else ""
+
+    def prune(self, chassis_ips):
+        """
+        forget chassis that are no longer configured and tell the removal
+        listeners about them
+        """
+        keep = set(chassis_ips)
+        removed = set()
+        for key in self.backend.stamps("snapshot/"):
+            ip = _parse_snapshot_key(key)[0]
+            if ip not in keep:
+                self.backend.delete(key)
+                removed.add(ip)
+        with self._lock:
+            for key in [k for k in self._seen if _parse_snapshot_key(k)[0] not in keep]:
+                removed.add(_parse_snapshot_key(key)[0])
+                del self._seen[key]
+            for key in [k for k in self._errors if k[0] not in keep]:
+                removed.add(key[0])
+                del self._errors[key]
+        for chassis_ip in sorted(removed):
+            for listener in self._removal_listeners:
+                try:
+                    listener(chassis_ip)
+                except Exception as e:
+                    logger.error(f"Error in removal listener for chassis {chassis_ip}: {str(e)}")
+
+    def status(self):
+        """
+        age of every snapshot and the last refresh error, grouped by chassis
+        """
+        stamps = self.backend.stamps("snapshot/")
+        with self._lock:
+            errors = dict(self._errors)
+        status = {}
+        for key, stamp in stamps.items():
+            ip, resource = _parse_snapshot_key(key)
+            snapshot = Snapshot(None, stamp)
+            status.setdefault(ip, {})[resource] = {
+                "age_seconds": round(snapshot.age(), 3),
+                "collectedAt_UTC": snapshot.collected_at.strftime("%m/%d/%Y, %H:%M:%S")
+            }
+        for (ip, resource), error in errors.items():
+            status.setdefault(ip, {}).setdefault(resource, {})["last_error"] = error
+        return status
+
+    def _notify(self, chassis_ip, resource, snapshot):
+        for listener in self._listeners:
+            try:
+                listener(chassis_ip, resource, snapshot.data, snapshot.timestamp)
+            except Exception as e:
+                logger.error(f"Error in snapshot listener for {resource} of chassis {chassis_ip}: {str(e)}")
+
+class InventoryPoller(object):
+    """
+    Refreshes the snapshot store for every configured chassis.
+    With a shared snapshot store every refresh is guarded by a lease, so only
+    one worker polls a given chassis resource per interval and a live refresh
+    requested in several workers at once reaches the chassis only once; the
+    other workers use the snapshot the lease holder stored.
+    Constructor arguments:
+        store:              InventorySnapshotStore to fill
+        session_provider:   Coroutine function returning an opened
+                            AsyncIxRestSession for a chassis IP
+        chassis_provider:   Function returning the configured chassis IPs;
+                            it is called in a worker thread
+        intervals:          Refresh interval in seconds per resource; a
+                            resource with interval 0 is not polled
+        max_concurrency:    Maximum number of chassis refreshed at once
+        refresh_timeout:    Lease time in seconds of a live refresh; the
+                            holder renews the lease while it collects, and
+                            other workers wait for its snapshot until the
+                            lease lapses
+    """
+
+    def __init__(self, store, session_provider, chassis_provider, intervals, max_concurrency=16, refresh_timeout=30):
+        self.store = store
+        self.intervals = intervals
+        self.refresh_timeout = refresh_timeout
+        self._session_provider = session_provider
+        self._chassis_provider = chassis_provider
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._tasks = []
+        # (chassis IP, resource) -> task of the refresh in progress
+        self._refreshing = {}
+        # tasks started by schedule_refresh, referenced until they finish
+        self._background = set()
+
+    async def snapshot(self, chassis_ip, resource):
+        """
+        latest snapshot from the store; a shared store is read in a worker thread
+        """
+        if self.store.shared:
+            return await asyncio.to_thread(self.store.get, chassis_ip, resource)
+        return self.store.get(chassis_ip, resource)
+
+    async def put_snapshot(self, chassis_ip, resource, data):
+        """
+        store data collected outside the poller as the latest snapshot
+        """
+        if self.store.shared:
+            return await asyncio.to_thread(self.store.put, chassis_ip, resource, data)
+        return self.store.put(chassis_ip, resource, data)
+
+    async def refresh(self, chassis_ip, resource):
+        """
+        collect one resource from one chassis live and store the result;
+        concurrent refreshes of the same resource in this process share one
+        collection
+        """
+        key = (chassis_ip, resource)
+        task = self._refreshing.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._refresh(chassis_ip, resource))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda done: self._refresh_done(key, done))
+        # a cancelled caller does not cancel the refresh the others wait for
+        return await asyncio.shield(task)
+
+    def schedule_refresh(self, chassis_ip, resource):
+        """
+        refresh one resource of one chassis in the background, e.g. after its
+        snapshot was invalidated; a failure is recorded as its last error
+        """
+        async def run():
+            try:
+                await self.refresh(chassis_ip, resource)
+            except Exception as e:
+                logger.warning(f"Background refresh of {resource} for chassis {chassis_ip} failed: {str(e)}")
+                self.store.mark_error(chassis_ip, resource, e)
+        task = asyncio.ensure_future(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _refresh_done(self, key, task):
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+        if not task.cancelled():
+            # retrieved here so an exception nobody awaited is not reported as lost
+            task.exception()
+
+    async def _refresh(self, chassis_ip, resource):
+        lease = "refresh/%s/%s" % (chassis_ip, resource)
+        if self.store.shared:
+            previous = await self.snapshot(chassis_ip, resource)
+            if not await asyncio.to_thread(self.store.acquire_lease, lease, self.refresh_timeout):
+                snapshot = await self._wait_for_newer(chassis_ip, resource, previous, lease)
+                if snapshot is not None:
+                    return snapshot.data
+            # a collection may outlast refresh_timeout (e.g. licenses), so the
+            # lease is renewed until it is done
+            fetched = asyncio.Event()
+            renewal = asyncio.create_task(self._renew_lease(lease, fetched))
+        try:
+            data = await self.fetch(chassis_ip, resource)
+            if self.store.shared:
+                await asyncio.to_thread(self.store.put, chassis_ip, resource, data)
+            else:
+                self.store.put(chassis_ip, resource, data)
+            return data
+        finally:
+            if self.store.shared:
+                # let a renewal in progress finish so it cannot re-take the lease
+                fetched.set()
+                await asyncio.gather(renewal, return_exceptions=True)
+                await asyncio.to_thread(self.store.release_lease, lease)
+
+    async def fetch(self, chassis_ip, resource, params=None):
+        """
+        collect one resource from one chassis live without storing it; params
+        are IxOS query filters (cards and ports only) and give a partial listing
+        """
+        session = await self._session_provider(chassis_ip)
+        collector = ASYNC_COLLECTORS[resource]
+        summary = await self.snapshot(chassis_ip, "summary")
+        chassis_type = summary.data.get("chassisType", "") if summary is not None else ""
+        if params:
+            return await collector(session, chassis_ip, chassis_type, params=params)
+        return await collector(session, chassis_ip, chassis_type)
+
+    async def refresh_all(self, resource):
+        """
+        refresh one resource on every configured chassis
+        """
+        chassis_ips = await asyncio.to_thread(self._chassis_provider)
+        if self.store.shared:
+            await asyncio.to_thread(self.store.prune, chassis_ips)
+        else:
+            self.store.prune(chassis_ips)
+        await asyncio.gather(*[self._refresh_bounded(ip, resource) for ip in chassis_ips])
+
+    async def _refresh_bounded(self, chassis_ip, resource):
+        async with self._semaphore:
+            try:
+                # the poll lease is kept for a whole interval, so the other
+                # workers only pick up the snapshot its holder stored
+                interval = self.intervals.get(resource) or self.refresh_timeout
+                if self.store.shared and not await asyncio.to_thread(
+                        self.store.acquire_lease, "poll/%s/%s" % (chassis_ip, resource), interval):
+                    await self.snapshot(chassis_ip, resource)
+                    return
+                await self.refresh(chassis_ip, resource)
+            except Exception as e:
+                logger.warning(f"Background refresh of {resource} for chassis {chassis_ip} failed: {str(e)}")
+                self.store.mark_error(chassis_ip, resource, e)
+
+    async def _renew_lease(self, lease, fetched):
+        while True:
+            try:
+                await asyncio.wait_for(fetched.wait(), self.refresh_timeout / 3)
+                return
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.store.acquire_lease, lease, self.refresh_timeout)
+
+    async def _wait_for_newer(self, chassis_ip, resource, previous, lease):
+        """
+        newer snapshot stored by the lease holder, or None once the lease
+        lapsed without one; the lease is then held by this worker
+        """
+        while True:
+            await asyncio.sleep(0.2)
+            snapshot = await self.snapshot(chassis_ip, resource)
+            if snapshot is not None and (previous is None or snapshot.timestamp > previous.timestamp):
+                return snapshot
+            if await asyncio.to_thread(self.store.acquire_lease, lease, self.refresh_timeout):
+                return None
+
+    async def _run(self, resource, interval):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self.refresh_all(resource)
+            except Exception as e:
+                logger.error(f"Inventory poller for {resource} failed: {str(e)}")
+            await asyncio.sleep(max(0, interval - (loop.time() - started)))
+
+    def start(self):
+        """
+        start one polling task per resource on the running event loop
+        """
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        for resource, interval in self.intervals.items():
+            if interval > 0:
+                logger.info(f"Polling {resource} every {interval}s")
+                self._tasks.append(asyncio.create_task(self._run(resource, interval)))
+
+    async def stop(self):
+        tasks = self._tasks + list(self._background)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,347 @@
+"""
+Fleet inventory query engine
+
+Answers fleet-wide questions ("how many free 100G ports are there", "which
+chassis have expired licenses", "which port is connected to switch X") from
+the port, card and license snapshots collected by the inventory poller,
+instead of querying every chassis and aggregating the listings afterwards.
+
+Every snapshot is kept as an InventoryTable and indexed on arrival: for each
+indexed field, value -> chassis -> record positions. Filters on indexed
+fields intersect position arrays; other filters are evaluated on the tables
+of the remaining chassis only. Licenses are also kept ordered by expiry date.
+
+Classes:
+    - InventoryQueryEngine: Indexed, fleet-wide view of the inventory snapshots
+"""
+
+import bisect
+import threading
+import time
+from array import array
+from datetime import datetime, date, timedelta
+
+from IxOSInventoryTable import InventoryTable
+
+# resource -> secondary indexes; lldpSystemName is the systemName of a
+# port's lldpPeerData
+INDEXED_FIELDS = {
+    "ports": ("owner", "speed", "linkState", "cardNumber", "lldpSystemName"),
+    "cards": ("cardType", "cardState", "cardNumber"),
+    "licenses": ("partNumber", "isExpired"),
+}
+
+QUERY_RESOURCES = tuple(INDEXED_FIELDS)
+
+# expiryDate formats reported by IxOS license servers
+EXPIRY_FORMATS = ("%d-%b-%Y", "%Y-%m-%d", "%m/%d/%Y", "%d %b %Y", "%b %d, %Y", "%Y/%m/%d")
+
+
+def _norm(value):
+    return str(value).lower()
+
+
+def parse_expiry(value):
+    """
+    expiry date of a license, or None if it does not expire (Permanent, NA, ...)
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    for fmt in EXPIRY_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _field_groups(table, field):
+    if field == "lldpSystemName":
+        grouped = {}
+        for i, peer in enumerate(table.column("lldpPeerData")):
+            name = peer.get("systemName") if isinstance(peer, dict) else None
+            grouped.setdefault(name, array("I")).append(i)
+        return grouped
+    return table.groups(field)
+
+
+class _ChassisData(object):
+    __slots__ = ("table", "collected_at", "index")
+
+    def __init__(self, table, collected_at, index):
+        self.table = table
+        self.collected_at = collected_at
+        # field -> normalized value -> positions
+        self.index = index
+
+
+class InventoryQueryEngine(object):
+    """
+    Secondary indexes over the port, card and license snapshots of every
+    chassis. Use update() as an InventorySnapshotStore listener and forget()
+    as its removal listener.
+    Values are matched as strings, case-insensitively, like the listing
+    filters, so speed 100000 matches "100000" and linkState "up" matches "UP".
+    """
+
+    def __init__(self):
+        self._data = {resource: {} for resource in INDEXED_FIELDS}
+        # resource -> field -> normalized value -> {chassis IP: positions}
+        self._index = {resource: {field: {} for field in fields} for resource, fields in INDEXED_FIELDS.items()}
+        # normalized value -> value as reported, for grouped results
+        self._labels = {}
+        # (expiry date ordinal, chassis IP, position) of every expiring
+        # license, ordered, and the ordinals alone for bisecting
+        self._expiry = []
+        self._expiry_ordinals = []
+        self._lock = threading.Lock()
+
+    def update(self, chassis_ip, resource, data, collected_at=None):
+        """
+        index a new snapshot of a chassis resource
+        """
+        if resource not in INDEXED_FIELDS:
+            return
+        table = data if isinstance(data, InventoryTable) else InventoryTable.from_records(list(data or []))
+
+        index = {}
+        labels = {}
+        for field in INDEXED_FIELDS[resource]:
+            grouped = {}
+            for value, positions in _field_groups(table, field).items():
+                key = _norm(value)
+                labels.setdefault(key, value)
+                if key in grouped:
+                    positions = array("I", sorted(list(grouped[key]) + list(positions)))
+                grouped[key] = positions
+            index[field] = grouped
+
+        with self._lock:
+            self._remove(chassis_ip, resource)
+            self._data[resource][chassis_ip] = _ChassisData(table, collected_at, index)
+            for field, grouped in index.items():
+                values = self._index[resource][field]
+                for key, positions in grouped.items():
+                    values.setdefault(key, {})[chassis_ip] = positions
+            for key, value in labels.items():
+                self._labels.setdefault(key, value)
+            if resource == "licenses":
+                self._rebuild_expiry()
+
+    def query(self, resource, where=None, chassis_ip=None, fields=None, limit=100, max_age=None):
+        """
+        records of every chassis matching all where conditions
+
+        Args:
+            resource (str): ports, cards or licenses
+            where (dict): Field -> value; indexed fields are looked up in the
+                indexes, other fields of the records are compared one by one
+            chassis_ip (str): Optional chassis to query
+            fields (list): Keys to return per record, None for all
+            limit (int): Maximum number of records returned
+            max_age (float): Skip chassis whose snapshot is older than this
+                many seconds, e.g. unreachable chassis
+
+        Returns:
+            dict: total (number of matching records), records, truncated
+        """
+        records = []
+        total = 0
+        with self._lock:
+            for ip, data, positions in self._matches(resource, where, chassis_ip, max_age):
+                total += len(positions)
+                if len(records) < limit:
+                    records.extend(data.table.rows(positions[:limit - len(records)], fields))
+        return {"total": total, "records": records, "truncated": total > len(records)}
+
+    def aggregate(self, resource, where=None, group_by="chassisIp", chassis_ip=None, max_age=None):
+        """
+        number of matching records per value of group_by
+
+        Args:
+            resource (str): ports, cards or licenses
+            where (dict): Field -> value conditions, see query
+            group_by (str): Record field to count by, e.g. chassisIp, speed,
+                owner or cardType
+            chassis_ip (str): Optional chassis to count the records of
+            max_age (float): Skip chassis whose snapshot is older than this
+                many seconds, see query
+
+        Returns:
+            dict: total and groups, a list of {value, count}, largest first
+        """
+        counts = {}
+        total = 0
+        with self._lock:
+            index = self._index[resource].get(group_by)
+            for ip, data, positions in self._matches(resource, where, chassis_ip, max_age):
+                total += len(positions)
+                if group_by == "chassisIp":
+                    counts[ip] = counts.get(ip, 0) + len(positions)
+                elif index is not None:
+                    selected = set(positions)
+                    for key, value_positions in data.index[group_by].items():
+                        count = len(selected.intersection(value_positions))
+                        if count:
+                            counts[key] = counts.get(key, 0) + count
+                else:
+                    column = data.table.column(group_by)
+                    for i in positions:
+                        key = _norm(column[i])
+                        self._labels.setdefault(key, column[i])
+                        counts[key] = counts.get(key, 0) + 1
+            groups = [
+                {"value": self._labels.get(key, key) if group_by != "chassisIp" else key, "count": count}
+                for key, count in sorted(counts.items(), key=lambda item: -item[1])
+            ]
+        return {"total": total, "groups": groups}
+
+    def find_lldp_neighbors(self, system_name, exact=False, max_age=None):
+        """
+        ports whose LLDP peer system name matches system_name
+
+        Args:
+            system_name (str): Name of the neighbor, e.g. a switch hostname
+            exact (bool): Match the whole name instead of a substring
+            max_age (float): Skip chassis whose snapshot is older than this
+                many seconds, see query
+
+        Returns:
+            list: chassisIp, fullyQualifiedPortName, cardNumber, portNumber,
+                linkState, owner and lldpPeerData of every matching port
+        """
+        wanted = _norm(system_name)
+        fields = ["chassisIp", "fullyQualifiedPortName", "cardNumber", "portNumber", "linkState", "owner", "lldpPeerData"]
+        ports = []
+        with self._lock:
+            for key, chassis in self._index["ports"]["lldpSystemName"].items():
+                if key == "none" or (key != wanted if exact else wanted not in key):
+                    continue
+                for ip, positions in chassis.items():
+                    if self._stale(ip, "ports", max_age):
+                        continue
+                    ports.extend(self._data["ports"][ip].table.rows(positions, fields))
+        return ports
+
+    def expiring_licenses(self, within_days=0, chassis_ip=None, part_number=None, max_age=None, today=None):
+        """
+        licenses expired or expiring within within_days days, soonest first
+
+        Args:
+            within_days (int): 0 for licenses already expired or expiring today
+            chassis_ip (str): Optional chassis to return the licenses of
+            part_number (str): Optional part number the licenses must have
+            max_age (float): Skip chassis whose snapshot is older than this
+                many seconds, see query
+            today (date): Reference date, today by default
+
+        Returns:
+            list: License records with an added daysToExpiry
+        """
+        today = today or date.today()
+        cutoff = (today + timedelta(days=within_days)).toordinal()
+        wanted = _norm(part_number) if part_number is not None else None
+        licenses = []
+        with self._lock:
+            end = bisect.bisect_right(self._expiry_ordinals, cutoff)
+            for ordinal, ip, position in self._expiry[:end]:
+                if chassis_ip is not None and ip != chassis_ip or self._stale(ip, "licenses", max_age):
+                    continue
+                record = self._data["licenses"][ip].table[position]
+                if wanted is not None and _norm(record.get("partNumber")) != wanted:
+                    continue
+                record["daysToExpiry"] = ordinal - today.toordinal()
+                licenses.append(record)
+        return licenses
+
+    def forget(self, chassis_ip):
+        """
+        drop every snapshot of a chassis that is no longer configured
+        """
+        with self._lock:
+            had_licenses = chassis_ip in self._data["licenses"]
+            for resource in self._data:
+                self._remove(chassis_ip, resource)
+            if had_licenses:
+                self._rebuild_expiry()
+
+    def stats(self):
+        with self._lock:
+            return {
+                resource: {
+                    "chassis": len(chassis),
+                    "records": sum(len(data.table) for data in chassis.values()),
+                    "indexed_values": {field: len(values) for field, values in self._index[resource].items()}
+                }
+                for resource, chassis in self._data.items()
+            }
+
+    def _matches(self, resource, where, chassis_ip, max_age):
+        """
+        yield (chassis IP, chassis data, sorted positions) with at least one match
+        """
+        if resource not in INDEXED_FIELDS:
+            raise ValueError("unknown resource %r, expected one of %s" % (resource, list(INDEXED_FIELDS)))
+        where = {k: v for k, v in (where or {}).items() if v is not None}
+        indexed = {k: _norm(v) for k, v in where.items() if k in self._index[resource]}
+        scanned = {k: v for k, v in where.items() if k not in indexed}
+
+        chassis = self._data[resource]
+        candidates = [chassis_ip] if chassis_ip is not None else list(chassis)
+        # most selective index first
+        lookups = sorted(
+            (self._index[resource][field].get(value, {}) for field, value in indexed.items()),
+            key=len
+        )
+        for lookup in lookups:
+            candidates = [ip for ip in candidates if ip in lookup]
+        for ip in candidates:
+            data = chassis.get(ip)
+            if data is None or self._stale(ip, resource, max_age):
+                continue
+            positions = None
+            for lookup in lookups:
+                hits = lookup[ip]
+                if positions is None:
+                    positions = list(hits)
+                else:
+                    hits = set(hits)
+                    positions = [i for i in positions if i in hits]
+            if scanned:
+                selected = data.table.select(scanned)
+                positions = list(selected) if positions is None else sorted(set(positions).intersection(selected))
+            elif positions is None:
+                positions = range(len(data.table))
+            if len(positions):
+                yield ip, data, positions
+
+    def _stale(self, chassis_ip, resource, max_age):
+        data = self._data[resource].get(chassis_ip)
+        if max_age is None or data is None or data.collected_at is None:
+            return False
+        return time.time() - data.collected_at > max_age
+
+    def _remove(self, chassis_ip, resource):
+        data = self._data[resource].pop(chassis_ip, None)
+        if data is None:
+            return
+        for field, grouped in data.index.items():
+            values = self._index[resource][field]
+            for key in grouped:
+                chassis = values.get(key)
+                if chassis is not None:
+                    chassis.pop(chassis_ip, None)
+                    if not chassis:
+                        del values[key]
+
+    def _rebuild_expiry(self):
+        expiry = []
+        for ip, data in self._data["licenses"].items():
+            for position, value in enumerate(data.table.column("expiryDate")):
+                expires = parse_expiry(value)
+                if expires is not None:
+                    expiry.append((expires.toordinal(), ip, position))
+        expiry.sort()
+        self._expiry = expiry
+        self._expiry_ordinals = [entry[0] for entry in expiry]
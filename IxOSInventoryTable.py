@@ -0,0 +1,303 @@
+"""
+Columnar inventory tables
+
+A port, card or sensor listing is a list of dicts that repeat the same keys
+and, per chassis, the same values (chassisIp, typeOfChassis,
+lastUpdatedAt_UTC, totalPorts, ...). InventoryTable keeps such a listing
+column-wise instead:
+
+    - a column holding one value on every record is stored once
+    - every other column is dictionary encoded: its distinct values, with
+      strings interned so equal strings of different chassis share memory,
+      and one small integer code per record in an array (linkState, owner,
+      speed and similar columns end up as one-byte enums)
+    - values that cannot be dictionary encoded (e.g. lldpPeerData dicts) are
+      kept in a plain list
+    - the key order of every record is kept as a shared layout, so records
+      rebuilt from the table are identical to the original ones
+
+Records are rebuilt as dicts lazily, only when they are returned by the API;
+filters are evaluated once per distinct column value instead of once per
+record.
+
+Classes:
+    - InventoryTable: Columnar, read-only listing of inventory records
+
+Functions:
+    - to_table: Convert a listing to an InventoryTable if it is worth it
+"""
+
+import itertools
+import sys
+from array import array
+
+# snapshot resources stored as tables
+TABLE_RESOURCES = ("cards", "ports", "sensors")
+
+_CONSTANT = "const"
+_CODED = "coded"
+_PLAIN = "plain"
+
+
+def _typecode(size):
+    if size <= 0xFF:
+        return "B"
+    if size <= 0xFFFF:
+        return "H"
+    return "I"
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _encode_column(values):
+    """
+    (kind, payload) of one column given the value of every record
+    """
+    codes = {}
+    distinct = []
+    encoded = []
+    for value in values:
+        # type is part of the key so that 1, 1.0 and True stay distinct
+        try:
+            key = (type(value), value)
+            code = codes.get(key)
+        except TypeError:
+            return _PLAIN, list(values)
+        if code is None:
+            code = codes[key] = len(distinct)
+            distinct.append(_intern(value))
+        encoded.append(code)
+    if len(distinct) == 1:
+        return _CONSTANT, distinct[0]
+    return _CODED, (distinct, array(_typecode(len(distinct)), encoded))
+
+
+class InventoryTable(object):
+    """
+    Read-only columnar listing; iterating it, indexing it or calling rows()
+    rebuilds the original records as new dicts. Build it with from_records().
+    """
+    __slots__ = ("_length", "_columns", "_layouts", "_layout_codes")
+
+    def __init__(self, length, columns, layouts, layout_codes):
+        self._length = length
+        self._columns = columns
+        self._layouts = layouts
+        self._layout_codes = layout_codes
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        build a table from a list of flat dicts; the records are left unchanged
+        """
+        layouts = []
+        layout_index = {}
+        layout_codes = []
+        keys = {}
+        for record in records:
+            layout = tuple(record)
+            code = layout_index.get(layout)
+            if code is None:
+                code = layout_index[layout] = len(layouts)
+                layouts.append(layout)
+                for key in layout:
+                    keys.setdefault(key, None)
+            layout_codes.append(code)
+
+        columns = {}
+        for key in keys:
+            # records without the key never read the column at their position
+            columns[sys.intern(key)] = _encode_column([record.get(key) for record in records])
+        layouts = [tuple(sys.intern(k) for k in layout) for layout in layouts]
+        return cls(len(records), columns, layouts, array(_typecode(len(layouts)), layout_codes))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self.rows()
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("table index out of range")
+        return next(self.rows((index,)))
+
+    def keys(self):
+        """
+        every key used by at least one record
+        """
+        return list(self._columns)
+
+    def column(self, key):
+        """
+        value of key on every record, None where a record does not have it
+        """
+        kind, payload = self._columns.get(key, (_CONSTANT, None))
+        if kind == _CONSTANT:
+            return [payload] * self._length
+        if kind == _PLAIN:
+            return list(payload)
+        distinct, codes = payload
+        return [distinct[c] for c in codes]
+
+    def distinct(self, key):
+        """
+        distinct values of one column
+        """
+        kind, payload = self._columns.get(key, (_CONSTANT, None))
+        if kind == _CONSTANT:
+            return [payload]
+        if kind == _CODED:
+            return list(payload[0])
+        return list(payload)
+
+    def groups(self, key):
+        """
+        value -> positions (array) of the records holding it, for one column;
+        unhashable values are grouped by their string form
+        """
+        kind, payload = self._columns.get(key, (_CONSTANT, None))
+        if kind == _CONSTANT:
+            return {payload: array(_typecode(self._length), range(self._length))}
+        typecode = _typecode(self._length)
+        if kind == _PLAIN:
+            grouped = {}
+            for i, value in enumerate(payload):
+                try:
+                    grouped.setdefault(value, array(typecode)).append(i)
+                except TypeError:
+                    grouped.setdefault(str(value), array(typecode)).append(i)
+            return grouped
+        distinct, codes = payload
+        buckets = [array(typecode) for _ in distinct]
+        for i, code in enumerate(codes):
+            buckets[code].append(i)
+        grouped = {}
+        for value, bucket in zip(distinct, buckets):
+            if value in grouped:
+                # equal values of different types, e.g. 1 and True
+                bucket = array(typecode, sorted(grouped[value] + bucket))
+            grouped[value] = bucket
+        return grouped
+
+    def select(self, match=None):
+        """
+        positions of the records matching every match key -> value pair
+
+        Values are compared as strings, case-insensitively, like
+        IxOSRestCallerModifier.filter_records; None values are ignored.
+        """
+        positions = None
+        for key, wanted in (match or {}).items():
+            if wanted is None:
+                continue
+            wanted = str(wanted).lower()
+            column = self._columns.get(key)
+            if column is None:
+                hits = None if wanted == "none" else []
+            elif column[0] == _CONSTANT:
+                hits = None if str(column[1]).lower() == wanted else []
+            elif column[0] == _CODED:
+                distinct, codes = column[1]
+                # one comparison per distinct value, not per record
+                accepted = [str(value).lower() == wanted for value in distinct]
+                hits = list(itertools.compress(range(self._length), map(accepted.__getitem__, codes)))
+            else:
+                hits = [i for i, value in enumerate(column[1]) if str(value).lower() == wanted]
+            if hits is None:
+                continue
+            if positions is None:
+                positions = hits
+            else:
+                keep = set(hits)
+                positions = [i for i in positions if i in keep]
+            if not positions:
+                break
+        return range(self._length) if positions is None else positions
+
+    def rows(self, positions=None, fields=None):
+        """
+        yield the records at positions (all by default) as new dicts
+
+        Args:
+            positions (iterable): Record positions, e.g. from select()
+            fields (list): Keys to keep in every record, None for all
+        """
+        positions = range(self._length) if positions is None else list(positions)
+        keys = [k for k in fields if k in self._columns] if fields else list(self._columns)
+        # one lazy iterator per returned column, zipped into one value tuple per record
+        columns = [self._values(key, positions) for key in keys]
+        slot = {key: i for i, key in enumerate(keys)}
+        pickers = []
+        for layout in self._layouts:
+            if fields:
+                present = set(layout)
+                layout = tuple(k for k in fields if k in present)
+            slots = [slot[k] for k in layout]
+            # records holding every column in column order take the value tuple as it is
+            pickers.append((layout, None if slots == list(range(len(keys))) else slots))
+        layout_codes = map(self._layout_codes.__getitem__, positions)
+        records = zip(*columns) if columns else itertools.repeat((), len(positions))
+        for code, values in zip(layout_codes, records):
+            layout, slots = pickers[code]
+            if slots is not None:
+                values = [values[i] for i in slots]
+            yield dict(zip(layout, values))
+
+    def filter(self, match=None, fields=None):
+        """
+        list of the matching records, same result as filter_records on the
+        original list of records
+        """
+        return list(self.rows(self.select(match), fields))
+
+    def to_dict(self):
+        """
+        JSON-serializable form of the table, see from_dict
+        """
+        columns = {}
+        for key, (kind, payload) in self._columns.items():
+            if kind == _CODED:
+                payload = [payload[0], list(payload[1])]
+            columns[key] = [kind, payload]
+        return {
+            "length": self._length,
+            "columns": columns,
+            "layouts": [list(layout) for layout in self._layouts],
+            "layoutCodes": list(self._layout_codes)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = {}
+        for key, (kind, payload) in data["columns"].items():
+            if kind == _CODED:
+                distinct = [_intern(value) for value in payload[0]]
+                payload = (distinct, array(_typecode(len(distinct)), payload[1]))
+            elif kind == _CONSTANT:
+                payload = _intern(payload)
+            columns[sys.intern(key)] = (kind, payload)
+        layouts = [tuple(sys.intern(k) for k in layout) for layout in data["layouts"]]
+        return cls(data["length"], columns, layouts, array(_typecode(len(layouts)), data["layoutCodes"]))
+
+    def _values(self, key, positions):
+        kind, payload = self._columns[key]
+        if kind == _CONSTANT:
+            return itertools.repeat(payload, len(positions))
+        if kind == _PLAIN:
+            return map(payload.__getitem__, positions)
+        distinct, codes = payload
+        return map(distinct.__getitem__, map(codes.__getitem__, positions))
+
+
+def to_table(resource, data):
+    """
+    InventoryTable of a cards/ports/sensors listing; other data is returned as is
+    """
+    if resource in TABLE_RESOURCES and isinstance(data, list) and all(isinstance(r, dict) for r in data):
+        return InventoryTable.from_records(data)
+    return data
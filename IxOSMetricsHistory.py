@@ -0,0 +1,296 @@
+"""
+Chassis metrics history
+
+Keeps a local time series of the CPU, memory and sensor readings collected by
+the inventory poller, so trends can be answered without touching the chassis.
+Samples are stored in a SQLite file as (series id, epoch second, value) rows
+and rolled up into 1 minute, 5 minute and 1 hour min/max/avg buckets as they
+are written. Every resolution has its own retention and older rows are
+evicted periodically.
+
+Classes:
+    - MetricsHistoryStore: SQLite-backed sample and roll-up store
+"""
+
+import logging
+import math
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# roll-up name -> bucket width in seconds
+RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600}
+
+# default retention in seconds per resolution ("raw" are the samples themselves)
+DEFAULT_RETENTION = {"raw": 86400, "1m": 7 * 86400, "5m": 30 * 86400, "1h": 365 * 86400}
+
+# range queries up to this many seconds return raw samples by default, longer
+# ones the finest roll-up returning at most MAX_POINTS points
+RAW_QUERY_SPAN = 3600
+MAX_POINTS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    chassis_ip TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    UNIQUE (chassis_ip, metric)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    series_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    series_id INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    sum REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (series_id, width, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (series_id, width, bucket, min, max, sum, count)
+VALUES (?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (series_id, width, bucket) DO UPDATE SET
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max),
+    sum = sum + excluded.sum,
+    count = count + 1
+"""
+
+
+def extract_metrics(resource, data):
+    """
+    numeric (metric name, value) pairs of one collected inventory resource
+
+    Args:
+        resource (str): Inventory resource the data was collected for
+        data: Payload stored by the inventory poller for that resource
+
+    Returns:
+        list: (metric, value) tuples; empty for resources without metrics
+    """
+    metrics = []
+    if resource == "performance":
+        for key in ("cpu_utilization", "mem_utilization"):
+            metrics.append((key, data.get(key)))
+    elif resource == "sensors":
+        for sensor in data:
+            metrics.append(("sensor.%s" % sensor.get("name"), sensor.get("value")))
+    samples = []
+    for metric, value in metrics:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not math.isnan(value):
+            samples.append((metric, value))
+    return samples
+
+
+class MetricsHistoryStore(object):
+    """
+    SQLite-backed metrics history.
+    Samples are queued by record() and written by a single writer thread, so
+    recording never blocks the caller on disk I/O.
+    Constructor arguments:
+        path:               SQLite file; ":memory:" keeps the history in memory
+        retention:          Seconds to keep per resolution, see DEFAULT_RETENTION
+        evict_interval:     Seconds between eviction runs
+    """
+
+    def __init__(self, path, retention=None, evict_interval=300):
+        self.path = path
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.evict_interval = evict_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._series = {}
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name='ixos-metrics-history', daemon=True)
+        self._writer.start()
+
+    def record(self, chassis_ip, resource, data, ts=None):
+        """
+        queue the metrics of one collected resource for writing
+        """
+        samples = extract_metrics(resource, data)
+        if samples:
+            self._queue.put((chassis_ip, int(ts if ts is not None else time.time()), samples))
+
+    def flush(self, timeout=None):
+        """
+        wait until every queued sample is written
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def metrics(self, chassis_ip=None):
+        """
+        recorded metric names, grouped by chassis
+        """
+        with self._lock:
+            if chassis_ip is None:
+                rows = self._conn.execute("SELECT chassis_ip, metric FROM series ORDER BY chassis_ip, metric").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT chassis_ip, metric FROM series WHERE chassis_ip = ? ORDER BY metric", (chassis_ip,)
+                ).fetchall()
+        grouped = {}
+        for ip, metric in rows:
+            grouped.setdefault(ip, []).append(metric)
+        return grouped
+
+    def query(self, chassis_ip, metric, start, end=None, resolution=None):
+        """
+        points of one metric between start and end (epoch seconds)
+
+        Args:
+            chassis_ip (str): IP address of the chassis
+            metric (str): Metric name, see metrics()
+            start (float): Range start in epoch seconds
+            end (float): Range end in epoch seconds, None for now
+            resolution (str): "raw", "1m", "5m" or "1h"; None picks raw for
+                short ranges, else the finest roll-up within MAX_POINTS points
+
+        Returns:
+            dict: resolution and points; raw points are {ts, value}, roll-up
+                points are {ts, min, max, avg, count}
+        """
+        end = time.time() if end is None else end
+        if resolution is None:
+            resolution = self._pick_resolution(end - start)
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError("unknown resolution %r, expected raw or one of %s" % (resolution, list(RESOLUTIONS)))
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM series WHERE chassis_ip = ? AND metric = ?", (chassis_ip, metric)
+            ).fetchone()
+            if row is None:
+                return {"resolution": resolution, "points": []}
+            if resolution == "raw":
+                rows = self._conn.execute(
+                    "SELECT ts, value FROM samples WHERE series_id = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                    (row[0], int(start), int(end))
+                ).fetchall()
+                points = [{"ts": ts, "value": value} for ts, value in rows]
+            else:
+                width = RESOLUTIONS[resolution]
+                rows = self._conn.execute(
+                    "SELECT bucket, min, max, sum, count FROM rollups "
+                    "WHERE series_id = ? AND width = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                    (row[0], width, int(start) // width * width, int(end))
+                ).fetchall()
+                points = [{
+                    "ts": bucket,
+                    "min": min_value,
+                    "max": max_value,
+                    "avg": total / count,
+                    "count": count
+                } for bucket, min_value, max_value, total, count in rows]
+        return {"resolution": resolution, "points": points}
+
+    def stats(self):
+        with self._lock:
+            counts = {
+                "series": self._conn.execute("SELECT COUNT(*) FROM series").fetchone()[0],
+                "samples": self._conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0],
+                "rollups": self._conn.execute("SELECT COUNT(*) FROM rollups").fetchone()[0],
+            }
+        counts["queued"] = self._queue.qsize()
+        return counts
+
+    def evict(self, now=None):
+        """
+        delete samples and roll-ups older than their retention
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("DELETE FROM samples WHERE ts < ?", (int(now - self.retention["raw"]),))
+            for name, width in RESOLUTIONS.items():
+                self._conn.execute(
+                    "DELETE FROM rollups WHERE width = ? AND bucket < ?", (width, int(now - self.retention[name]))
+                )
+            self._conn.commit()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    def _pick_resolution(self, span):
+        if span <= min(RAW_QUERY_SPAN, self.retention["raw"]):
+            return "raw"
+        for name, width in RESOLUTIONS.items():
+            if span / width <= MAX_POINTS:
+                return name
+        return "1h"
+
+    def _series_id(self, chassis_ip, metric):
+        key = (chassis_ip, metric)
+        series_id = self._series.get(key)
+        if series_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO series (chassis_ip, metric) VALUES (?, ?)", key)
+            series_id = self._conn.execute(
+                "SELECT id FROM series WHERE chassis_ip = ? AND metric = ?", key
+            ).fetchone()[0]
+            self._series[key] = series_id
+        return series_id
+
+    def _write(self, batch):
+        with self._lock:
+            for chassis_ip, ts, samples in batch:
+                for metric, value in samples:
+                    series_id = self._series_id(chassis_ip, metric)
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO samples (series_id, ts, value) VALUES (?, ?, ?)",
+                        (series_id, ts, value)
+                    )
+                    # a second sample within the same second is dropped, not rolled up twice
+                    if not cursor.rowcount:
+                        continue
+                    for width in RESOLUTIONS.values():
+                        self._conn.execute(_UPSERT_ROLLUP, (series_id, width, ts // width * width, value, value, value))
+            self._conn.commit()
+
+    def _run(self):
+        next_eviction = time.monotonic() + self.evict_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, next_eviction - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            # drain whatever else is queued so it is written in one transaction
+            items = [item]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [i for i in items if isinstance(i, tuple) and i]
+            try:
+                if batch:
+                    self._write(batch)
+                if time.monotonic() >= next_eviction:
+                    self.evict()
+                    next_eviction = time.monotonic() + self.evict_interval
+            except Exception as e:
+                logger.error(f"Error writing metrics history: {str(e)}")
+            for i in items:
+                if isinstance(i, threading.Event):
+                    i.set()
+            if None in items:
+                return
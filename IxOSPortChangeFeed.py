@@ -0,0 +1,163 @@
+"""
+Port state change feed
+
+Keeps the last port listing of every chassis, keyed by fullyQualifiedPortName,
+and turns every new listing stored by the inventory poller into field-level
+change events (owner, link state, speed, transceiver, ...). Clients read the
+events after a cursor instead of re-listing and diffing all ports themselves.
+
+Classes:
+    - PortChangeFeed: Computes and buffers port change events
+"""
+
+import asyncio
+import collections
+import itertools
+import threading
+from datetime import datetime, timezone
+
+# port fields compared between two listings
+WATCHED_FIELDS = ("owner", "linkState", "speed", "phyMode", "transceiverModel", "transceiverManufacturer")
+
+
+class PortChangeFeed(object):
+    """
+    Buffer of port change events with increasing sequence numbers.
+    The first listing of a chassis only sets its baseline; later listings
+    produce one event per changed, added or removed port. Use update() as an
+    InventorySnapshotStore listener and forget() as its removal listener.
+    Constructor arguments:
+        max_events:     Number of most recent events kept for cursors
+        fields:         Port fields compared between listings
+    """
+
+    def __init__(self, max_events=10000, fields=WATCHED_FIELDS):
+        self.fields = fields
+        self._events = collections.deque(maxlen=max_events)
+        self._ports = {}
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def update(self, chassis_ip, resource, port_list, collected_at=None):
+        """
+        diff a new port listing of a chassis against the previous one
+        """
+        if resource != "ports":
+            return
+        ports = {}
+        for port in port_list:
+            name = port.get("fullyQualifiedPortName") or "%s/%s" % (port.get("cardNumber"), port.get("portNumber"))
+            ports[name] = {field: port.get(field) for field in self.fields}
+            ports[name]["cardNumber"] = port.get("cardNumber")
+            ports[name]["portNumber"] = port.get("portNumber")
+
+        at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+        with self._lock:
+            previous = self._ports.get(chassis_ip)
+            self._ports[chassis_ip] = ports
+            if previous is None:
+                return
+            last_seq = self._last_seq
+            for name, state in ports.items():
+                old = previous.get(name)
+                if old is None:
+                    changes = {field: {"old": None, "new": state[field]} for field in self.fields}
+                    self._append(chassis_ip, name, state, "added", changes, at)
+                    continue
+                changes = {
+                    field: {"old": old[field], "new": state[field]}
+                    for field in self.fields if old[field] != state[field]
+                }
+                if changes:
+                    self._append(chassis_ip, name, state, "changed", changes, at)
+            for name, old in previous.items():
+                if name not in ports:
+                    changes = {field: {"old": old[field], "new": None} for field in self.fields}
+                    self._append(chassis_ip, name, old, "removed", changes, at)
+            waiters = list(self._waiters) if self._last_seq != last_seq else []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def forget(self, chassis_ip):
+        """
+        drop the baseline of a chassis that is no longer configured; its
+        buffered events age out like any other
+        """
+        with self._lock:
+            self._ports.pop(chassis_ip, None)
+
+    def latest(self):
+        """
+        cursor of the newest event; changes(latest()) returns only later events
+        """
+        with self._lock:
+            return self._last_seq
+
+    def changes(self, since=0, chassis_ip=None, limit=1000):
+        """
+        events with a sequence number above since
+
+        Args:
+            since (int): Cursor returned by a previous call, 0 for all buffered events
+            chassis_ip (str): Optional chassis to return events of
+            limit (int): Maximum number of events returned
+
+        Returns:
+            dict:
+                - events: The events, oldest first
+                - cursor: Pass as since to get the next events
+                - truncated: True if events after since were already dropped
+                  from the buffer, so the caller should re-list the ports
+        """
+        with self._lock:
+            oldest = self._events[0]["seq"] if self._events else self._last_seq + 1
+            events = []
+            cursor = max(since, 0)
+            for event in self._events:
+                if event["seq"] <= since:
+                    continue
+                if len(events) >= limit:
+                    break
+                cursor = event["seq"]
+                if chassis_ip is None or event["chassisIp"] == chassis_ip:
+                    events.append(event)
+            if len(events) < limit:
+                # nothing newer is buffered, the cursor can move to the end
+                cursor = max(cursor, self._last_seq)
+            truncated = since + 1 < oldest and since < self._last_seq
+        return {"events": events, "cursor": cursor, "truncated": truncated}
+
+    async def wait(self, since, timeout):
+        """
+        wait until there are events after since or the timeout expired
+        """
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self._last_seq > since:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def _append(self, chassis_ip, name, state, kind, changes, at):
+        seq = next(self._seq)
+        self._last_seq = seq
+        self._events.append({
+            "seq": seq,
+            "chassisIp": chassis_ip,
+            "port": name,
+            "cardNumber": state["cardNumber"],
+            "portNumber": state["portNumber"],
+            "change": kind,
+            "fields": changes,
+            "detectedAt_UTC": at
+        })
@@ -0,0 +1,206 @@
+"""
+Port statistics rates
+
+Turns consecutive /portstats samples of a chassis into per-second rates. The
+last sample of every chassis is kept column-wise: one array of port names and
+one array('d') per counter, so computing the rates of all ports is one pass
+per counter over two aligned arrays instead of a dict lookup per port.
+
+Classes:
+    - PortStatsTracker: Keeps the last sample and rates of every chassis
+"""
+
+import heapq
+import math
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+from IxOSRestCallerModifier import PORT_STAT_COUNTERS
+
+# rate name -> counters summed into it
+RATE_METRICS = dict(
+    {counter: (counter,) for counter in PORT_STAT_COUNTERS},
+    frames=("framesSent", "framesReceived"),
+    bytes=("bytesSent", "bytesReceived"),
+)
+
+_NAN = float("nan")
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+class _ChassisStats(object):
+    __slots__ = ("names", "positions", "counters", "rates", "timestamp", "sampled_at", "interval")
+
+    def __init__(self, names, counters, timestamp):
+        self.names = names
+        self.positions = None
+        self.counters = counters
+        self.rates = None
+        self.timestamp = timestamp
+        self.sampled_at = datetime.fromtimestamp(timestamp, timezone.utc)
+        self.interval = None
+
+    def position(self, name):
+        if self.positions is None:
+            self.positions = {n: i for i, n in enumerate(self.names)}
+        return self.positions.get(name)
+
+
+class PortStatsTracker(object):
+    """
+    Per-second port rates computed from the two latest /portstats samples of
+    every chassis. A rate is NaN (reported as None) for a port's first sample,
+    a missing counter or a counter that went backwards (cleared statistics).
+    Use update() as an InventorySnapshotStore listener and forget() as its
+    removal listener.
+    Constructor arguments:
+        min_interval:   Samples taken less than this many seconds after the
+                        kept sample are ignored, so two nearly simultaneous
+                        samples do not produce noisy rates
+    """
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._chassis = {}
+        self._lock = threading.Lock()
+
+    def update(self, chassis_ip, resource, stats_list, collected_at=None):
+        """
+        add a sample of port statistics records (see get_port_statistics)
+        collected at epoch time collected_at
+        """
+        if resource != "portstats":
+            return
+        now = time.time() if collected_at is None else collected_at
+        with self._lock:
+            previous = self._chassis.get(chassis_ip)
+        if previous is not None and now - previous.timestamp < self.min_interval:
+            return
+        names = [stats.get("fullyQualifiedPortName") for stats in stats_list]
+        counters = {
+            counter: array("d", (_as_float(stats.get(counter)) for stats in stats_list))
+            for counter in PORT_STAT_COUNTERS
+        }
+        current = _ChassisStats(names, counters, now)
+        if previous is not None:
+            current.interval = now - previous.timestamp
+            current.rates = self._rates(previous, current)
+        with self._lock:
+            self._chassis[chassis_ip] = current
+
+    def forget(self, chassis_ip):
+        """
+        drop the samples of a chassis that is no longer configured
+        """
+        with self._lock:
+            self._chassis.pop(chassis_ip, None)
+
+    def sample_count(self, chassis_ip):
+        """
+        0 without samples, 1 after the first sample, 2 once rates are known
+        """
+        with self._lock:
+            stats = self._chassis.get(chassis_ip)
+        if stats is None:
+            return 0
+        return 2 if stats.rates is not None else 1
+
+    def rates(self, chassis_ip):
+        """
+        per-second rates of every port of a chassis
+
+        Returns:
+            dict: chassisIp, intervalSeconds, sampledAt_UTC and ports, a list
+                with fullyQualifiedPortName and one <metric>PerSec per
+                RATE_METRICS entry; None if no rates are known yet
+        """
+        with self._lock:
+            stats = self._chassis.get(chassis_ip)
+        if stats is None or stats.rates is None:
+            return None
+        ports = []
+        for i, name in enumerate(stats.names):
+            port = {"fullyQualifiedPortName": name}
+            for metric, column in stats.rates.items():
+                value = column[i]
+                port[metric + "PerSec"] = None if math.isnan(value) else value
+            ports.append(port)
+        return {
+            "chassisIp": chassis_ip,
+            "intervalSeconds": round(stats.interval, 3),
+            "sampledAt_UTC": stats.sampled_at.strftime("%m/%d/%Y, %H:%M:%S"),
+            "ports": ports
+        }
+
+    def top(self, metric, n=10, chassis_ip=None, smallest=False, max_age=None):
+        """
+        the n ports with the highest (or lowest) rate of one metric
+
+        Args:
+            metric (str): One of RATE_METRICS, e.g. "bytes" for the busiest
+                ports or "crcErrors" for ports with rising CRC errors
+            n (int): Number of ports returned
+            chassis_ip (str): Optional chassis to rank the ports of
+            smallest (bool): Return the lowest rates instead of the highest
+            max_age (float): Skip chassis whose last sample is older than
+                this many seconds, e.g. unreachable chassis
+
+        Returns:
+            list: {chassisIp, fullyQualifiedPortName, <metric>PerSec} entries
+        """
+        if metric not in RATE_METRICS:
+            raise ValueError("unknown metric %r, expected one of %s" % (metric, list(RATE_METRICS)))
+        with self._lock:
+            if chassis_ip is None:
+                chassis = list(self._chassis.items())
+            else:
+                chassis = [(chassis_ip, self._chassis[chassis_ip])] if chassis_ip in self._chassis else []
+        if max_age is not None:
+            now = time.time()
+            chassis = [(ip, stats) for ip, stats in chassis if now - stats.timestamp <= max_age]
+        candidates = (
+            (value, ip, name)
+            for ip, stats in chassis if stats.rates is not None
+            for name, value in zip(stats.names, stats.rates[metric]) if not math.isnan(value)
+        )
+        select = heapq.nsmallest if smallest else heapq.nlargest
+        return [{
+            "chassisIp": ip,
+            "fullyQualifiedPortName": name,
+            metric + "PerSec": value
+        } for value, ip, name in select(n, candidates, key=lambda c: c[0])]
+
+    @staticmethod
+    def _rates(previous, current):
+        interval = current.timestamp - previous.timestamp
+        if previous.names == current.names:
+            aligned = previous.counters
+        else:
+            # ports were added or removed: line the previous sample up with the current one
+            positions = [previous.position(name) for name in current.names]
+            aligned = {
+                counter: array("d", (column[p] if p is not None else _NAN for p in positions))
+                for counter, column in previous.counters.items()
+            }
+
+        counter_rates = {}
+        for counter, column in current.counters.items():
+            counter_rates[counter] = array("d", (
+                (new - old) / interval if new >= old else _NAN
+                for new, old in zip(column, aligned[counter])
+            ))
+        rates = {}
+        for metric, counters in RATE_METRICS.items():
+            if len(counters) == 1:
+                rates[metric] = counter_rates[counters[0]]
+            else:
+                rates[metric] = array("d", map(sum, zip(*(counter_rates[c] for c in counters))))
+        return rates
@@ -13,17 +13,26 @@ Functions:
     - get_chassis_cards_information: Get information about cards installed
     - get_chassis_ports_information: Get port status and configuration
     - get_license_activation: Get licensing information
+    - start_license_activation: Start license retrieval as an async operation
+    - get_license_host_ids: Get the host IDs of the license servers
     - get_sensor_information: Get chassis sensor readings
     - get_perf_metrics: Get performance metrics
+    - get_port_statistics: Get traffic and error counters of every port
+    - split_summary: Move per-chassis keys out of records into a trailer record
+    - filter_records: Filter and project processed records in a single pass
+
+Every collector is split into a fetch step and a process_* step. The process_*
+functions only transform already fetched IxOS payloads, so they are shared with
+the asyncio collectors in IxOSAsyncRestCallerModifier.
 
 Author: Keysight Technologies
 """
 
-import json
 import math
 from datetime import datetime, timezone
 import logging
-import time
+
+from RestApi.IxOSRequestMetrics import instrument_collector, instrument_processing
 
 logger = logging.getLogger(__name__)
 
@@ -45,31 +54,26 @@ def convert_size(size_bytes):
     s = round(size_bytes / p, 2)
     return "%s %s" % (s, size_name[i])
 
-def get_perf_metrics(session, chassisIp):
+@instrument_processing('perf')
+def process_perf_metrics(perf, chassisIp):
     """
-    Get chassis performance metrics including CPU and memory utilization.
+    Build the performance metrics record from a /perfcounters entry.
     
     Args:
-        session (IxRestSession): Active REST session to the chassis
+        perf (dict): First /perfcounters entry, or None if it could not be fetched
         chassisIp (str): IP address of the chassis
         
     Returns:
-        dict: Performance metrics including:
-            - chassisIp: IP address of chassis
-            - mem_utilization: Memory utilization percentage
-            - cpu_utilization: CPU utilization percentage
-            - lastUpdatedAt_UTC: Timestamp of the data
+        dict: Performance metrics, see get_perf_metrics
     """
-    logger.info(f"Getting performance metrics for chassis {chassisIp}")
-    chassis_perf_dict = {}
     try:
-        perf = session.get_perfcounters().data[0]
         mem_bytes = int(perf.get("memoryInUseBytes", "0"))
         mem_bytes_total = int(perf.get("memoryTotalBytes", "0"))
         cpu_pert_usage = perf.get("cpuUsagePercent", "0")
         mem_util = (mem_bytes/mem_bytes_total)*100 if mem_bytes_total else 0
     except Exception as e:
-        logger.error(f"Error getting performance metrics: {str(e)}")
+        if perf is not None:
+            logger.error(f"Error getting performance metrics: {str(e)}")
         mem_util = 0
         cpu_pert_usage = 0
     
@@ -80,7 +84,83 @@ def get_perf_metrics(session, chassisIp):
         "cpu_utilization": cpu_pert_usage,
         "lastUpdatedAt_UTC": last_update_at
     }
+
+@instrument_collector('perf')
+def get_perf_metrics(session, chassisIp):
+    """
+    Get chassis performance metrics including CPU and memory utilization.
+    
+    Args:
+        session (IxRestSession): Active REST session to the chassis
+        chassisIp (str): IP address of the chassis
+        
+    Returns:
+        dict: Performance metrics including:
+            - chassisIp: IP address of chassis
+            - mem_utilization: Memory utilization percentage
+            - cpu_utilization: CPU utilization percentage
+            - lastUpdatedAt_UTC: Timestamp of the data
+    """
+    logger.info(f"Getting performance metrics for chassis {chassisIp}")
+    try:
+        perf = session.get_perfcounters().data[0]
+    except Exception as e:
+        logger.error(f"Error getting performance metrics: {str(e)}")
+        perf = None
+    return process_perf_metrics(perf, chassisIp)
+
+@instrument_processing('chassis')
+def process_chassis_information(chassis_data, perf=None):
+    """
+    Build the chassis summary record from a /chassis entry and, when available,
+    the first /perfcounters entry.
+    
+    Args:
+        chassis_data (dict): First /chassis entry
+        perf (dict): First /perfcounters entry, or None on Windows chassis
+        
+    Returns:
+        dict: Chassis information, see get_chassis_information
+    """
+    no_serial_string = ""
+    mem_bytes = "NA"
+    mem_bytes_total = "NA"
+    cpu_pert_usage = "NA"
+    os = "Linux"
+    
+    try:
+        mem_bytes = convert_size(perf["memoryInUseBytes"])
+        mem_bytes_total = convert_size(perf["memoryTotalBytes"])
+        cpu_pert_usage = perf["cpuUsagePercent"]
+    except Exception:
+        logger.warning("Performance metrics not available, chassis may be Windows-based")
+        os = "Windows"
+        
+    if chassis_data["type"] == "Ixia_Virtual_Test_Appliance":
+        no_serial_string = "IxiaVM"
+    
+    chassis_filter_dict = {
+        "chassisIp": chassis_data.get("managementIp"),
+        "chassisSerial#": chassis_data.get("serialNumber", no_serial_string),
+        "controllerSerial#": chassis_data.get("controllerSerialNumber", "NA"),
+        "chassisType": chassis_data["type"].replace(" ", "_"),
+        "physicalCards#": str(chassis_data.get("numberOfPhysicalCards", "NA")),
+        "chassisStatus": chassis_data.get('state'),
+        "lastUpdatedAt_UTC": datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S"),
+        "mem_bytes": mem_bytes, 
+        "mem_bytes_total": mem_bytes_total, 
+        "cpu_pert_usage": cpu_pert_usage,
+        "os": os
+    }
     
+    # Add IxOS application versions
+    for item in chassis_data["ixosApplications"]:
+        if item["name"] not in ["IxOS REST", "LicenseServerPlus"]:
+            chassis_filter_dict[item["name"]] = item["version"]
+            
+    return chassis_filter_dict
+    
+@instrument_collector('chassis')
 def get_chassis_information(session):
     """
     Get comprehensive chassis information including hardware details and system metrics.
@@ -103,55 +183,54 @@ def get_chassis_information(session):
             - Various IxOS application versions
     """
     logger.info("Getting chassis information")
-    chassis_filter_dict = {}
-    no_serial_string = ""
-    mem_bytes = "NA"
-    mem_bytes_total = "NA"
-    cpu_pert_usage = "NA"
-    os = "Linux"
-    
     try:
         chassisInfo = session.get_chassis()
-        chassis_data = json.loads(json.dumps(chassisInfo.data[0]))
         
         try:
             perf = session.get_perfcounters().data[0]
-            mem_bytes = convert_size(perf["memoryInUseBytes"])
-            mem_bytes_total = convert_size(perf["memoryTotalBytes"])
-            cpu_pert_usage = perf["cpuUsagePercent"]
         except Exception:
-            logger.warning("Performance metrics not available, chassis may be Windows-based")
-            os = "Windows"
+            perf = None
             
-        if chassis_data["type"] == "Ixia_Virtual_Test_Appliance":
-            no_serial_string = "IxiaVM"
-        
-        chassis_filter_dict = {
-            "chassisIp": chassis_data.get("managementIp"),
-            "chassisSerial#": chassis_data.get("serialNumber", no_serial_string),
-            "controllerSerial#": chassis_data.get("controllerSerialNumber", "NA"),
-            "chassisType": chassis_data["type"].replace(" ", "_"),
-            "physicalCards#": str(chassis_data.get("numberOfPhysicalCards", "NA")),
-            "chassisStatus": chassis_data.get('state'),
-            "lastUpdatedAt_UTC": datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S"),
-            "mem_bytes": mem_bytes, 
-            "mem_bytes_total": mem_bytes_total, 
-            "cpu_pert_usage": cpu_pert_usage,
-            "os": os
-        }
-        
-        # Add IxOS application versions
-        for item in chassis_data["ixosApplications"]:
-            if item["name"] not in ["IxOS REST", "LicenseServerPlus"]:
-                chassis_filter_dict[item["name"]] = item["version"]
+        return process_chassis_information(chassisInfo.data[0], perf)
                 
     except Exception as e:
         logger.error(f"Error getting chassis information: {str(e)}")
         raise
+
+@instrument_processing('cards')
+def process_cards_information(card_list, ip, type_of_chassis):
+    """
+    Build the card records from a /cards listing, sorted by card number.
+    
+    Args:
+        card_list (list): /cards entries
+        ip (str): IP address of the chassis
+        type_of_chassis (str): Type of the chassis
         
-    return chassis_filter_dict
+    Returns:
+        list: Card records, see get_chassis_cards_information
+    """
+    final_card_details_list = []
+    last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+    
+    # Sort cards by card number
+    sorted_cards = sorted(card_list, key=lambda d: d['cardNumber'])
     
-def get_chassis_cards_information(session, ip, type_of_chassis):
+    for sc in sorted_cards:
+        final_card_details_list.append({
+            "chassisIp": ip, 
+            "chassisType": type_of_chassis,
+            "cardNumber": sc.get("cardNumber"), 
+            "serialNumber": sc.get("serialNumber"),
+            "cardType": sc.get("type"),
+            "cardState": sc.get("state"), 
+            "numberOfPorts": sc.get("numberOfPorts", "No data"),
+            "lastUpdatedAt_UTC": last_update_at
+        })
+    return final_card_details_list
+    
+@instrument_collector('cards')
+def get_chassis_cards_information(session, ip, type_of_chassis, params=None):
     """
     Get detailed information about all cards installed in the chassis.
     
@@ -159,6 +238,7 @@ def get_chassis_cards_information(session, ip, type_of_chassis):
         session (IxRestSession): Active REST session to the chassis
         ip (str): IP address of the chassis
         type_of_chassis (str): Type of the chassis
+        params (dict): Optional IxOS query filters, e.g. {'cardNumber': 1}
         
     Returns:
         list: List of dictionaries containing card information:
@@ -173,30 +253,112 @@ def get_chassis_cards_information(session, ip, type_of_chassis):
     """
     logger.info(f"Getting card information for chassis {ip}")
     try:
-        card_list = session.get_cards().data
-        final_card_details_list = []
-        last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
-        
-        # Sort cards by card number
-        sorted_cards = sorted(card_list, key=lambda d: d['cardNumber'])
-        
-        for sc in sorted_cards:
-            final_card_details_list.append({
-                "chassisIp": ip, 
-                "chassisType": type_of_chassis,
-                "cardNumber": sc.get("cardNumber"), 
-                "serialNumber": sc.get("serialNumber"),
-                "cardType": sc.get("type"),
-                "cardState": sc.get("state"), 
-                "numberOfPorts": sc.get("numberOfPorts", "No data"),
-                "lastUpdatedAt_UTC": last_update_at
-            })
-        return final_card_details_list
+        card_list = session.get_cards(params=params).data
+        return process_cards_information(card_list, ip, type_of_chassis)
     except Exception as e:
         logger.error(f"Error getting card information: {str(e)}")
         raise
+
+@instrument_processing('ports')
+def process_ports_information(port_list, chassisIp, chassisType):
+    """
+    Build the port records from a /ports listing.
+    
+    Args:
+        port_list (list): /ports entries; they are left unchanged
+        chassisIp (str): IP address of the chassis
+        chassisType (str): Type of the chassis
+        
+    Returns:
+        list: Port records, see get_chassis_ports_information
+    """
+    last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+    
+    # Define relevant keys to keep
+    keys_to_keep = {'owner', 'transceiverModel', 'transceiverManufacturer', 
+                   'cardNumber', 'portNumber', 'fullyQualifiedPortName','phyMode', 'linkState', 'speed', 'type', 'lldpPeerData'}
+    
+    # Clean up port data and count owned ports in one pass
+    records = []
+    used_ports = 0
+    for port in port_list or []:
+        record = {k: v for k, v in port.items() if k in keys_to_keep}
+        if not record.get("owner"):
+            record["owner"] = "Free"
+        else:
+            used_ports += 1
+        records.append(record)
+    
+    # Add additional information to each port
+    total_ports = len(records)
+    summary = {
+        "lastUpdatedAt_UTC": last_update_at,
+        "totalPorts": total_ports,
+        "ownedPorts": used_ports,
+        "freePorts": total_ports - used_ports,
+        "chassisIp": chassisIp,
+        "typeOfChassis": chassisType
+    }
+    for record in records:
+        record.update(summary)
+    return records
+    
+# keys repeated on every record of a listing; streamed once in the trailer instead
+PORT_SUMMARY_KEYS = ("lastUpdatedAt_UTC", "totalPorts", "ownedPorts", "freePorts", "chassisIp", "typeOfChassis")
+SENSOR_SUMMARY_KEYS = ("chassisIp", "typeOfChassis", "lastUpdatedAt_UTC")
+CARD_SUMMARY_KEYS = ("chassisIp", "chassisType", "lastUpdatedAt_UTC")
+
+def split_summary(records, summary_keys, **trailer):
+    """
+    Yield every record without the per-chassis summary keys, followed by one
+    trailer record holding those keys once.
+    
+    Args:
+        records (iterable): Processed records, e.g. from process_ports_information
+        summary_keys (tuple): Keys that carry the same value on every record
+        **trailer: Extra keys for the trailer record
+        
+    Yields:
+        dict: The trimmed records, then {"trailer": True, "recordCount": n, ...}
+    """
+    summary = {}
+    count = 0
+    for record in records:
+        if not count:
+            summary = {k: record[k] for k in summary_keys if k in record}
+        count += 1
+        yield {k: v for k, v in record.items() if k not in summary_keys}
+    summary.update(trailer)
+    yield dict(summary, trailer=True, recordCount=count)
+
+def filter_records(records, match=None, fields=None):
+    """
+    Select and project processed records in a single pass.
+    
+    Records are compared as strings, case-insensitively, so a card number of 1
+    matches "1" and a link state of "up" matches "UP". Without fields the
+    selected records are returned as they are, not copied.
     
-def get_chassis_ports_information(session, chassisIp, chassisType):
+    Args:
+        records (list): Processed records, e.g. from process_ports_information
+        match (dict): Record key -> required value; None values are ignored
+        fields (list): Keys to keep in every returned record, None for all
+        
+    Returns:
+        list: The matching records
+    """
+    match = {k: str(v).lower() for k, v in (match or {}).items() if v is not None}
+    selected = []
+    for record in records:
+        if any(str(record.get(k)).lower() != v for k, v in match.items()):
+            continue
+        if fields:
+            record = {k: record[k] for k in fields if k in record}
+        selected.append(record)
+    return selected
+
+@instrument_collector('ports')
+def get_chassis_ports_information(session, chassisIp, chassisType, params=None):
     """
     Get detailed information about all ports in the chassis.
     
@@ -204,6 +366,7 @@ def get_chassis_ports_information(session, chassisIp, chassisType):
         session (IxRestSession): Active REST session to the chassis
         chassisIp (str): IP address of the chassis
         chassisType (str): Type of the chassis
+        params (dict): Optional IxOS query filters, e.g. {'cardNumber': 1}
         
     Returns:
         list: List of dictionaries containing port information:
@@ -222,130 +385,169 @@ def get_chassis_ports_information(session, chassisIp, chassisType):
     """
     logger.info(f"Getting port information for chassis {chassisIp}")
     try:
-        port_list = session.get_ports().data
-        last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
-        
-        # Define relevant keys to keep
-        keys_to_keep = ['owner', 'transceiverModel', 'transceiverManufacturer', 
-                       'cardNumber', 'portNumber', 'fullyQualifiedPortName','phyMode', 'linkState', 'speed', 'type', 'lldpPeerData']
-        
-        # Process port information
-        if port_list:
-            keys_to_remove = [x for x in port_list[0].keys() if x not in keys_to_keep]
-            total_ports = len(port_list)
-            
-            # Clean up port data
-            for port in port_list:
-                if not port.get("owner"):
-                    port["owner"] = "Free"
-                for k in keys_to_remove:
-                    port.pop(k)
-                    
-            # Calculate port statistics
-            used_ports = len([p for p in port_list if p.get("owner") != "Free"])
-            free_ports = total_ports - used_ports
-            
-            # Add additional information to each port
-            for port in port_list:
-                port.update({
-                    "lastUpdatedAt_UTC": last_update_at,
-                    "totalPorts": total_ports,
-                    "ownedPorts": used_ports,
-                    "freePorts": free_ports,
-                    "chassisIp": chassisIp,
-                    "typeOfChassis": chassisType
-                })
-                
-            return port_list
-        return []
+        port_list = session.get_ports(params=params).data
+        return process_ports_information(port_list, chassisIp, chassisType)
     except Exception as e:
         logger.error(f"Error getting port information: {str(e)}")
         raise
 
-def get_license_activation(session, chassis_ip, chassis_type):
+def is_license_info_complete(license_info):
+    """
+    Check whether a retrievelicenses result holds the full license records.
+    """
+    return bool(license_info) and isinstance(license_info, list) and all(isinstance(item, dict) and 'activationCode' in item for item in license_info)
+
+def license_placeholder(chassis_ip, chassis_type):
+    """
+    License record returned when license information could not be collected.
+    """
+    return [{
+        'chassisIp': chassis_ip,
+        'typeOfChassis': chassis_type,
+        'hostId': 'NA',
+        'partNumber': 'NA',
+        'activationCode': 'NA',
+        'quantity': 'NA',
+        'description': 'NA',
+        'maintenanceDate': 'NA',
+        'expiryDate': 'NA',
+        'isExpired': 'NA',
+        'lastUpdatedAt_UTC': datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+    }]
+
+@instrument_processing('licenses')
+def process_license_activation(license_info, chassis_ip, chassis_type):
+    """
+    Build the license records from a retrievelicenses result.
+    
+    Args:
+        license_info (list): License entries returned by the chassis
+        chassis_ip: IP address of chassis
+        chassis_type: Type of chassis
+    Returns:
+        List of dictionaries containing license information
+    """
+    processed_licenses = []
+    for license in license_info:
+        processed_license = {
+            'chassisIp': chassis_ip,
+            'typeOfChassis': chassis_type,
+            'hostId': license.get('hostId', 'NA'),
+            'partNumber': license.get('partNumber', 'NA'),
+            'activationCode': license.get('activationCode', 'NA'),
+            'quantity': license.get('quantity', 'NA'),
+            'description': license.get('description', 'NA'),
+            'maintenanceDate': license.get('maintenanceDate', 'NA'),
+            'expiryDate': license.get('expiryDate', 'NA'),
+            'isExpired': license.get('isExpired', 'NA'),
+            'lastUpdatedAt_UTC': datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+        }
+        processed_licenses.append(processed_license)
+        
+    return processed_licenses
+
+@instrument_collector('licenses')
+def get_license_activation(session, chassis_ip, chassis_type, timeout=None):
     """Get license activation details from chassis
+    
+    The retrievelicenses operation is tracked by the shared async operation
+    scheduler; this thread only waits for its completion instead of
+    re-sending the request until the result is complete.
+    
     Args:
         session: IxRestSession object
         chassis_ip: IP address of chassis
         chassis_type: Type of chassis
+        timeout: Seconds to wait for the operation, session.timeout by default
     Returns:
         List of dictionaries containing license information
     """
     try:
-        # Initial license activation request
-        license_info = session.get_license_activation().json()
-        
-        # Poll until we get complete license information
-        max_retries = 10
-        retry_count = 0
-        retry_delay = 2  # seconds
-        
-        while retry_count < max_retries:
-            # Check if we have complete license information
-            if license_info and isinstance(license_info, list) and all(isinstance(item, dict) and 'activationCode' in item for item in license_info):
-                break
-                
-            # Wait before retrying
-            time.sleep(retry_delay)
-            
-            # Retry getting license information
-            license_info = session.get_license_activation().json()
-            retry_count += 1
-            
-            logger.debug(f"License info polling attempt {retry_count}: {license_info}")
-        
-        if not license_info or retry_count >= max_retries:
-            logger.warning(f"Could not get complete license information after {max_retries} attempts")
-            return [{
-                'chassisIp': chassis_ip,
-                'typeOfChassis': chassis_type,
-                'hostId': 'NA',
-                'partNumber': 'NA',
-                'activationCode': 'NA',
-                'quantity': 'NA',
-                'description': 'NA',
-                'maintenanceDate': 'NA',
-                'expiryDate': 'NA',
-                'isExpired': 'NA',
-                'lastUpdatedAt_UTC': datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
-            }]
-
-        # Process the license information
-        processed_licenses = []
-        for license in license_info:
-            processed_license = {
-                'chassisIp': chassis_ip,
-                'typeOfChassis': chassis_type,
-                'hostId': license.get('hostId', 'NA'),
-                'partNumber': license.get('partNumber', 'NA'),
-                'activationCode': license.get('activationCode', 'NA'),
-                'quantity': license.get('quantity', 'NA'),
-                'description': license.get('description', 'NA'),
-                'maintenanceDate': license.get('maintenanceDate', 'NA'),
-                'expiryDate': license.get('expiryDate', 'NA'),
-                'isExpired': license.get('isExpired', 'NA'),
-                'lastUpdatedAt_UTC': datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
-            }
-            processed_licenses.append(processed_license)
-            
-        return processed_licenses
+        operation = start_license_activation(session, chassis_ip, chassis_type)
+        if not operation.wait(timeout if timeout is not None else session.timeout):
+            logger.warning(f"License retrieval on chassis {chassis_ip} did not finish in time")
+            return license_placeholder(chassis_ip, chassis_type)
+        if operation.state != 'SUCCESS':
+            logger.warning(f"License retrieval on chassis {chassis_ip} ended with {operation.state}: {operation.error}")
+            return license_placeholder(chassis_ip, chassis_type)
+        return operation.result
         
     except Exception as e:
         logger.error(f"Error getting license activation for chassis {chassis_ip}: {str(e)}")
-        return [{
-            'chassisIp': chassis_ip,
-            'typeOfChassis': chassis_type,
-            'hostId': 'NA',
-            'partNumber': 'NA',
-            'activationCode': 'NA',
-            'quantity': 'NA',
-            'description': 'NA',
-            'maintenanceDate': 'NA',
-            'expiryDate': 'NA',
-            'isExpired': 'NA',
-            'lastUpdatedAt_UTC': datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
-        }]
+        return license_placeholder(chassis_ip, chassis_type)
+
+def start_license_activation(session, chassis_ip, chassis_type):
+    """Start retrieving license activation details without waiting for them
+    Args:
+        session: IxRestSession object
+        chassis_ip: IP address of chassis
+        chassis_type: Type of chassis
+    Returns:
+        AsyncOperation whose result is the list of license records; it
+        fails if the chassis returned incomplete license information
+    """
+    def process(license_info):
+        if not is_license_info_complete(license_info):
+            raise ValueError(f"Incomplete license information returned by chassis {chassis_ip}: {license_info}")
+        return process_license_activation(license_info, chassis_ip, chassis_type)
+
+    return session.start_license_activation(process=process)
 
+@instrument_collector('license_host_ids')
+def get_license_host_ids(session, chassis_ip, chassis_type=""):
+    """Get the host IDs of the license servers of a chassis
+    
+    The retrievehostid operations of all license servers run at the same
+    time; host IDs do not change, so they are cached per chassis (see
+    RestApi.IxOSHostIdCache).
+    
+    Args:
+        session: IxRestSession object
+        chassis_ip: IP address of chassis
+        chassis_type: Type of chassis
+    Returns:
+        Dictionary with the license servers (serverId, hostId) and their
+        host IDs joined by "::"
+    """
+    host_ids = session.get_license_server_host_ids()
+    return {
+        'chassisIp': chassis_ip,
+        'typeOfChassis': chassis_type,
+        'licenseServers': host_ids,
+        'hostId': "::".join(entry['hostId'] for entry in host_ids)
+    }
+
+@instrument_processing('sensors')
+def process_sensor_information(sensor_list, chassis, type_chassis):
+    """
+    Build the sensor records from a /sensors listing.
+    
+    Args:
+        sensor_list (list): /sensors entries; they are left unchanged
+        chassis (str): IP address of the chassis
+        type_chassis (str): Type of the chassis
+        
+    Returns:
+        list: Sensor records, see get_sensor_information
+    """
+    keys_to_remove = {"criticalValue", "maxValue", 'parentId', 'id',
+                     'adapterName', 'minValue', 'sensorSetName', 'cpuName'}
+    
+    last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+    
+    records = []
+    for sensor in sensor_list:
+        record = {k: v for k, v in sensor.items() if k not in keys_to_remove}
+        record.update({
+            "chassisIp": chassis,
+            "typeOfChassis": type_chassis,
+            "lastUpdatedAt_UTC": last_update_at
+        })
+        records.append(record)
+        
+    return records
+
+@instrument_collector('sensors')
 def get_sensor_information(session, chassis, type_chassis):
     """
     Get sensor readings from the chassis.
@@ -367,21 +569,63 @@ def get_sensor_information(session, chassis, type_chassis):
     logger.info(f"Getting sensor information for chassis {chassis}")
     try:
         sensor_list = session.get_sensors().json()
-        keys_to_remove = ["criticalValue", "maxValue", 'parentId', 'id',
-                         'adapterName', 'minValue', 'sensorSetName', 'cpuName']
+        return process_sensor_information(sensor_list, chassis, type_chassis)
+    except Exception as e:
+        logger.error(f"Error getting sensor information: {str(e)}")
+        raise
+
+# cumulative /portstats counters kept per port
+PORT_STAT_COUNTERS = ("framesSent", "framesReceived", "bytesSent", "bytesReceived", "crcErrors")
+
+@instrument_processing('portstats')
+def process_port_statistics(stats_list, chassisIp):
+    """
+    Build the port statistics records from a /portstats listing.
+    
+    Args:
+        stats_list (list): /portstats entries; they are left unchanged
+        chassisIp (str): IP address of the chassis
         
-        last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+    Returns:
+        list: Port statistics records, see get_port_statistics
+    """
+    last_update_at = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+    records = []
+    for stats in stats_list:
+        record = {
+            "fullyQualifiedPortName": stats.get("fullyQualifiedPortName"),
+            "portId": stats.get("portId", stats.get("id")),
+            "chassisIp": chassisIp,
+            "lastUpdatedAt_UTC": last_update_at
+        }
+        for counter in PORT_STAT_COUNTERS:
+            record[counter] = stats.get(counter, "NA")
+        records.append(record)
+    return records
+
+@instrument_collector('portstats')
+def get_port_statistics(session, chassisIp, chassisType=None):
+    """
+    Get the cumulative traffic and error counters of every port in one call.
+    
+    Args:
+        session (IxRestSession): Active REST session to the chassis
+        chassisIp (str): IP address of the chassis
+        chassisType (str): Type of the chassis (unused, for collector symmetry)
         
-        for record in sensor_list:
-            for item in keys_to_remove:
-                record.pop(item, "NA")
-            record.update({
-                "chassisIp": chassis,
-                "typeOfChassis": type_chassis,
-                "lastUpdatedAt_UTC": last_update_at
-            })
-            
-        return sensor_list
+    Returns:
+        list: List of dictionaries containing port statistics:
+            - fullyQualifiedPortName: Port name
+            - portId: Internal port ID
+            - framesSent, framesReceived, bytesSent, bytesReceived, crcErrors:
+              Cumulative counters, "NA" if the chassis does not report them
+            - chassisIp: IP address of chassis
+            - lastUpdatedAt_UTC: Timestamp of the data
+    """
+    logger.info(f"Getting port statistics for chassis {chassisIp}")
+    try:
+        stats_list = session.get_portstats().data
+        return process_port_statistics(stats_list, chassisIp)
     except Exception as e:
-        logger.error(f"Error getting sensor information: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error(f"Error getting port statistics: {str(e)}")
+        raise
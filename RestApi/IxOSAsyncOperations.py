@@ -0,0 +1,267 @@
+"""
+Shared scheduler for IxOS async (HTTP 202) operations.
+
+Long-running chassis operations (log collection, license retrieval, host ID
+retrieval, ...) answer with 202 and a status URL that has to be polled until
+the operation finishes. Instead of one sleeping thread per operation, every
+pending operation is registered with a single AsyncOperationScheduler, which
+polls them with an adaptive backoff and completes an AsyncOperation handle
+that callers can inspect, wait on or attach callbacks to.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .IxOSRequestMetrics import request_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOperation(object):
+    """
+    Handle of one IxOS async operation.
+    state is IN_PROGRESS until the operation finishes, then one of:
+        SUCCESS:    result holds the resultUrl returned by the chassis, or
+                    whatever the on_complete callback returned for it
+        ERROR:      the chassis reported an error; error holds its message
+        FAILED:     polling or the on_complete callback raised
+        TIMEOUT:    the operation did not finish in time
+    """
+
+    def __init__(self, name, chassis_ip=None, status_url=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.chassis_ip = chassis_ip
+        self.status_url = status_url
+        self.state = 'IN_PROGRESS'
+        self.result = None
+        self.error = None
+        self.polls = 0
+        self.created_at = datetime.now(timezone.utc)
+        self.completed_at = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """
+        block until the operation finished; returns False on timeout
+        """
+        return self._event.wait(timeout)
+
+    def add_done_callback(self, callback):
+        """
+        call callback(operation) once the operation finished, immediately if it already has
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def finish(self, state, result=None, error=None):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.state = state
+            self.result = result
+            self.error = error
+            self.completed_at = datetime.now(timezone.utc)
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        if self.status_url is not None:
+            request_metrics.observe_operation(self.name, self.chassis_ip, state,
+                                              (self.completed_at - self.created_at).total_seconds(), self.polls)
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Error in completion callback of operation {self.id}: {str(e)}")
+
+    def to_dict(self):
+        return {
+            "operationId": self.id,
+            "name": self.name,
+            "chassisIp": self.chassis_ip,
+            "state": self.state,
+            "result": self.result,
+            "error": self.error,
+            "polls": self.polls,
+            "createdAt_UTC": self.created_at.strftime("%m/%d/%Y, %H:%M:%S"),
+            "completedAt_UTC": self.completed_at.strftime("%m/%d/%Y, %H:%M:%S") if self.completed_at else None
+        }
+
+
+class AsyncOperationScheduler(object):
+    """
+    Polls all pending async operations from one scheduler thread; the status
+    requests themselves run on a small worker pool so a slow chassis does not
+    delay the others. on_complete callbacks, which fetch the result, run on a
+    separate pool so they never hold up polling.
+    Constructor arguments:
+        min_interval:   First poll delay in seconds.
+        max_interval:   Upper bound of the poll delay in seconds.
+        backoff:        Factor applied to the poll delay after every poll
+                        that is still IN_PROGRESS.
+        max_workers:    Number of threads sending status requests.
+        result_workers: Number of threads running on_complete callbacks.
+        retention:      Seconds finished operations stay retrievable by id.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=10, backoff=1.5, max_workers=4, result_workers=4,
+                 retention=3600):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.retention = retention
+        self._operations = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ixos-async-op')
+        self._result_workers = ThreadPoolExecutor(max_workers=result_workers, thread_name_prefix='ixos-async-op-result')
+        self._thread = None
+
+    def submit(self, session, operation_body, name, chassis_ip=None, timeout=600, on_complete=None):
+        """
+        track the operation described by a 202 response body and return its handle
+
+        Args:
+            session: IxRestSession used to poll the status URL
+            operation_body: Decoded 202 body holding 'state' and 'url'
+            name: Short operation name shown in listings
+            chassis_ip: Chassis the operation runs on
+            timeout: Seconds after which the operation is reported as TIMEOUT
+            on_complete: Optional callable(result_url) run on a result worker
+                thread when the operation succeeds; its return value becomes
+                the result
+        """
+        operation = AsyncOperation(name, chassis_ip or getattr(session, 'chassis_ip', None),
+                                   operation_body.get('url') if isinstance(operation_body, dict) else None)
+        operation._session = session
+        operation._on_complete = on_complete
+        operation._deadline = time.monotonic() + timeout
+        operation._interval = self.min_interval
+        self._register(operation)
+
+        if not isinstance(operation_body, dict) or operation_body.get('state') != 'IN_PROGRESS':
+            self._workers.submit(self._finish, operation, operation_body)
+        else:
+            self._schedule(operation, self.min_interval)
+        return operation
+
+    def completed(self, name, result, chassis_ip=None):
+        """
+        register an operation that finished synchronously (e.g. a 200 answer
+        from a Windows chassis) so callers can handle both cases alike
+        """
+        operation = AsyncOperation(name, chassis_ip)
+        self._register(operation)
+        operation.finish('SUCCESS', result=result)
+        return operation
+
+    def get(self, operation_id):
+        with self._condition:
+            return self._operations.get(operation_id)
+
+    def list(self):
+        with self._condition:
+            return list(self._operations.values())
+
+    def _register(self, operation):
+        with self._condition:
+            self._prune()
+            self._operations[operation.id] = operation
+
+    def _prune(self):
+        cutoff = datetime.now(timezone.utc).timestamp() - self.retention
+        for operation_id, operation in list(self._operations.items()):
+            if operation.completed_at is not None and operation.completed_at.timestamp() < cutoff:
+                del self._operations[operation_id]
+
+    def _schedule(self, operation, delay):
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), operation))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ixos-async-op-scheduler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, operation = heapq.heappop(self._heap)
+            self._workers.submit(self._poll, operation)
+
+    def _poll(self, operation):
+        # runs on the executor, which would swallow an exception and leave the
+        # operation pending forever, so every failure finishes the operation
+        try:
+            if time.monotonic() > operation._deadline:
+                operation.finish('TIMEOUT', error='timeout occured while polling for async operation')
+                return
+            response = operation._session.http_request('GET', operation.status_url, wait_for_completion=False)
+            operation.polls += 1
+            body = response.data
+            if not isinstance(body, dict):
+                raise ValueError('status poll returned no JSON object (HTTP %s)' % getattr(response, 'status_code', '?'))
+
+            if body.get('state') == 'IN_PROGRESS':
+                operation._interval = min(operation._interval * self.backoff, self.max_interval)
+                self._schedule(operation, operation._interval)
+            else:
+                self._finish(operation, body)
+        except Exception as e:
+            logger.error(f"Error polling async operation {operation.id}: {str(e)}")
+            operation.finish('FAILED', error=str(e))
+
+    def _finish(self, operation, body):
+        if not isinstance(body, dict):
+            operation.finish('FAILED', error='async operation answered without a JSON object')
+            return
+        state = body.get('state')
+        if state in ('SUCCESS', 'COMPLETED'):
+            result = body.get('resultUrl')
+            if operation._on_complete is not None:
+                self._result_workers.submit(self._complete, operation, result)
+            else:
+                operation.finish('SUCCESS', result=result)
+        elif state == 'ERROR':
+            operation.finish('ERROR', error=body.get('message'))
+        else:
+            operation.finish('FAILED', error='async failed')
+
+    def _complete(self, operation, result_url):
+        try:
+            result = operation._on_complete(result_url)
+        except Exception as e:
+            operation.finish('FAILED', error=str(e))
+            return
+        operation.finish('SUCCESS', result=result)
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """
+    process-wide scheduler shared by all sessions
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = AsyncOperationScheduler()
+        return _default_scheduler
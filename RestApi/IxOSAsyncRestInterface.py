@@ -0,0 +1,418 @@
+"""
+An asyncio interface to IxOS REST APIs, mirroring IxRestSession.
+Requests are sent with httpx.AsyncClient, so many chassis requests can be in
+flight on a single event loop without holding a worker thread each.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from .IxOSRestInterface import IxRestException, CircuitOpenError, RETRY_STATUS_CODES, retry_delay
+from .IxOSPortIndex import get_port_index
+from .IxOSSingleFlight import async_flights, flight_key
+from .IxOSRequestMetrics import request_metrics, endpoint_of
+from .IxOSChassisHealth import chassis_health, CLOSED
+from .IxOSHostIdCache import host_id_cache, join_host_ids
+
+
+class _ConnectTrace(object):
+    """
+    httpx trace callback measuring how long a request spent opening a new
+    connection (TCP connect and TLS handshake); 0 if it reused one
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._started = None
+
+    async def __call__(self, event, info):
+        if event == 'connection.connect_tcp.started':
+            self._started = time.perf_counter()
+        elif event in ('connection.connect_tcp.complete', 'connection.start_tls.complete') and self._started:
+            self.seconds = time.perf_counter() - self._started
+
+
+class AsyncIxRestSession(object):
+    """
+    class for handling async HTTP requests/response for IxOS REST APIs
+    Constructor arguments:
+    chassis_address:    addrress of the chassis
+    Optional arguments:
+        api_key:        API key or you can use authenticate method \
+                        later to get it by providing user/pass.
+        timeout:        Time to wait (in seconds) while polling \
+                        for async operation.
+        poll_interval:  Polling inteval in seconds.
+        request_timeout: Maximum time to wait (in seconds) for an answer; \
+                        the actual read timeout adapts to the latency of \
+                        the chassis.
+        pool_maxsize:   Maximum number of persistent connections kept \
+                        open to the chassis.
+        max_retries:    Number of retries for failed connections.
+        keep_alive:     If False, every request closes its connection.
+        connect_timeout: Seconds to wait for a connection to the chassis.
+        min_read_timeout: Lower bound of the adaptive read timeout.
+        get_retries:    Number of retries of GET requests after a timeout, \
+                        a connection error or a 502/503/504 answer.
+        retry_backoff:  Base delay in seconds of the jittered GET retries.
+
+    The session must be opened before use, e.g.
+        session = await AsyncIxRestSession(address, user, password).open()
+    """
+
+    def __init__(self, chassis_address, username=None, password=None, api_key=None, timeout=600, poll_interval=2,
+                 verbose=False, request_timeout=10, pool_maxsize=10, max_retries=0, keep_alive=True,
+                 connect_timeout=3, min_read_timeout=5, get_retries=2, retry_backoff=0.2, **kwargs):
+
+        self.chassis_ip = chassis_address
+        self.api_key = api_key
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.verbose = verbose
+        self._authUri = '/platform/api/v1/auth/session'
+        self.username = username
+        self.password = password
+        self._auth_lock = asyncio.Lock()
+        self.keep_alive = keep_alive
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.min_read_timeout = min_read_timeout
+        self.get_retries = get_retries
+        self.retry_backoff = retry_backoff
+        self.health = chassis_health.get(chassis_address)
+        # requests currently using the client and time.monotonic() of the last
+        # one, so AsyncIxRestSessionPool does not close a session still in use
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        # optional coroutine function(api_key) awaited with every key obtained
+        # by reauthenticate, e.g. by AsyncIxRestSessionPool to update its key cache
+        self.on_reauthenticate = None
+
+        limits = httpx.Limits(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize if keep_alive else 0
+        )
+        self._http = httpx.AsyncClient(
+            timeout=request_timeout,
+            transport=httpx.AsyncHTTPTransport(verify=False, limits=limits, retries=max_retries)
+        )
+
+    async def open(self):
+        """
+        authenticate with the stored credentials if no api_key was provided
+        """
+        if not self.api_key:
+            await self.authenticate(username=self.username, password=self.password)
+        return self
+
+    async def aclose(self):
+        """
+        close all pooled connections to the chassis
+        """
+        await self._http.aclose()
+
+    def get_ixos_uri(self):
+        return 'https://%s/chassis/api/v2/ixos' % self.chassis_ip
+
+    def get_headers(self):
+        # headers should at least contain these two; unlike requests, httpx
+        # does not drop headers set to None, so the key is omitted until known
+        headers = {"Content-Type": "application/json"}
+        if self.api_key is not None:
+            headers['x-api-key'] = self.api_key
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        return headers
+
+    async def authenticate(self, username="admin", password="admin"):
+        """
+        we need to obtain API key to be able to perform any REST
+        calls on IxOS
+        """
+        payload = {
+            'username': username,
+            'password': password,
+            'rememberMe': False,
+            'resetWeakPassword': False
+        }
+        response = await self.http_request(
+            'POST',
+            'https://{address}{uri}'.format(address=self.chassis_ip,
+                                            uri=self._authUri),
+            payload=payload
+        )
+        self.api_key = response.data['apiKey']
+
+    async def reauthenticate(self, stale_api_key=None):
+        """
+        obtain a new API key using the stored credentials; if another task
+        already replaced stale_api_key, the newer key is kept as is. The new
+        key is passed to on_reauthenticate if set
+        """
+        async with self._auth_lock:
+            if stale_api_key is None or self.api_key == stale_api_key:
+                await self.authenticate(username=self.username, password=self.password)
+                if self.on_reauthenticate is not None:
+                    await self.on_reauthenticate(self.api_key)
+
+    async def http_request(self, method, uri, payload=None, params=None, retry_auth=True):
+        """
+        same contract as IxRestSession.http_request: returns the response with
+        the decoded JSON body in response.data, or the result URL of an async
+        (202) operation once it has completed
+        """
+        if not uri.startswith('http'):
+            uri = self.get_ixos_uri() + uri
+
+        body = None
+        if payload is not None:
+            body = json.dumps(payload, indent=2, sort_keys=True)
+
+        headers = self.get_headers()
+        response, started, connect = await self._send(method, uri, body, params, headers)
+        received = time.perf_counter()
+
+        data = None
+        try:
+            data = response.content.decode()
+            data = json.loads(data) if data else None
+        except:
+            print('Invalid/Non-JSON payload received: %s' % data)
+            data = None
+        decoded = time.perf_counter()
+        # httpx reads the whole body before returning, so there is no separate download phase
+        phases = {'response': received - started - connect, 'decode': decoded - received}
+        if connect:
+            phases['connect'] = connect
+        request_metrics.observe_request(
+            self.chassis_ip, method, uri, response.status_code, decoded - started,
+            phases=phases, response_bytes=len(response.content), new_connection=connect > 0)
+
+        is_auth_uri = uri[-len(self._authUri):] == self._authUri
+
+        # the API key expired or was revoked; get a new one and replay once
+        if response.status_code == 401 and retry_auth and not is_auth_uri and self.username is not None:
+            await self.reauthenticate(stale_api_key=headers.get('x-api-key'))
+            return await self.http_request(method, uri, payload=payload, params=params, retry_auth=False)
+
+        if str(response.status_code)[0] == '4':
+            raise IxRestException("{code} {reason}: {data}.{extraInfo}".format(
+                code=response.status_code,
+                reason=response.reason_phrase,
+                data=data,
+                extraInfo="{sep}{msg}".format(
+                    sep=os.linesep,
+                    msg="Please check that your API key is correct or call AsyncIxRestSession.authenticate(username, password) in order to obtain a new API key."
+                ) if response.status_code == 401 and not is_auth_uri else ''
+            )
+            )
+
+        if response.status_code == 202:
+            return await self.wait_for_async_operation(data)
+        response.data = data
+        return response
+
+    async def _send(self, method, uri, body, params, headers):
+        """
+        same contract as IxRestSession._send
+        """
+        attempts = 1 + (self.get_retries if method == 'GET' else 0)
+        endpoint = (method, endpoint_of(uri))
+        for attempt in range(attempts):
+            if not self.health.allow_request():
+                raise CircuitOpenError('chassis %s is not reachable (circuit breaker open, next attempt in %.0fs): %s' % (
+                    self.chassis_ip, self.health.retry_after(), self.health.last_error))
+            read_timeout = self.health.read_timeout(self.min_read_timeout, self.request_timeout, endpoint)
+            started = time.perf_counter()
+            connect = _ConnectTrace()
+            self.in_flight += 1
+            try:
+                response = await self._http.request(
+                    method, uri, content=body, params=params, headers=headers,
+                    timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+                    extensions={'trace': connect}
+                )
+            except httpx.TransportError as e:
+                kind = 'timeout' if isinstance(e, httpx.TimeoutException) else 'connection'
+                request_metrics.request_error(self.chassis_ip, uri, kind)
+                # one breaker failure per request, as in IxRestSession._send
+                if attempt + 1 == attempts or self.health.state != CLOSED:
+                    self.health.record_failure('%s: %s' % (kind, str(e) or type(e).__name__))
+                    raise
+            except Exception as e:
+                self.health.record_failure(e)
+                raise
+            else:
+                if response.status_code < 500:
+                    # httpx has read the body already, the latency includes it
+                    self.health.record_success(time.perf_counter() - started, endpoint)
+                    return response, started, connect.seconds
+                if response.status_code not in RETRY_STATUS_CODES or attempt + 1 == attempts or self.health.state != CLOSED:
+                    self.health.record_failure('%d %s' % (response.status_code, response.reason_phrase))
+                    return response, started, connect.seconds
+            finally:
+                self.in_flight -= 1
+                self.last_used = time.monotonic()
+            await asyncio.sleep(retry_delay(attempt, self.retry_backoff))
+
+    async def wait_for_async_operation(self, response_body):
+        """
+        method for handeling intermediate async operation results; the poll
+        interval starts short and backs off up to poll_interval * 5
+        """
+        operation_status = response_body['state']
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        interval = min(0.5, self.poll_interval)
+        polls = 0
+        while operation_status == 'IN_PROGRESS':
+            if loop.time() - start_time > self.timeout:
+                request_metrics.observe_operation('operation', self.chassis_ip, 'TIMEOUT',
+                                                  loop.time() - start_time, polls)
+                raise IxRestException(
+                    'timeout occured while polling for async operation')
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, self.poll_interval * 5)
+            response = await self.http_request('GET', response_body['url'])
+            polls += 1
+            response_body = response.data
+            operation_status = response_body['state']
+
+        request_metrics.observe_operation(
+            'operation', self.chassis_ip, 'SUCCESS' if operation_status == 'COMPLETED' else operation_status,
+            loop.time() - start_time, polls)
+        if operation_status in ('SUCCESS', 'COMPLETED'):
+            return response_body['resultUrl']
+        elif operation_status == 'ERROR':
+            return response_body['message']
+        else:
+            raise IxRestException("async failed")
+
+    async def get_shared(self, path, params=None):
+        """
+        GET a collection of the chassis; concurrent identical GETs from other
+        tasks share a single request and its (read-only) response
+        """
+        return await async_flights.do(
+            flight_key(self.chassis_ip, path, params),
+            lambda: self.http_request('GET', self.get_ixos_uri() + path, params=params))
+
+    async def get_chassis(self, params=None):
+        return await self.get_shared('/chassis', params)
+
+    async def get_sensors(self, params=None):
+        return await self.get_shared('/sensors', params)
+
+    async def get_cards(self, params=None):
+        response = await self.get_shared('/cards', params)
+        if params is None and response.data is not None:
+            get_port_index(self.chassis_ip).observe_cards(response.data)
+        return response
+
+    async def get_ports(self, params=None):
+        response = await self.get_shared('/ports', params)
+        if params is None and response.data is not None:
+            get_port_index(self.chassis_ip).load(response.data)
+        return response
+
+    async def get_services(self, params=None):
+        return await self.get_shared('/services', params)
+
+    async def get_perfcounters(self, params=None):
+        return await self.get_shared('/perfcounters', params)
+
+    async def get_portstats(self, params=None):
+        return await self.get_shared('/portstats', params)
+
+    async def take_ownership(self, resource_id):
+        return await self.http_request(
+            'POST',
+            self.get_ixos_uri() + '/ports/%d/operations/takeownership' % resource_id
+        )
+
+    async def release_ownership(self, resource_id):
+        return await self.http_request(
+            'POST',
+            self.get_ixos_uri() + '/ports/%d/operations/releaseownership' % resource_id
+        )
+
+    async def reboot_port(self, resource_id):
+        get_port_index(self.chassis_ip).invalidate()
+        return await self.http_request(
+            'POST',
+            self.get_ixos_uri() + '/ports/%d/operations/reboot' % resource_id
+        )
+
+    async def reset_port(self, resource_id):
+        return await self.http_request(
+            'POST',
+            self.get_ixos_uri() + '/ports/%d/operations/resetfactorydefaults' % resource_id
+        )
+
+    async def hotswap_card(self, resource_id):
+        get_port_index(self.chassis_ip).invalidate()
+        return await self.http_request(
+            'POST',
+            self.get_ixos_uri() + '/cards/%d/operations/hotswap' % resource_id
+        )
+
+    async def get_license_servers(self, params=None):
+        return await self.http_request('GET', f'https://{self.chassis_ip}/platform/api/v2/licensing/servers', params=params)
+
+    async def retrieve_license_server_host_id(self, server_id):
+        """
+        run the retrievehostid operation of one license server; its host ID,
+        or None if the chassis returned none
+        """
+        url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/{server_id}/operations/retrievehostid'
+        resultUrl = await self.http_request('POST', url)
+        if not isinstance(resultUrl, str) or "http" not in resultUrl:
+            return None
+        return (await self.http_request('GET', resultUrl)).data.get("hostId", "NA")
+
+    async def get_license_server_host_ids(self, params=None, refresh=False):
+        """
+        host IDs of all license servers as a list of {"serverId", "hostId"};
+        the retrievehostid operations of all servers run at the same time and
+        the host IDs are cached per chassis unless refresh is True
+        """
+        if not refresh:
+            cached = host_id_cache.get(self.chassis_ip)
+            if cached is not None:
+                return cached
+        servers = (await self.get_license_servers(params=params)).data
+        results = await asyncio.gather(
+            *(self.retrieve_license_server_host_id(lic_s["id"]) for lic_s in servers),
+            return_exceptions=True)
+        host_ids = [{"serverId": lic_s["id"], "hostId": result}
+                    for lic_s, result in zip(servers, results)
+                    if result is not None and not isinstance(result, BaseException)]
+        failures = [result for result in results if isinstance(result, BaseException)]
+        # a server that failed is retried by the next call
+        if not failures:
+            host_id_cache.put(self.chassis_ip, host_ids)
+        elif not host_ids:
+            raise failures[0]
+        return host_ids
+
+    async def get_license_server_host_id(self, params=None):
+        return join_host_ids(await self.get_license_server_host_ids(params=params))
+
+    async def get_license_activation(self, params=None):
+        url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/1/operations/retrievelicenses'
+        url = await self.http_request('POST', url, params=params)
+        if isinstance(url, str):
+            return await self.http_request('GET', url, params=params)
+        else:
+            id_url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/1/operations/retrievelicenses/1/result'
+            return await self.http_request('GET', id_url, params=params)
+
+    async def collect_chassis_logs(self, params=None):
+        chassis_info = await self.get_chassis()
+        card_id = chassis_info.data[0]["id"]
+        resultUrl = await self.http_request('POST', self.get_ixos_uri() + f"/chassis/{card_id}/operations/collectlogs")
+        return resultUrl
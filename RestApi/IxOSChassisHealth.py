@@ -0,0 +1,293 @@
+"""
+Per-chassis health tracking and circuit breaker.
+
+Every request of IxRestSession and AsyncIxRestSession reports its outcome to
+the ChassisHealth of its chassis, shared by all sessions of the process:
+
+    - the read timeout adapts to the latency of the chassis, like a TCP
+      retransmission timeout (smoothed latency + 4 x its deviation), bounded
+      by the minimum and maximum read timeouts of the session; the latency is
+      tracked per endpoint, so a slow /ports listing does not get the
+      timeout of a quick /chassis request
+    - after failure_threshold consecutive failed requests (timeouts,
+      connection errors, 5xx answers, counted once per request however often
+      it was retried) the breaker opens and requests to the chassis fail
+      immediately instead of waiting for a timeout
+    - while the breaker is open a background thread probes the chassis with a
+      TCP connect; once it answers, the next request is let through as a
+      trial (half-open) and closes the breaker if it succeeds
+    - every failed trial or probe keeps the breaker open for twice as long,
+      up to max_open_seconds
+
+Classes:
+    - ChassisHealth: Health and breaker state of one chassis
+    - ChassisHealthRegistry: ChassisHealth of every chassis and the prober
+"""
+
+import logging
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _probe_address(chassis_ip, default_port=443):
+    """
+    (host, port) of a chassis address, "host" or "host:port"
+    """
+    if chassis_ip.count(':') == 1:
+        host, port = chassis_ip.rsplit(':', 1)
+        if port.isdigit():
+            return host, int(port)
+    return chassis_ip.strip('[]'), default_port
+
+
+def _smooth(srtt, rttvar, latency):
+    """
+    (srtt, rttvar) updated with one latency sample, as in RFC 6298
+    """
+    if srtt is None:
+        return latency, latency / 2
+    return 0.875 * srtt + 0.125 * latency, 0.75 * rttvar + 0.25 * abs(srtt - latency)
+
+
+class ChassisHealth(object):
+    """
+    Latency estimate and circuit breaker of one chassis; thread-safe.
+    """
+
+    def __init__(self, chassis_ip, registry):
+        self.chassis_ip = chassis_ip
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_error = None
+        self.last_failure_at = None
+        self.last_success_at = None
+        self._srtt = None
+        self._rttvar = None
+        # (method, endpoint) -> (srtt, rttvar)
+        self._endpoint_rtt = {}
+        self._open_seconds = registry.open_seconds
+        self._open_until = 0.0
+        self._trial_started = None
+
+    def allow_request(self):
+        """
+        False if the breaker is open; once its open period is over one
+        request at a time is let through as a trial
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if now < self._open_until:
+                self.rejected += 1
+                return False
+            # a trial that never reported back does not block the chassis forever
+            if self._trial_started is not None and now - self._trial_started < self._registry.trial_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._trial_started = now
+            return True
+
+    def record_success(self, latency=None, endpoint=None):
+        """
+        the chassis answered; latency is the time until the response arrived,
+        endpoint the class of the request, e.g. ('GET', '/ports')
+        """
+        with self._lock:
+            if latency is not None:
+                self._srtt, self._rttvar = _smooth(self._srtt, self._rttvar, latency)
+                if endpoint is not None:
+                    srtt, rttvar = self._endpoint_rtt.get(endpoint, (None, None))
+                    self._endpoint_rtt[endpoint] = _smooth(srtt, rttvar, latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.last_success_at = time.time()
+            if self.state != CLOSED:
+                logger.info(f"Chassis {self.chassis_ip} is reachable again, closing its circuit breaker")
+            self.state = CLOSED
+            self._trial_started = None
+            self._open_seconds = self._registry.open_seconds
+
+    def record_failure(self, error):
+        """
+        the request failed with a timeout, a connection error or a 5xx answer;
+        called once per request, after its last retry
+        """
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            self.last_failure_at = time.time()
+            if self.state == HALF_OPEN:
+                self._open(backoff=True)
+            elif self.state == CLOSED and self.consecutive_failures >= self._registry.failure_threshold:
+                logger.warning(f"Chassis {self.chassis_ip} failed {self.consecutive_failures} times in a row, "
+                               f"opening its circuit breaker: {self.last_error}")
+                self._open(backoff=False)
+            opened = self.state == OPEN
+        if opened:
+            self._registry.start_prober()
+
+    def probe_result(self, reachable):
+        """
+        outcome of a background probe of an open breaker
+        """
+        with self._lock:
+            if self.state != OPEN:
+                return
+            if reachable:
+                # let the next request through as a trial
+                self._open_until = 0.0
+            else:
+                self._open(backoff=True)
+
+    def needs_probe(self, now):
+        with self._lock:
+            return self.state == OPEN and self._open_until > now
+
+    def read_timeout(self, minimum, maximum, endpoint=None):
+        """
+        read timeout for the next request to endpoint (any endpoint if None):
+        smoothed latency + 4 x deviation, between minimum and maximum;
+        maximum until a latency is known
+        """
+        with self._lock:
+            if endpoint is not None:
+                srtt, rttvar = self._endpoint_rtt.get(endpoint, (None, None))
+            else:
+                srtt, rttvar = self._srtt, self._rttvar
+            if srtt is None:
+                return maximum
+            return min(maximum, max(minimum, srtt + 4 * rttvar))
+
+    def retry_after(self):
+        """
+        seconds until the next trial request is let through
+        """
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic())
+
+    def _open(self, backoff):
+        if backoff:
+            self._open_seconds = min(self._open_seconds * 2, self._registry.max_open_seconds)
+        self.state = OPEN
+        self._trial_started = None
+        self._open_until = time.monotonic() + self._open_seconds
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "chassisIp": self.chassis_ip,
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "lastError": self.last_error,
+                "lastFailureAt": self.last_failure_at,
+                "lastSuccessAt": self.last_success_at,
+                "latencySeconds": round(self._srtt, 4) if self._srtt is not None else None,
+                "endpointLatencySeconds": {"%s %s" % endpoint: round(srtt, 4)
+                                           for endpoint, (srtt, _) in sorted(self._endpoint_rtt.items())},
+                "retryInSeconds": round(max(0.0, self._open_until - time.monotonic()), 1) if self.state == OPEN else None
+            }
+
+
+class ChassisHealthRegistry(object):
+    """
+    ChassisHealth of every chassis, created on first use, and the thread
+    probing open breakers.
+    Constructor arguments:
+        failure_threshold:  Consecutive failures that open the breaker.
+        open_seconds:       Seconds the breaker stays open before a trial
+                            request is let through, unless a probe succeeds first.
+        max_open_seconds:   Upper bound of the open period, which doubles
+                            after every failed probe or trial.
+        probe_interval:     Seconds between two probes of an open breaker.
+        probe_timeout:      Connect timeout of a probe in seconds.
+        trial_timeout:      Seconds after which an unanswered trial request
+                            no longer blocks the next one.
+    """
+
+    def __init__(self, failure_threshold=3, open_seconds=15, max_open_seconds=300, probe_interval=5,
+                 probe_timeout=3, trial_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.trial_timeout = trial_timeout
+        self._health = {}
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def configure(self, **settings):
+        """
+        change the settings above, e.g. from environment variables at startup
+        """
+        for name, value in settings.items():
+            if not hasattr(self, name) or name.startswith('_'):
+                raise ValueError("unknown circuit breaker setting %r" % name)
+            setattr(self, name, value)
+
+    def get(self, chassis_ip):
+        with self._lock:
+            health = self._health.get(chassis_ip)
+            if health is None:
+                health = self._health[chassis_ip] = ChassisHealth(chassis_ip, self)
+            return health
+
+    def status(self, chassis_ip=None):
+        """
+        health of one chassis or of every chassis seen so far
+        """
+        with self._lock:
+            health = [h for ip, h in self._health.items() if chassis_ip is None or ip == chassis_ip]
+        return [h.to_dict() for h in health]
+
+    def reset(self, chassis_ip=None):
+        """
+        forget the health of one chassis, or of every chassis
+        """
+        with self._lock:
+            for ip in list(self._health):
+                if chassis_ip is None or ip == chassis_ip:
+                    del self._health[ip]
+
+    def start_prober(self):
+        with self._lock:
+            if self._prober is None or not self._prober.is_alive():
+                self._prober = threading.Thread(target=self._probe_loop, name='ixos-chassis-prober', daemon=True)
+                self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            now = time.monotonic()
+            with self._lock:
+                pending = [h for h in self._health.values() if h.needs_probe(now)]
+            for health in pending:
+                health.probe_result(self._probe(health.chassis_ip))
+
+    def _probe(self, chassis_ip):
+        try:
+            with socket.create_connection(_probe_address(chassis_ip), timeout=self.probe_timeout):
+                return True
+        except OSError:
+            return False
+
+
+chassis_health = ChassisHealthRegistry()
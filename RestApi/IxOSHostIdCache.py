@@ -0,0 +1,69 @@
+"""
+Per-chassis cache of license server host IDs.
+
+A host ID identifies the license server of a chassis to the licensing portal
+and does not change while the chassis is in service, but retrieving it takes
+a retrievehostid async operation per license server. The host IDs of a
+chassis are therefore retrieved once, with the operations of all its license
+servers running at the same time, and kept until invalidated (e.g. after the
+chassis was replaced behind the same address).
+"""
+
+import threading
+import time
+
+
+class HostIdCache(object):
+    """
+    chassis IP -> list of {"serverId", "hostId"}; thread-safe
+    """
+
+    def __init__(self):
+        self._host_ids = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, chassis_ip):
+        """
+        cached host IDs of a chassis, or None if not retrieved yet
+        """
+        with self._lock:
+            entry = self._host_ids.get(chassis_ip)
+            self._stats["hits" if entry is not None else "misses"] += 1
+            return list(entry[0]) if entry is not None else None
+
+    def put(self, chassis_ip, host_ids):
+        with self._lock:
+            self._host_ids[chassis_ip] = (list(host_ids), time.time())
+
+    def retrieved_at(self, chassis_ip):
+        """
+        epoch time the host IDs of a chassis were retrieved, or None
+        """
+        with self._lock:
+            entry = self._host_ids.get(chassis_ip)
+            return entry[1] if entry is not None else None
+
+    def invalidate(self, chassis_ip=None):
+        """
+        forget the host IDs of one chassis, or of every chassis
+        """
+        with self._lock:
+            if chassis_ip is None:
+                self._host_ids.clear()
+            else:
+                self._host_ids.pop(chassis_ip, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, chassis=len(self._host_ids))
+
+
+host_id_cache = HostIdCache()
+
+
+def join_host_ids(host_ids):
+    """
+    host IDs in the "id1::id2" form returned by get_license_server_host_id
+    """
+    return "::".join(entry["hostId"] for entry in host_ids)
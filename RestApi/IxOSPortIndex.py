@@ -0,0 +1,137 @@
+"""
+Per-chassis index from card/port numbers and fullyQualifiedPortName to the
+internal IxOS port ID used by port operations.
+
+Port IDs are stable until the card layout changes, so the index is filled from
+one full /ports listing and reused until a card is hot-swapped, a port is
+rebooted or a /cards listing shows a different set of cards. Every full
+/ports listing made by a session refreshes the index as a side effect. A port
+that is still unknown after a reload is remembered as missing until a listing
+shows different ports or the index is invalidated, so repeated lookups of a
+bad port do not re-list every port of the chassis.
+"""
+
+import threading
+
+
+class PortIdIndex(object):
+    """
+    (card, port) / fullyQualifiedPortName -> port ID for one chassis
+    """
+
+    def __init__(self, chassis_ip):
+        self.chassis_ip = chassis_ip
+        self._by_card_port = None
+        self._by_name = None
+        self._card_signature = None
+        # keys not found in the current index, by mapping
+        self._missing = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+    def load(self, port_list):
+        """
+        (re)build the index from a full /ports listing
+        """
+        by_card_port = {}
+        by_name = {}
+        for port in port_list:
+            port_id = port.get("id")
+            if port_id is None:
+                continue
+            by_card_port[(port.get("cardNumber"), port.get("portNumber"))] = port_id
+            if port.get("fullyQualifiedPortName"):
+                by_name[port["fullyQualifiedPortName"]] = port_id
+        with self._lock:
+            if by_card_port != self._by_card_port or by_name != self._by_name:
+                self._missing = set()
+            self._by_card_port = by_card_port
+            self._by_name = by_name
+            self._stats["loads"] += 1
+
+    def invalidate(self):
+        with self._lock:
+            if self._by_card_port is not None:
+                self._stats["invalidations"] += 1
+            self._by_card_port = None
+            self._by_name = None
+            self._missing = set()
+
+    def observe_cards(self, card_list):
+        """
+        invalidate the index if the card layout differs from the last listing
+        """
+        signature = tuple(sorted(
+            (str(card.get("cardNumber")), str(card.get("id")), str(card.get("type")), str(card.get("serialNumber")))
+            for card in card_list
+        ))
+        with self._lock:
+            changed = self._card_signature is not None and signature != self._card_signature
+            self._card_signature = signature
+        if changed:
+            self.invalidate()
+
+    def lookup(self, card_number, port_number, loader):
+        """
+        port ID for card/port, or None if the chassis has no such port;
+        loader() must return a full /ports listing and is only called when
+        the index is empty or the port is unknown and was not looked up in
+        vain since the ports last changed
+        """
+        return self._lookup(self._by_card_port_getter, (card_number, port_number), loader)
+
+    def lookup_name(self, port_name, loader):
+        """
+        port ID for a fullyQualifiedPortName, or None if unknown
+        """
+        return self._lookup(self._by_name_getter, port_name, loader)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._by_card_port) if self._by_card_port is not None else 0)
+
+    def _by_card_port_getter(self):
+        return self._by_card_port
+
+    def _by_name_getter(self):
+        return self._by_name
+
+    def _lookup(self, mapping, key, loader):
+        with self._lock:
+            index = mapping()
+            if index is not None and key in index:
+                self._stats["hits"] += 1
+                return index[key]
+            if index is not None and (mapping.__name__, key) in self._missing:
+                self._stats["misses"] += 1
+                return None
+        # empty index or unknown port (e.g. a newly inserted card): reload once
+        self.load(loader())
+        with self._lock:
+            index = mapping()
+            if index is None:
+                return None
+            if key not in index:
+                self._missing.add((mapping.__name__, key))
+            return index.get(key)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_port_index(chassis_ip):
+    """
+    the process-wide index of a chassis, shared by sync and async sessions
+    """
+    with _indexes_lock:
+        index = _indexes.get(chassis_ip)
+        if index is None:
+            index = _indexes[chassis_ip] = PortIdIndex(chassis_ip)
+        return index
+
+
+def port_index_stats():
+    with _indexes_lock:
+        indexes = list(_indexes.items())
+    return {chassis_ip: index.stats() for chassis_ip, index in indexes}
@@ -0,0 +1,326 @@
+"""
+Timing instrumentation of chassis REST calls and inventory collectors.
+
+Every request sent by IxRestSession or AsyncIxRestSession is recorded in
+histograms per chassis and endpoint, with the time split into phases:
+
+    connect:    opening a new connection, TCP connect and TLS handshake
+                (only requests that did not reuse a kept-alive connection)
+    response:   from the request being sent until the response headers
+                arrived, i.e. the time the chassis took
+    download:   reading the response body (sync sessions only)
+    decode:     decoding the JSON body
+
+Requests are also counted per chassis by whether they opened a new
+connection or reused one.
+
+Errors and timeouts are counted per chassis and endpoint, response sizes per
+endpoint. Collectors and their process_* post-processing step are timed with
+the instrument_collector and instrument_processing decorators, and IxOS async
+(202) operations record their duration and number of polls.
+
+The registry renders the Prometheus text exposition format and summarizes the
+slowest endpoints, chassis and collectors.
+"""
+
+import asyncio
+import bisect
+import functools
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+OPERATION_BUCKETS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# metric name -> (type, help)
+METRICS = {
+    "ixos_request_duration_seconds": ("histogram", "Duration of chassis REST requests"),
+    "ixos_request_phase_seconds": ("histogram", "Duration of each phase of chassis REST requests"),
+    "ixos_response_bytes": ("histogram", "Size of chassis REST response bodies"),
+    "ixos_request_connections_total": ("counter", "Chassis REST requests by connection (new or reused)"),
+    "ixos_request_errors_total": ("counter", "Failed chassis REST requests by kind (timeout, connection, http_4xx, http_5xx)"),
+    "ixos_collector_duration_seconds": ("histogram", "Duration of inventory collectors, requests included"),
+    "ixos_collector_errors_total": ("counter", "Inventory collectors that raised"),
+    "ixos_processing_duration_seconds": ("histogram", "Duration of the process_* step of inventory collectors"),
+    "ixos_async_operation_duration_seconds": ("histogram", "Duration of IxOS async (202) operations"),
+    "ixos_async_operation_polls_total": ("counter", "Status polls of IxOS async (202) operations"),
+}
+
+# path prefixes left out of endpoint labels
+_PATH_PREFIXES = ("/chassis/api/v2/ixos", "/platform/api/v2", "/platform/api/v1")
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-fA-F-]{16,})(?=/|$)")
+
+
+def endpoint_of(uri):
+    """
+    endpoint label of a request URI: the path without the API prefix and
+    with numeric or UUID-like segments replaced by {id}
+    """
+    path = urlsplit(uri).path if "://" in uri else uri.split("?", 1)[0]
+    for prefix in _PATH_PREFIXES:
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    return _ID_SEGMENT.sub("/{id}", path) or "/"
+
+
+class Histogram(object):
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        estimated q-quantile, interpolated within its bucket like
+        Prometheus' histogram_quantile; None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class RequestMetrics(object):
+    """
+    Thread-safe registry of histograms and counters keyed by metric name and
+    label values.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value, bounds=DURATION_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe_request(self, chassis_ip, method, uri, status, duration, phases=None, response_bytes=None,
+                        new_connection=None):
+        """
+        record one completed HTTP exchange with a chassis; new_connection
+        tells whether it opened a connection or reused one, if known
+        """
+        endpoint = endpoint_of(uri)
+        self.observe("ixos_request_duration_seconds", {"chassis": chassis_ip, "endpoint": endpoint, "method": method}, duration)
+        for phase, seconds in (phases or {}).items():
+            self.observe("ixos_request_phase_seconds", {"endpoint": endpoint, "phase": phase}, max(seconds, 0.0))
+        if response_bytes is not None:
+            self.observe("ixos_response_bytes", {"endpoint": endpoint}, response_bytes, SIZE_BUCKETS)
+        if new_connection is not None:
+            self.inc("ixos_request_connections_total",
+                     {"chassis": chassis_ip, "connection": "new" if new_connection else "reused"})
+        if status >= 400:
+            self.request_error(chassis_ip, uri, "http_%dxx" % (status // 100))
+
+    def request_error(self, chassis_ip, uri, kind):
+        """
+        count a failed request; kind is timeout, connection, http_4xx or http_5xx
+        """
+        self.inc("ixos_request_errors_total", {"chassis": chassis_ip, "endpoint": endpoint_of(uri), "kind": kind})
+
+    def observe_operation(self, name, chassis_ip, state, duration, polls):
+        """
+        record a finished IxOS async operation
+        """
+        self.observe("ixos_async_operation_duration_seconds", {"operation": name, "state": state}, duration, OPERATION_BUCKETS)
+        self.inc("ixos_async_operation_polls_total", {"operation": name}, polls)
+
+    def render(self):
+        """
+        every metric in the Prometheus text exposition format
+        """
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count, h.bounds) for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+        series = {}
+        for (name, labels), counts, total, count, bounds in histograms:
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, bucket in zip(bounds + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append("%s_bucket%s %d" % (name, _format_labels(labels + (("le", le),)), cumulative))
+            lines.append("%s_sum%s %r" % (name, _format_labels(labels), total))
+            lines.append("%s_count%s %d" % (name, _format_labels(labels), count))
+        for (name, labels), value in counters:
+            series.setdefault(name, []).append("%s%s %d" % (name, _format_labels(labels), value))
+
+        output = []
+        for name, lines in series.items():
+            metric_type, help_text = METRICS.get(name, ("untyped", name))
+            output.append("# HELP %s %s" % (name, help_text))
+            output.append("# TYPE %s %s" % (name, metric_type))
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+    def slowest(self, n=5):
+        """
+        the n slowest endpoints, chassis and collectors by p95 duration
+
+        Returns:
+            dict: endpoints, chassis and collectors, each a list of {name,
+                requests (or runs), avg_seconds, p50_seconds, p95_seconds,
+                errors}; plus async_operations per operation name
+        """
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+
+        def group(metric, label):
+            merged = {}
+            for (name, labels), histogram in histograms:
+                if name != metric:
+                    continue
+                value = dict(labels)[label]
+                if value not in merged:
+                    merged[value] = Histogram(histogram.bounds)
+                merged[value].merge(histogram)
+            return merged
+
+        def errors(metric, label):
+            totals = {}
+            for (name, labels), value in counters:
+                if name == metric:
+                    key = dict(labels)[label]
+                    totals[key] = totals.get(key, 0) + value
+            return totals
+
+        def rank(merged, failures, count_key):
+            ranked = sorted(merged.items(), key=lambda item: item[1].quantile(0.95) or 0, reverse=True)[:n]
+            return [{
+                "name": name,
+                count_key: histogram.count,
+                "avg_seconds": round(histogram.sum / histogram.count, 4) if histogram.count else None,
+                "p50_seconds": _round(histogram.quantile(0.5)),
+                "p95_seconds": _round(histogram.quantile(0.95)),
+                "errors": failures.get(name, 0)
+            } for name, histogram in ranked]
+
+        operations = group("ixos_async_operation_duration_seconds", "operation")
+        polls = errors("ixos_async_operation_polls_total", "operation")
+        return {
+            "endpoints": rank(group("ixos_request_duration_seconds", "endpoint"),
+                              errors("ixos_request_errors_total", "endpoint"), "requests"),
+            "chassis": rank(group("ixos_request_duration_seconds", "chassis"),
+                            errors("ixos_request_errors_total", "chassis"), "requests"),
+            "collectors": rank(group("ixos_collector_duration_seconds", "collector"),
+                               errors("ixos_collector_errors_total", "collector"), "runs"),
+            "processing": rank(group("ixos_processing_duration_seconds", "collector"), {}, "runs"),
+            "async_operations": [{
+                "name": name,
+                "operations": histogram.count,
+                "avg_seconds": round(histogram.sum / histogram.count, 3) if histogram.count else None,
+                "p95_seconds": _round(histogram.quantile(0.95)),
+                "avg_polls": round(polls.get(name, 0) / histogram.count, 1) if histogram.count else None
+            } for name, histogram in operations.items()]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = ('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in labels)
+    return "{%s}" % ",".join(escaped)
+
+
+request_metrics = RequestMetrics()
+
+
+def instrument_collector(name):
+    """
+    decorator timing a sync or async collector whose first argument is the
+    session, per collector name and chassis
+    """
+    def decorate(collector):
+        def record(session, started, failed):
+            labels = {"collector": name, "chassis": getattr(session, "chassis_ip", "")}
+            request_metrics.observe("ixos_collector_duration_seconds", labels, time.perf_counter() - started)
+            if failed:
+                request_metrics.inc("ixos_collector_errors_total", labels)
+
+        if asyncio.iscoroutinefunction(collector):
+            @functools.wraps(collector)
+            async def async_wrapper(session, *args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await collector(session, *args, **kwargs)
+                except BaseException:
+                    record(session, started, True)
+                    raise
+                record(session, started, False)
+                return result
+            return async_wrapper
+
+        @functools.wraps(collector)
+        def wrapper(session, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = collector(session, *args, **kwargs)
+            except BaseException:
+                record(session, started, True)
+                raise
+            record(session, started, False)
+            return result
+        return wrapper
+    return decorate
+
+
+def instrument_processing(name):
+    """
+    decorator timing a process_* post-processing function
+    """
+    def decorate(process):
+        @functools.wraps(process)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return process(*args, **kwargs)
+            finally:
+                request_metrics.observe("ixos_processing_duration_seconds", {"collector": name}, time.perf_counter() - started)
+        return wrapper
+    return decorate
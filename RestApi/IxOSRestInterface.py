@@ -7,18 +7,86 @@ works with limited functionality for Windows chassis.
 import sys
 import os
 import json
+import random
 import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+
+from .IxOSAsyncOperations import get_default_scheduler
+from .IxOSPortIndex import get_port_index
+from .IxOSSingleFlight import sync_flights, flight_key
+from .IxOSRequestMetrics import request_metrics, endpoint_of
+from .IxOSChassisHealth import chassis_health, CLOSED
+from .IxOSHostIdCache import host_id_cache, join_host_ids
 
 # handle urllib3 differences between python versions
 if sys.version_info[0] == 2 and ((sys.version_info[1] == 7 and sys.version_info[2] < 9) or sys.version_info[1] < 7):
     import requests.packages.urllib3
+    from requests.packages.urllib3.util.retry import Retry
 else:
     import urllib3
+    from urllib3.util.retry import Retry
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
 class IxRestException(Exception):
     pass
 
+class CircuitOpenError(IxRestException):
+    """
+    raised without sending the request while the circuit breaker of the
+    chassis is open, i.e. the chassis is known to be down
+    """
+    pass
+
+# answers of an overloaded or restarting chassis REST service worth retrying
+RETRY_STATUS_CODES = (502, 503, 504)
+
+def failure_kind(error):
+    """
+    'timeout' or 'connection' for a requests exception; with urllib3 retries
+    configured a read timeout surfaces as a ConnectionError wrapping it
+    """
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    if isinstance(reason, requests.packages.urllib3.exceptions.TimeoutError):
+        return 'timeout'
+    return 'connection'
+
+# seconds the current thread spent opening connections (TCP and TLS) since
+# IxRestSession._send last reset it
+_connect_timing = threading.local()
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super(_TimedHTTPConnection, self).connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + time.perf_counter() - started
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super(_TimedHTTPSConnection, self).connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + time.perf_counter() - started
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+def retry_delay(attempt, backoff):
+    """
+    full-jitter exponential backoff before retry number attempt + 1
+    """
+    return random.uniform(0, backoff * 2 ** attempt)
+
 class IxRestSession(object):
     """
     class for handling HTTP requests/response for IxOS REST APIs
@@ -32,9 +100,24 @@ class IxRestSession(object):
         timeout:        Time to wait (in seconds) while polling \
                         for async operation.
         poll_interval:  Polling inteval in seconds.
+        pool_maxsize:   Maximum number of persistent connections kept \
+                        open to the chassis.
+        max_retries:    Number of retries for failed connections and \
+                        idempotent requests.
+        backoff_factor: Backoff factor applied between retries.
+        keep_alive:     If False, every request closes its connection.
+        connect_timeout: Seconds to wait for a connection to the chassis.
+        read_timeout:   Maximum seconds to wait for an answer; the actual \
+                        read timeout adapts to the latency of the chassis.
+        min_read_timeout: Lower bound of the adaptive read timeout.
+        get_retries:    Number of retries of GET requests after a timeout, \
+                        a connection error or a 502/503/504 answer.
+        retry_backoff:  Base delay in seconds of the jittered GET retries.
     """
 
-    def __init__(self, chassis_address, username=None, password=None, api_key=None,timeout=600, poll_interval=2, verbose=False, insecure_request_warning=False):
+    def __init__(self, chassis_address, username=None, password=None, api_key=None,timeout=600, poll_interval=2, verbose=False, insecure_request_warning=False,
+                 pool_maxsize=10, max_retries=0, backoff_factor=0, keep_alive=True, connect_timeout=3, read_timeout=10,
+                 min_read_timeout=5, get_retries=2, retry_backoff=0.2):
 
         self.chassis_ip = chassis_address
         self.api_key = api_key
@@ -44,6 +127,36 @@ class IxRestSession(object):
         self._authUri = '/platform/api/v1/auth/session'
         self.username = username
         self.password = password
+        self._auth_lock = threading.Lock()
+        # requests currently being sent and time.monotonic() of the end of
+        # the last one, so IxRestSessionPool does not close a session in use
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self._usage_lock = threading.Lock()
+        # optional callable(api_key) told about every key obtained by
+        # reauthenticate, e.g. by IxRestSessionPool to update its key cache
+        self.on_reauthenticate = None
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.min_read_timeout = min_read_timeout
+        self.get_retries = get_retries
+        self.retry_backoff = retry_backoff
+        self.health = chassis_health.get(chassis_address)
+
+        # one pooled transport per session so consecutive calls to the chassis
+        # reuse the same TCP/TLS connections instead of reconnecting every time
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(total=max_retries, backoff_factor=backoff_factor, raise_on_status=False)
+        )
+        # time the setup of new connections, see _send
+        self._adapter.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool}
+        self._http = requests.Session()
+        self._http.mount('https://', self._adapter)
+        self._http.mount('http://', self._adapter)
 
         # ignore self sign certificate warning(s) if insecure_request_warning=False
         if not insecure_request_warning:
@@ -64,10 +177,39 @@ class IxRestSession(object):
 
     def get_headers(self):
         # headers should at least contain these two
-        return {
+        headers = {
             "Content-Type": "application/json",
             'x-api-key': self.api_key
         }
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        return headers
+
+    def connection_stats(self):
+        """
+        number of requests sent over the pooled transport, split into those
+        that opened a new connection and those that reused a kept-alive one
+        """
+        requests_sent = new_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            requests_sent += pool.num_requests
+            new_connections += pool.num_connections
+        return {
+            'requests': requests_sent,
+            'new_connections': new_connections,
+            'reused_connections': max(requests_sent - new_connections, 0)
+        }
+
+    def close(self):
+        """
+        close all pooled connections to the chassis
+        """
+        self._http.close()
 
     def authenticate(self, username="admin", password="admin"):
         """
@@ -88,24 +230,36 @@ class IxRestSession(object):
         )
         self.api_key = response.data['apiKey']
 
-    def http_request(self, method, uri, payload=None, params=None):
+    def reauthenticate(self, stale_api_key=None):
+        """
+        obtain a new API key using the stored credentials; if another thread
+        already replaced stale_api_key, the newer key is kept as is. The new
+        key is passed to on_reauthenticate if set
+        """
+        with self._auth_lock:
+            if stale_api_key is None or self.api_key == stale_api_key:
+                self.authenticate(username=self.username, password=self.password)
+                if self.on_reauthenticate is not None:
+                    self.on_reauthenticate(self.api_key)
+
+    def http_request(self, method, uri, payload=None, params=None, retry_auth=True, wait_for_completion=True):
         """
         wrapper over requests.requests to pretty-print debug info
-        and invoke async operation polling depending on HTTP status code (e.g. 202)
+        and invoke async operation polling depending on HTTP status code (e.g. 202);
+        with wait_for_completion=False a 202 response is returned as is
         """
         try:
             # lines with 'debug_string' can be removed without affecting the code
             if not uri.startswith('http'):
                 uri = self.get_ixos_uri() + uri
 
+            body = None
             if payload is not None:
-                payload = json.dumps(payload, indent=2, sort_keys=True)
+                body = json.dumps(payload, indent=2, sort_keys=True)
 
             headers = self.get_headers()
-            response = requests.request(
-                method, uri, data=payload, params=params,
-                headers=headers, verify=False, timeout=10
-            )
+            response, started, connect = self._send(method, uri, body, params, headers)
+            received = time.perf_counter()
 
             # debug_string = 'Response => Status %d\n' % response.status_code
             data = None
@@ -115,6 +269,25 @@ class IxRestSession(object):
             except:
                 print('Invalid/Non-JSON payload received: %s' % data)
                 data = None
+            decoded = time.perf_counter()
+            # response.elapsed ends when the headers arrived, the body is read
+            # afterwards; it includes opening a new connection
+            headers_received = response.elapsed.total_seconds()
+            phases = {'response': headers_received - connect, 'download': received - started - headers_received,
+                      'decode': decoded - received}
+            if connect:
+                phases['connect'] = connect
+            request_metrics.observe_request(
+                self.chassis_ip, method, uri, response.status_code, decoded - started,
+                phases=phases, response_bytes=len(response.content), new_connection=connect > 0)
+
+            is_auth_uri = uri[-len(self._authUri):] == self._authUri
+
+            # the API key expired or was revoked; get a new one and replay once
+            if response.status_code == 401 and retry_auth and not is_auth_uri and self.username is not None:
+                self.reauthenticate(stale_api_key=headers['x-api-key'])
+                return self.http_request(method, uri, payload=payload, params=params, retry_auth=False,
+                                         wait_for_completion=wait_for_completion)
 
             if str(response.status_code)[0] == '4':
                 raise IxRestException("{code} {reason}: {data}.{extraInfo}".format(
@@ -124,11 +297,11 @@ class IxRestSession(object):
                     extraInfo="{sep}{msg}".format(
                         sep=os.linesep,
                         msg="Please check that your API key is correct or call IxRestSession.authenticate(username, password) in order to obtain a new API key."
-                    ) if str(response.status_code) == '401' and uri[-len(self._authUri):] != self._authUri else ''
+                    ) if str(response.status_code) == '401' and not is_auth_uri else ''
                 )
                 )
 
-            if response.status_code == 202:
+            if response.status_code == 202 and wait_for_completion:
                 result_url = self.wait_for_async_operation(data)
                 return result_url
             else:
@@ -137,57 +310,139 @@ class IxRestSession(object):
         except:
             raise
 
+    def _send(self, method, uri, body, params, headers):
+        """
+        send one request through the circuit breaker of the chassis; GETs are
+        retried with jittered backoff after timeouts, connection errors and
+        502/503/504 answers. Returns the response, when its last attempt
+        started and the seconds that attempt spent opening a new connection
+        (0 if it reused a kept-alive one).
+        """
+        attempts = 1 + (self.get_retries if method == 'GET' else 0)
+        # the read timeout adapts to the latency of this endpoint
+        endpoint = (method, endpoint_of(uri))
+        # the breaker counts one failure per request, after its last attempt;
+        # a half-open trial or a request to a chassis whose breaker opened
+        # meanwhile is not retried
+        for attempt in range(attempts):
+            if not self.health.allow_request():
+                raise CircuitOpenError('chassis %s is not reachable (circuit breaker open, next attempt in %.0fs): %s' % (
+                    self.chassis_ip, self.health.retry_after(), self.health.last_error))
+            started = time.perf_counter()
+            _connect_timing.seconds = 0.0
+            with self._usage_lock:
+                self.in_flight += 1
+            try:
+                response = self._http.request(
+                    method, uri, data=body, params=params, headers=headers, verify=False,
+                    timeout=(self.connect_timeout,
+                             self.health.read_timeout(self.min_read_timeout, self.read_timeout, endpoint))
+                )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                kind = failure_kind(e)
+                request_metrics.request_error(self.chassis_ip, uri, kind)
+                if attempt + 1 == attempts or self.health.state != CLOSED:
+                    self.health.record_failure('%s: %s' % (kind, e))
+                    raise
+            except Exception as e:
+                self.health.record_failure(e)
+                raise
+            else:
+                if response.status_code < 500:
+                    self.health.record_success(response.elapsed.total_seconds(), endpoint)
+                    return response, started, _connect_timing.seconds
+                if response.status_code not in RETRY_STATUS_CODES or attempt + 1 == attempts or self.health.state != CLOSED:
+                    self.health.record_failure('%d %s' % (response.status_code, response.reason))
+                    return response, started, _connect_timing.seconds
+            finally:
+                with self._usage_lock:
+                    self.in_flight -= 1
+                    self.last_used = time.monotonic()
+            time.sleep(retry_delay(attempt, self.retry_backoff))
+
     def wait_for_async_operation(self, response_body):
         """
-        method for handeling intermediate async operation results
+        method for handeling intermediate async operation results; polling is
+        done by the shared AsyncOperationScheduler, this thread only waits
         """
         try:
             print('Polling for async operation ...')
-            operation_status = response_body['state']
-            start_time = int(time.time())
-            while operation_status == 'IN_PROGRESS':
-                response = self.http_request('GET', response_body['url'])
-                response_body = response.data
-                operation_status = response_body['state']
-                if int(time.time() - start_time) > self.timeout:
-                    raise IxRestException(
-                        'timeout occured while polling for async operation')
-
-                time.sleep(self.poll_interval)
-
-            if operation_status == 'SUCCESS':
-                return response.data['resultUrl']
-            elif operation_status == 'COMPLETED':
-                return response.data['resultUrl']
-            elif operation_status == 'ERROR':
-                return response.data['message']
+            operation = get_default_scheduler().submit(self, response_body, 'operation', timeout=self.timeout)
+            # the scheduler reports TIMEOUT after self.timeout; the margin covers
+            # a last poll or result fetch still in flight at that moment
+            if not operation.wait(self.timeout + 30):
+                operation.finish('TIMEOUT', error='timeout occured while polling for async operation')
+
+            if operation.state == 'SUCCESS':
+                return operation.result
+            elif operation.state == 'ERROR':
+                return operation.error
+            elif operation.state == 'TIMEOUT':
+                raise IxRestException(
+                    'timeout occured while polling for async operation')
             else:
-                raise IxRestException("async failed")
-        except:
-            raise
+                raise IxRestException("async failed: %s" % operation.error)
         finally:
             print('Completed async operation')
 
+    def start_async_operation(self, method, uri, name, payload=None, params=None, on_complete=None):
+        """
+        send a request that may start an async operation and return an
+        AsyncOperation handle right away instead of waiting for it;
+        on_complete(result_url) runs when the operation succeeds, with
+        result_url=None if the chassis answered synchronously
+        """
+        response = self.http_request(method, uri, payload=payload, params=params, wait_for_completion=False)
+        scheduler = get_default_scheduler()
+        if response.status_code == 202:
+            return scheduler.submit(self, response.data, name, timeout=self.timeout, on_complete=on_complete)
+        result = on_complete(None) if on_complete is not None else response.data
+        return scheduler.completed(name, result, chassis_ip=self.chassis_ip)
+
+    def get_shared(self, path, params=None):
+        """
+        GET a collection of the chassis; concurrent identical GETs from other
+        threads share a single request and its (read-only) response
+        """
+        return sync_flights.do(
+            flight_key(self.chassis_ip, path, params),
+            lambda: self.http_request('GET', self.get_ixos_uri() + path, params=params))
+
     def get_chassis(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/chassis', params=params)
+        return self.get_shared('/chassis', params)
     
     def get_sensors(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/sensors', params=params)
+        return self.get_shared('/sensors', params)
 
     def get_cards(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/cards', params=params)
+        response = self.get_shared('/cards', params)
+        if params is None and response.data is not None:
+            get_port_index(self.chassis_ip).observe_cards(response.data)
+        return response
 
     def get_ports(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/ports', params=params)
+        response = self.get_shared('/ports', params)
+        if params is None and response.data is not None:
+            get_port_index(self.chassis_ip).load(response.data)
+        return response
+
+    def get_port_id(self, card_number, port_number):
+        """
+        internal port ID of card/port from the cached port index, or None if
+        the chassis has no such port
+        """
+        return get_port_index(self.chassis_ip).lookup(
+            card_number, port_number,
+            lambda: self.get_shared('/ports').data)
 
     def get_services(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/services', params=params)
+        return self.get_shared('/services', params)
     
     def get_perfcounters(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/perfcounters', params=params)
+        return self.get_shared('/perfcounters', params)
     
     def get_portstats(self, params=None):
-        return self.http_request('GET', self.get_ixos_uri() + '/portstats', params=params)
+        return self.get_shared('/portstats', params)
 
     def take_ownership(self, resource_id):
         return self.http_request(
@@ -202,6 +457,7 @@ class IxRestSession(object):
         )
 
     def reboot_port(self, resource_id):
+        get_port_index(self.chassis_ip).invalidate()
         return self.http_request(
             'POST',
             self.get_ixos_uri() + '/ports/%d/operations/reboot' % resource_id
@@ -214,23 +470,60 @@ class IxRestSession(object):
         )
 
     def hotswap_card(self, resource_id):
+        get_port_index(self.chassis_ip).invalidate()
         return self.http_request(
             'POST',
             self.get_ixos_uri() + '/cards/%d/operations/hotswap' % resource_id
         )
         
+    def get_license_servers(self, params=None):
+        return self.http_request('GET', f'https://{self.chassis_ip}/platform/api/v2/licensing/servers', params=params)
+
+    def start_license_server_host_id(self, server_id):
+        """
+        start the retrievehostid operation of one license server; the
+        AsyncOperation result is its host ID, None if the chassis returned none
+        """
+        url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/{server_id}/operations/retrievehostid'
+
+        def fetch_result(result_url):
+            if not result_url or "http" not in result_url:
+                return None
+            # runs on the scheduler's result pool, which must not wait for another 202
+            data = self.http_request('GET', result_url, params=" ", wait_for_completion=False).data
+            return data.get("hostId", "NA") if isinstance(data, dict) else "NA"
+
+        return self.start_async_operation('POST', url, 'retrievehostid', params=" ", on_complete=fetch_result)
+
+    def get_license_server_host_ids(self, params=None, refresh=False):
+        """
+        host IDs of all license servers as a list of {"serverId", "hostId"};
+        the retrievehostid operations of all servers run at the same time and
+        the host IDs are cached per chassis unless refresh is True
+        """
+        if not refresh:
+            cached = host_id_cache.get(self.chassis_ip)
+            if cached is not None:
+                return cached
+        servers = self.get_license_servers(params=params).data
+        operations = [(lic_s["id"], self.start_license_server_host_id(lic_s["id"])) for lic_s in servers]
+        host_ids = []
+        failures = []
+        for server_id, operation in operations:
+            operation.wait(self.timeout)
+            if operation.state != 'SUCCESS':
+                failures.append("server %s: %s" % (server_id, operation.error or operation.state))
+            elif operation.result is not None:
+                host_ids.append({"serverId": server_id, "hostId": operation.result})
+        # a server that failed is retried by the next call
+        if not failures:
+            host_id_cache.put(self.chassis_ip, host_ids)
+        elif not host_ids:
+            raise IxRestException("host ID retrieval failed: %s" % "; ".join(failures))
+        return host_ids
+
     def get_license_server_host_id(self, params=None):
-        hids = []
-        url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers'
-        output = self.http_request('GET', url, params=params).data
-        for lic_s in output:
-            url_for_info_fetch =  f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/{lic_s["id"]}/operations/retrievehostid'
-
-            resultUrl = self.http_request('POST', url_for_info_fetch, params=" ")
-            if "http" in resultUrl:
-                host_id_info = self.http_request('GET', resultUrl, params=" ").json().get("hostId", "NA")
-                hids.append(host_id_info)
-        return "::".join(hids)
+        return join_host_ids(self.get_license_server_host_ids(params=params))
                 
     def get_license_host_id(session):
         return session.get_license_server_host_id()
@@ -246,11 +539,30 @@ class IxRestSession(object):
             id_url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/1/operations/retrievelicenses/1/result'
             return self.http_request('GET', id_url, params=params)
 
-    def collect_chassis_logs(self, params=None):
+    def start_license_activation(self, params=None, process=None):
+        """
+        non-blocking variant of get_license_activation; the AsyncOperation
+        result is the list of licenses, passed through process() if given
+        """
+        url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/1/operations/retrievelicenses'
+        windows_url = f'https://{self.chassis_ip}/platform/api/v2/licensing/servers/1/operations/retrievelicenses/1/result'
+
+        def fetch_result(result_url):
+            # runs on the scheduler's result pool, which must not wait for another 202
+            licenses = self.http_request('GET', result_url or windows_url, params=params,
+                                         wait_for_completion=False).data
+            return process(licenses) if process is not None else licenses
+
+        return self.start_async_operation('POST', url, 'retrievelicenses', params=params, on_complete=fetch_result)
+
+    def collect_chassis_logs(self, params=None, wait=True):
         chassis_info = self.get_chassis()
         chassis_info = json.loads(json.dumps(chassis_info.data[0]))
         card_id = chassis_info["id"]
-        resultUrl = self.http_request('POST', self.get_ixos_uri() + f"/chassis/{card_id}/operations/collectlogs", params=" ")
+        uri = self.get_ixos_uri() + f"/chassis/{card_id}/operations/collectlogs"
+        if not wait:
+            return self.start_async_operation('POST', uri, 'collectlogs', params=" ")
+        resultUrl = self.http_request('POST', uri, params=" ")
         return resultUrl     
      
 
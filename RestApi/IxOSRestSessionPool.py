@@ -0,0 +1,277 @@
+"""
+A thread-safe pool of authenticated IxRestSession objects.
+
+Sessions are keyed by chassis address and credentials, so every caller asking
+for the same chassis with the same username/password shares one API key
+instead of POSTing to the auth endpoint on every call. Sessions that have not
+been used for idle_timeout seconds are dropped and re-created on next use; a
+session counts as used until its last request finished, and a dropped session
+still sending requests is only closed once they are done.
+AsyncIxRestSessionPool does the same for AsyncIxRestSession objects.
+
+With a key_cache (an IxOSCacheBackend backend) the API key of a new session is
+taken from, and published to, the cache, so workers sharing the cache do not
+each log in to the chassis; a stale key is replaced on its first 401 and the
+new key is published in turn.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+
+from .IxOSRestInterface import IxRestSession
+
+
+def _api_key_cache_key(key):
+    chassis_address, username, password = key
+    secret = hashlib.sha256(("%s\0%s" % (username, password)).encode()).hexdigest()[:16]
+    return "apikey/%s/%s" % (chassis_address, secret)
+
+
+class IxRestSessionPool(object):
+    """
+    Pool of IxRestSession objects shared by all worker threads.
+    Constructor arguments:
+        idle_timeout:       Seconds a session may stay unused before it is
+                            evicted from the pool.
+        session_factory:    Callable building a new, authenticated session;
+                            defaults to IxRestSession.
+        key_cache:          Optional cache backend sharing API keys.
+        session_kwargs:     Extra keyword arguments passed to session_factory.
+    """
+
+    def __init__(self, idle_timeout=300, session_factory=IxRestSession, key_cache=None, **session_kwargs):
+        self.idle_timeout = idle_timeout
+        self.key_cache = key_cache
+        self._session_factory = session_factory
+        self._session_kwargs = session_kwargs
+        self._sessions = {}
+        self._last_used = {}
+        # one lock per key, kept for the life of the pool so two callers can
+        # never log in for the same key at once
+        self._key_locks = {}
+        # dropped sessions waiting for their requests to finish before closing
+        self._retired = []
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_session(self, chassis_address, username, password):
+        """
+        return a pooled session for the chassis, authenticating a new one only
+        if none is cached; concurrent callers for the same key wait for the
+        first one to finish authenticating instead of logging in in parallel
+        """
+        key = (chassis_address, username, password)
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            session = self._checkout(key)
+            if session is not None:
+                return session
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                session = self._checkout(key)
+                if session is not None:
+                    return session
+                self._stats["misses"] += 1
+
+            cached = self.key_cache.get(_api_key_cache_key(key)) if self.key_cache is not None else None
+            session = self._session_factory(chassis_address, username, password,
+                                            api_key=cached[0] if cached else None, **self._session_kwargs)
+            if self.key_cache is not None:
+                if not cached:
+                    self.key_cache.set(_api_key_cache_key(key), session.api_key, ttl=self.idle_timeout)
+                session.on_reauthenticate = self._key_publisher(key)
+
+            with self._lock:
+                self._sessions[key] = session
+                self._last_used[key] = time.monotonic()
+            return session
+
+    def invalidate(self, chassis_address=None):
+        """
+        drop pooled sessions for one chassis, or for all chassis if no address is given
+        """
+        with self._lock:
+            for key in list(self._sessions):
+                if chassis_address is None or key[0] == chassis_address:
+                    self._discard(key)
+            self._close_retired()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._sessions), retired=len(self._retired),
+                        idle_timeout=self.idle_timeout)
+
+    def connection_stats(self):
+        """
+        per-chassis connection reuse counters of the pooled sessions
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+        return {key[0]: session.connection_stats() for key, session in sessions
+                if hasattr(session, 'connection_stats')}
+
+    def _checkout(self, key):
+        session = self._sessions.get(key)
+        if session is not None:
+            self._last_used[key] = time.monotonic()
+            self._stats["hits"] += 1
+        return session
+
+    def _key_publisher(self, key):
+        """
+        on_reauthenticate callback replacing the cached API key of key
+        """
+        def publish(api_key):
+            self.key_cache.set(_api_key_cache_key(key), api_key, ttl=self.idle_timeout)
+        return publish
+
+    def _evict_idle(self, now):
+        for key, last_used in list(self._last_used.items()):
+            # checkout time, or the end of the last request sent with the session
+            last_used = max(last_used, getattr(self._sessions.get(key), 'last_used', last_used))
+            if now - last_used > self.idle_timeout:
+                self._discard(key)
+                self._stats["evictions"] += 1
+        self._close_retired()
+
+    def _discard(self, key):
+        session = self._sessions.pop(key, None)
+        self._last_used.pop(key, None)
+        if session is not None:
+            self._retired.append(session)
+        self._close_retired()
+
+    def _close_retired(self):
+        """
+        close the dropped sessions no request is using anymore
+        """
+        retired, self._retired = self._retired, []
+        for session in retired:
+            if getattr(session, 'in_flight', 0) > 0:
+                self._retired.append(session)
+            elif hasattr(session, 'close'):
+                session.close()
+
+
+
+class AsyncIxRestSessionPool(object):
+    """
+    Pool of opened AsyncIxRestSession objects shared by all tasks of one
+    event loop. Same keying, idle eviction and deferred closing as
+    IxRestSessionPool.
+    Constructor arguments:
+        idle_timeout:       Seconds a session may stay unused before it is
+                            evicted from the pool.
+        session_factory:    Callable building a new session; defaults to
+                            AsyncIxRestSession. The session is opened by the pool.
+        key_cache:          Optional cache backend sharing API keys.
+        session_kwargs:     Extra keyword arguments passed to session_factory.
+    """
+
+    def __init__(self, idle_timeout=300, session_factory=None, key_cache=None, **session_kwargs):
+        self.idle_timeout = idle_timeout
+        self.key_cache = key_cache
+        self._session_factory = session_factory
+        self._session_kwargs = session_kwargs
+        self._sessions = {}
+        self._last_used = {}
+        self._key_locks = {}
+        self._retired = []
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    async def get_session(self, chassis_address, username, password):
+        """
+        return a pooled, opened session for the chassis; concurrent callers for
+        the same key wait for the first one to finish authenticating
+        """
+        key = (chassis_address, username, password)
+        await self._evict_idle(time.monotonic())
+        session = self._checkout(key)
+        if session is not None:
+            return session
+
+        key_lock = self._key_locks.setdefault(key, asyncio.Lock())
+        async with key_lock:
+            session = self._checkout(key)
+            if session is not None:
+                return session
+            self._stats["misses"] += 1
+
+            if self._session_factory is None:
+                # imported lazily so the sync pool does not require httpx
+                from .IxOSAsyncRestInterface import AsyncIxRestSession
+                self._session_factory = AsyncIxRestSession
+            cached = None
+            if self.key_cache is not None:
+                cached = await asyncio.to_thread(self.key_cache.get, _api_key_cache_key(key))
+            session = self._session_factory(chassis_address, username, password,
+                                            api_key=cached[0] if cached else None, **self._session_kwargs)
+            try:
+                await session.open()
+            except BaseException:
+                await session.aclose()
+                raise
+            if self.key_cache is not None:
+                if not cached:
+                    await asyncio.to_thread(self.key_cache.set, _api_key_cache_key(key), session.api_key,
+                                            self.idle_timeout)
+                session.on_reauthenticate = self._key_publisher(key)
+
+            self._sessions[key] = session
+            self._last_used[key] = time.monotonic()
+            return session
+
+    async def invalidate(self, chassis_address=None):
+        """
+        drop pooled sessions for one chassis, or for all chassis if no address is given
+        """
+        for key in list(self._sessions):
+            if chassis_address is None or key[0] == chassis_address:
+                await self._discard(key)
+        await self._close_retired()
+
+    def stats(self):
+        return dict(self._stats, size=len(self._sessions), retired=len(self._retired), idle_timeout=self.idle_timeout)
+
+    def _checkout(self, key):
+        session = self._sessions.get(key)
+        if session is not None:
+            self._last_used[key] = time.monotonic()
+            self._stats["hits"] += 1
+        return session
+
+    def _key_publisher(self, key):
+        """
+        on_reauthenticate coroutine replacing the cached API key of key
+        """
+        async def publish(api_key):
+            await asyncio.to_thread(self.key_cache.set, _api_key_cache_key(key), api_key, self.idle_timeout)
+        return publish
+
+    async def _evict_idle(self, now):
+        for key, last_used in list(self._last_used.items()):
+            last_used = max(last_used, getattr(self._sessions.get(key), 'last_used', last_used))
+            if now - last_used > self.idle_timeout and await self._discard(key):
+                self._stats["evictions"] += 1
+        await self._close_retired()
+
+    async def _discard(self, key):
+        session = self._sessions.pop(key, None)
+        self._last_used.pop(key, None)
+        if session is None:
+            return False
+        self._retired.append(session)
+        await self._close_retired()
+        return True
+
+    async def _close_retired(self):
+        retired, self._retired = self._retired, []
+        for session in retired:
+            if getattr(session, 'in_flight', 0) > 0:
+                self._retired.append(session)
+            else:
+                await session.aclose()
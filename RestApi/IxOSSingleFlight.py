@@ -0,0 +1,169 @@
+"""
+Request coalescing (single-flight) for IxOS GET requests.
+
+When several callers ask the same chassis for the same collection with the
+same query parameters at the same time, only the first request is sent; the
+other callers wait for it and share its response. Shared responses must be
+treated as read-only, since every caller gets the same decoded body.
+
+SingleFlight serves threads (IxRestSession), AsyncSingleFlight serves asyncio
+tasks (AsyncIxRestSession); both count how many calls were collapsed.
+"""
+
+import asyncio
+import threading
+
+
+def flight_key(chassis_ip, path, params=None):
+    """
+    hashable (chassis, resource path, params) key of a GET request
+    """
+    if params:
+        params = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    else:
+        params = None
+    return chassis_ip, path, params
+
+
+class _FlightStats(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+        self.errors = 0
+        self.collapsed_by_resource = {}
+
+    def record(self, key, leader):
+        self.calls += 1
+        if leader:
+            self.executions += 1
+        else:
+            self.collapsed += 1
+            resource = key[1]
+            self.collapsed_by_resource[resource] = self.collapsed_by_resource.get(resource, 0) + 1
+
+    def to_dict(self, in_flight):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "errors": self.errors,
+            "in_flight": in_flight,
+            "collapsed_by_resource": dict(self.collapsed_by_resource)
+        }
+
+
+class _Call(object):
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent identical calls made from different threads.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = _FlightStats()
+
+    def do(self, key, fn):
+        """
+        return fn(), or the result of the identical call already in flight;
+        an exception raised by the shared call is raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._stats.record(key, leader)
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self):
+        with self._lock:
+            return self._stats.to_dict(len(self._calls))
+
+
+class AsyncSingleFlight(object):
+    """
+    Coalesces concurrent identical calls made from tasks of the same event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = _FlightStats()
+
+    async def do(self, key, coro_fn):
+        """
+        return await coro_fn(), or the result of the identical call already in
+        flight on this event loop
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        future = self._calls.get(loop_key)
+        self._stats.record(key, future is None)
+        if future is not None:
+            try:
+                # shield so a cancelled waiter does not cancel the shared call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # the caller that sent the shared request was cancelled, send our own
+            return await self.do(key, coro_fn)
+
+        future = self._calls[loop_key] = loop.create_future()
+        # mark the exception as retrieved even if nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            self._stats.errors += 1
+            future.set_exception(e)
+            raise
+        finally:
+            del self._calls[loop_key]
+
+    def stats(self):
+        return self._stats.to_dict(len(self._calls))
+
+
+sync_flights = SingleFlight()
+async_flights = AsyncSingleFlight()
+
+
+def single_flight_stats():
+    """
+    collapsed call counters of the sync and async sessions
+    """
+    return {"sync": sync_flights.stats(), "async": async_flights.stats()}
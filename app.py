@@ -1,21 +1,54 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+# start of the startup profile, taken before the heavy imports below
+STARTUP_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi_mcp import FastApiMCP
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from RestApi.IxOSRestInterface import IxRestSession
+from RestApi.IxOSRestSessionPool import IxRestSessionPool, AsyncIxRestSessionPool
+from RestApi.IxOSAsyncOperations import get_default_scheduler
+from RestApi.IxOSPortIndex import port_index_stats
+from RestApi.IxOSSingleFlight import single_flight_stats
+from RestApi.IxOSRequestMetrics import request_metrics
+from RestApi.IxOSChassisHealth import chassis_health
+from RestApi.IxOSHostIdCache import host_id_cache
 import IxOSRestCallerModifier as ixOSRestCaller
+import IxOSAsyncRestCallerModifier as ixOSAsyncRestCaller
+import IxOSFleetCollector as fleetCollector
+import IxOSBulkPortOperations as bulkPortOperations
+from IxOSInventoryPoller import InventorySnapshotStore, InventoryPoller
+from IxOSInventoryTable import InventoryTable
+from IxOSInventoryQuery import InventoryQueryEngine, QUERY_RESOURCES
+from IxOSCacheBackend import make_cache_backend
+from IxOSMetricsHistory import MetricsHistoryStore
+from IxOSPortChangeFeed import PortChangeFeed
+from IxOSPortStats import PortStatsTracker, RATE_METRICS
+from IxOSCredentials import CredentialsProvider
 
 from datetime import datetime
+import asyncio
 import logging
 import json
 import os
-import requests
-import time
+import threading
 
 #Configure logging 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Startup profile: seconds after app.py started loading at which each phase
+# finished (imports, routes, mcp, startup, ready)
+startup_profile = {}
+
+def mark_startup(phase):
+    startup_profile[phase] = round(time.perf_counter() - STARTUP_STARTED, 4)
+
+mark_startup("imports")
+
 app = FastAPI(
     title="IxNetwork Inventory API",
     description="API for managing IxNetwork chassis inventory and metrics",
@@ -29,134 +62,265 @@ CREDENTIALS_SERVICE_URL = os.environ.get(
 )
 CREDENTIALS_SERVICE_TIMEOUT = int(os.environ.get("CREDENTIALS_SERVICE_TIMEOUT", "5"))
 
-# Credentials cache
-_credentials_cache = {
-    "data": None,
-    "timestamp": 0,
-    "ttl": 60  # Cache TTL in seconds
+# Lazy startup: credentials are loaded in the background once the server
+# accepts connections and /ready answers 503 until then; with false the server
+# only starts accepting connections after the first load
+LAZY_STARTUP = os.environ.get("IXOS_LAZY_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Cache of inventory snapshots and API keys: "memory" keeps them per process,
+# "sqlite" shares them through a local file with every worker using the same path;
+# opened on startup, see open_stores
+CACHE_BACKEND = os.environ.get("IXOS_CACHE_BACKEND", "memory")
+CACHE_PATH = os.environ.get("IXOS_CACHE_PATH", "ixos_cache.db")
+CACHE_MAX_ENTRIES = int(os.environ.get("IXOS_CACHE_MAX_ENTRIES", "4096"))
+cache_backend = None
+
+# Authenticated chassis sessions shared by all worker threads
+SESSION_IDLE_TIMEOUT = int(os.environ.get("IXOS_SESSION_IDLE_TIMEOUT", "300"))
+
+# Persistent HTTP transport settings for each chassis session
+HTTP_POOL_MAXSIZE = int(os.environ.get("IXOS_HTTP_POOL_MAXSIZE", "10"))
+HTTP_MAX_RETRIES = int(os.environ.get("IXOS_HTTP_MAX_RETRIES", "0"))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("IXOS_HTTP_BACKOFF_FACTOR", "0"))
+HTTP_KEEP_ALIVE = os.environ.get("IXOS_HTTP_KEEP_ALIVE", "true").lower() in ("1", "true", "yes")
+
+# Per-request timeouts: the read timeout adapts to the latency of each chassis
+# between the minimum and the maximum; GETs are retried with jittered backoff
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("IXOS_HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.environ.get("IXOS_HTTP_READ_TIMEOUT", "10"))
+HTTP_MIN_READ_TIMEOUT = float(os.environ.get("IXOS_HTTP_MIN_READ_TIMEOUT", "5"))
+HTTP_GET_RETRIES = int(os.environ.get("IXOS_HTTP_GET_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.environ.get("IXOS_HTTP_RETRY_BACKOFF", "0.2"))
+
+# Circuit breaker: chassis failing this many times in a row are failed fast
+# and probed in the background until they answer again
+chassis_health.configure(
+    failure_threshold=int(os.environ.get("IXOS_BREAKER_FAILURES", "5")),
+    open_seconds=float(os.environ.get("IXOS_BREAKER_OPEN_SECONDS", "15")),
+    max_open_seconds=float(os.environ.get("IXOS_BREAKER_MAX_OPEN_SECONDS", "300")),
+    probe_interval=float(os.environ.get("IXOS_BREAKER_PROBE_INTERVAL", "5")),
+    probe_timeout=HTTP_CONNECT_TIMEOUT
+)
+
+session_pool = IxRestSessionPool(
+    idle_timeout=SESSION_IDLE_TIMEOUT,
+    verbose=False,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    max_retries=HTTP_MAX_RETRIES,
+    backoff_factor=HTTP_BACKOFF_FACTOR,
+    keep_alive=HTTP_KEEP_ALIVE,
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=HTTP_READ_TIMEOUT,
+    min_read_timeout=HTTP_MIN_READ_TIMEOUT,
+    get_retries=HTTP_GET_RETRIES,
+    retry_backoff=HTTP_RETRY_BACKOFF
+)
+
+# Async sessions used by the read endpoints, so a slow chassis does not hold a
+# threadpool slot while its requests are in flight
+async_session_pool = AsyncIxRestSessionPool(
+    idle_timeout=SESSION_IDLE_TIMEOUT,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    max_retries=HTTP_MAX_RETRIES,
+    keep_alive=HTTP_KEEP_ALIVE,
+    request_timeout=HTTP_READ_TIMEOUT,
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    min_read_timeout=HTTP_MIN_READ_TIMEOUT,
+    get_retries=HTTP_GET_RETRIES,
+    retry_backoff=HTTP_RETRY_BACKOFF
+)
+
+# Fleet-wide inventory fan-out limits
+FLEET_MAX_CONCURRENCY = int(os.environ.get("IXOS_FLEET_MAX_CONCURRENCY", "16"))
+FLEET_CHASSIS_DEADLINE = float(os.environ.get("IXOS_FLEET_CHASSIS_DEADLINE", "30"))
+
+# Maximum number of REST calls in flight for bulk port operations
+BULK_PORT_MAX_CONCURRENCY = int(os.environ.get("IXOS_BULK_PORT_MAX_CONCURRENCY", "8"))
+
+# Background inventory poller; refresh interval in seconds per resource (0 disables)
+POLLER_ENABLED = os.environ.get("IXOS_POLLER_ENABLED", "true").lower() in ("1", "true", "yes")
+POLLER_MAX_CONCURRENCY = int(os.environ.get("IXOS_POLLER_MAX_CONCURRENCY", "16"))
+POLL_INTERVALS = {
+    "summary": float(os.environ.get("IXOS_POLL_INTERVAL_SUMMARY", "300")),
+    "cards": float(os.environ.get("IXOS_POLL_INTERVAL_CARDS", "300")),
+    "ports": float(os.environ.get("IXOS_POLL_INTERVAL_PORTS", "60")),
+    "sensors": float(os.environ.get("IXOS_POLL_INTERVAL_SENSORS", "60")),
+    "performance": float(os.environ.get("IXOS_POLL_INTERVAL_PERFORMANCE", "30")),
+    "portstats": float(os.environ.get("IXOS_POLL_INTERVAL_PORTSTATS", "30")),
+    # licenses rarely change; invalidate_license_cache refreshes them on demand
+    "licenses": float(os.environ.get("IXOS_POLL_INTERVAL_LICENSES", "86400")),
 }
 
-def fetch_credentials_from_service() -> Optional[Dict[str, Dict[str, str]]]:
-    """
-    Fetch credentials from the external credentials service.
-    
-    Returns:
-        Dict mapping IP addresses to credentials, or None if service unavailable
-    """
-    try:
-        logger.info(f"Fetching credentials from service: {CREDENTIALS_SERVICE_URL}")
-        response = requests.get(
-            CREDENTIALS_SERVICE_URL, 
-            timeout=CREDENTIALS_SERVICE_TIMEOUT
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Validate response structure
-        if not data.get("success") or "credentials" not in data:
-            logger.warning("Invalid response structure from credentials service")
-            return None
-        
-        # Transform the service response to our expected format
-        # From: {"credentials": [{"ip": "x.x.x.x", "username": "...", "password": "..."}]}
-        # To: {"x.x.x.x": {"username": "...", "password": "..."}}
-        credentials_dict = {}
-        for cred in data["credentials"]:
-            ip = cred.get("ip")
-            if ip:
-                credentials_dict[ip] = {
-                    "username": cred.get("username", ""),
-                    "password": cred.get("password", "")
-                }
-        
-        logger.info(f"Successfully fetched {len(credentials_dict)} credentials from service")
-        return credentials_dict
-        
-    except requests.exceptions.ConnectionError:
-        logger.warning(f"Credentials service not available at {CREDENTIALS_SERVICE_URL}")
-        return None
-    except requests.exceptions.Timeout:
-        logger.warning(f"Timeout connecting to credentials service")
-        return None
-    except requests.exceptions.RequestException as e:
-        logger.warning(f"Error fetching from credentials service: {str(e)}")
-        return None
-    except (json.JSONDecodeError, KeyError, TypeError) as e:
-        logger.warning(f"Error parsing credentials service response: {str(e)}")
-        return None
-
-def load_credentials_from_file() -> Dict[str, Dict[str, str]]:
-    """
-    Load credentials from the local config.json file.
-    
-    Returns:
-        Dict mapping IP addresses to credentials
-    """
-    config_path = "config.json"
-    try:
-        if not os.path.exists(config_path):
-            logger.warning(f"Config file {config_path} not found. Using empty credentials dictionary.")
-            return {}
-            
-        with open(config_path, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading credentials from file: {str(e)}")
-        return {}
+# Metrics history of polled performance and sensor readings (empty path disables);
+# retention in seconds per resolution
+HISTORY_PATH = os.environ.get("IXOS_HISTORY_PATH", "metrics_history.db")
+HISTORY_RETENTION = {
+    "raw": float(os.environ.get("IXOS_HISTORY_RETENTION_RAW", "86400")),
+    "1m": float(os.environ.get("IXOS_HISTORY_RETENTION_1M", "604800")),
+    "5m": float(os.environ.get("IXOS_HISTORY_RETENTION_5M", "2592000")),
+    "1h": float(os.environ.get("IXOS_HISTORY_RETENTION_1H", "31536000")),
+}
+
+# Number of port change events kept for /ports/changes cursors
+PORT_CHANGE_BUFFER = int(os.environ.get("IXOS_PORT_CHANGE_BUFFER", "10000"))
+
+# Chassis credentials from the credentials service, falling back to config.json;
+# stale credentials are served while they are refreshed in the background and
+# an unavailable service is retried with exponential backoff
+credentials_provider = CredentialsProvider(
+    CREDENTIALS_SERVICE_URL,
+    service_timeout=CREDENTIALS_SERVICE_TIMEOUT,
+    config_path="config.json",
+    ttl=float(os.environ.get("IXOS_CREDENTIALS_TTL", "60")),
+    outage_backoff=float(os.environ.get("IXOS_CREDENTIALS_OUTAGE_BACKOFF", "30")),
+    max_outage_backoff=float(os.environ.get("IXOS_CREDENTIALS_MAX_OUTAGE_BACKOFF", "600"))
+)
+# set once the first credentials load finished, see /ready
+credentials_ready = threading.Event()
 
 def load_credentials(force_refresh: bool = False) -> Dict[str, Dict[str, str]]:
     """
     Load chassis credentials with fallback logic:
-    1. Try to fetch from credentials service
-    2. Fall back to config.json if service is unavailable
+    1. Use the credentials service
+    2. Fall back to config.json while the service is unavailable
     
-    Uses caching to avoid hitting the service on every request.
+    Only the first call waits for the service; afterwards expired credentials
+    are refreshed in the background and served meanwhile.
     
     Args:
-        force_refresh: If True, bypass the cache and fetch fresh credentials
+        force_refresh: If True, wait for fresh credentials from the service
         
     Returns:
         Dict mapping IP addresses to credentials
     """
-    global _credentials_cache
+    return credentials_provider.get(force_refresh)
+
+class ChassisCredentials(BaseModel):
+    """
+    Pydantic model for chassis credentials
     
-    current_time = time.time()
+    max_age: Serve the background snapshot only if it is at most this many
+             seconds old, otherwise fetch live. None serves any snapshot,
+             0 always fetches live.
+    """
+    ip: str
+    max_age: Optional[float] = None
+
+class ChassisListingRequest(ChassisCredentials):
+    """
+    Pydantic model for per-row chassis listings (cards, ports, sensors, LLDP)
     
-    # Check if cache is valid
-    if not force_refresh and _credentials_cache["data"] is not None:
-        if current_time - _credentials_cache["timestamp"] < _credentials_cache["ttl"]:
-            logger.debug("Using cached credentials")
-            return _credentials_cache["data"]
+    stream: Return NDJSON, one record per line, with the per-chassis counters
+            sent once in a final trailer record instead of on every row.
+    fields: Keys to return for every record, None for all keys.
+    card_number, owner, link_state, speed: Only return matching records;
+            cards support card_number, ports and LLDP support all four,
+            sensors support none.
+    """
+    stream: bool = False
+    fields: Optional[List[str]] = None
+    card_number: Optional[int] = None
+    owner: Optional[str] = None
+    link_state: Optional[str] = None
+    speed: Optional[str] = None
+
+# request filter -> record key, per listing resource
+LISTING_FILTERS = {
+    "cards": {"card_number": "cardNumber"},
+    "ports": {"card_number": "cardNumber", "owner": "owner", "link_state": "linkState", "speed": "speed"},
+    "sensors": {},
+}
+
+class MetricHistoryRequest(BaseModel):
+    """
+    Pydantic model for metric history queries
     
-    # Try to fetch from service first
-    credentials = fetch_credentials_from_service()
+    metric: cpu_utilization, mem_utilization or sensor.<sensor name>
+    window: How many seconds back from now to return
+    resolution: raw, 1m, 5m or 1h; None picks one from the window
+    """
+    ip: str
+    metric: str = "cpu_utilization"
+    window: float = 21600
+    resolution: Optional[str] = None
+
+class PortChangesRequest(BaseModel):
+    """
+    Pydantic model for port change feed requests
     
-    if credentials is not None:
-        # Update cache with service credentials
-        _credentials_cache["data"] = credentials
-        _credentials_cache["timestamp"] = current_time
-        return credentials
+    since: Cursor returned by the previous call, 0 for every buffered change
+    """
+    ip: Optional[str] = None
+    since: int = 0
+    limit: int = 1000
+
+class TopPortsRequest(BaseModel):
+    """
+    Pydantic model for top-N port rate queries
     
-    # Fall back to file-based credentials
-    logger.info("Falling back to config.json for credentials")
-    file_credentials = load_credentials_from_file()
+    metric: bytes, frames, crcErrors or a single counter such as bytesReceived
+    smallest: Rank the lowest rates instead of the highest
+    """
+    metric: str = "bytes"
+    n: int = 10
+    ip: Optional[str] = None
+    smallest: bool = False
+
+class InventoryQueryRequest(BaseModel):
+    """
+    Pydantic model for fleet-wide inventory queries
     
-    # Cache the file credentials too (but with a shorter effective cache 
-    # since we want to retry the service)
-    _credentials_cache["data"] = file_credentials
-    _credentials_cache["timestamp"] = current_time - (_credentials_cache["ttl"] / 2)  # Retry service sooner
+    resource: ports, cards or licenses
+    where: Field -> value conditions, matched case-insensitively, e.g.
+           {"owner": "Free", "speed": "100000"}; indexed fields are owner,
+           speed, linkState, cardNumber, lldpSystemName (ports), cardType,
+           cardState, cardNumber (cards), partNumber, isExpired (licenses)
+    ip: Optional chassis to query, all chassis by default
+    fields: Keys to return per record, None for all keys
+    """
+    resource: str = "ports"
+    where: Optional[Dict[str, Any]] = None
+    ip: Optional[str] = None
+    fields: Optional[List[str]] = None
+    limit: int = 100
+
+class InventoryAggregateRequest(BaseModel):
+    """
+    Pydantic model for fleet-wide inventory counts
     
-    return file_credentials
+    group_by: Record field to count by, e.g. chassisIp, speed, owner or cardType
+    """
+    resource: str = "ports"
+    where: Optional[Dict[str, Any]] = None
+    group_by: str = "chassisIp"
+    ip: Optional[str] = None
 
-# Initial load of credentials
-CHASSIS_CREDENTIALS = load_credentials()
+class LldpNeighborRequest(BaseModel):
+    """
+    Pydantic model for LLDP neighbor searches
+    
+    exact: Match the whole system name instead of a substring
+    """
+    system_name: str
+    exact: bool = False
 
-class ChassisCredentials(BaseModel):
+class ExpiringLicensesRequest(BaseModel):
     """
-    Pydantic model for chassis credentials
+    Pydantic model for expiring license queries
+    
+    within_days: 0 for licenses already expired or expiring today
     """
-    ip: str
+    within_days: int = 0
+    ip: Optional[str] = None
+    part_number: Optional[str] = None
+
+class LicenseInvalidateRequest(BaseModel):
+    """
+    Pydantic model for license cache invalidation
+    
+    ip: Chassis to invalidate, None for every configured chassis
+    """
+    ip: Optional[str] = None
 
 class PortOperationCredentials(BaseModel):
     """
@@ -166,6 +330,44 @@ class PortOperationCredentials(BaseModel):
     card_number: int
     port_number: int
 
+class BulkPortOperationRequest(BaseModel):
+    """
+    Pydantic model for bulk port operation requests
+    """
+    ports: List[PortOperationCredentials]
+    max_concurrency: int = BULK_PORT_MAX_CONCURRENCY
+
+class OperationWaitRequest(BaseModel):
+    """
+    Pydantic model for waiting on an async chassis operation
+    """
+    timeout: float = 30
+
+class FleetInventoryRequest(BaseModel):
+    """
+    Pydantic model for fleet-wide inventory requests
+    """
+    resources: List[str] = ["summary", "cards", "ports"]
+    max_concurrency: int = FLEET_MAX_CONCURRENCY
+    chassis_deadline: float = FLEET_CHASSIS_DEADLINE
+    stream: bool = False
+
+class ChassisFullRequest(ChassisCredentials):
+    """
+    Pydantic model for the composite chassis document
+    
+    sections: Sections to return, any of summary, cards, ports, sensors, performance
+    """
+    sections: List[str] = list(ixOSAsyncRestCaller.FULL_SECTIONS)
+
+class LicenseHostIdsRequest(BaseModel):
+    """
+    Pydantic model for fleet-wide license server host ID requests
+    """
+    refresh: bool = False
+    max_concurrency: int = FLEET_MAX_CONCURRENCY
+    chassis_deadline: float = FLEET_CHASSIS_DEADLINE
+
 def get_chassis_auth(ip):
     """
     Get authentication details for a chassis from config file
@@ -179,26 +381,177 @@ def get_chassis_auth(ip):
         "password": chassis_creds[ip]["password"]
     }
 
+def get_chassis_session(ip):
+    """
+    Get an authenticated REST session for a chassis from the session pool.
+    The API key is reused across calls and refreshed automatically on 401.
+    """
+    auth = get_chassis_auth(ip)
+    return session_pool.get_session(ip, auth["username"], auth["password"])
+
+async def get_async_chassis_session(ip):
+    """
+    Get an opened async REST session for a chassis from the async session pool.
+    """
+    auth = await run_in_threadpool(get_chassis_auth, ip)
+    return await async_session_pool.get_session(ip, auth["username"], auth["password"])
+
+inventory_store = InventorySnapshotStore()
+inventory_poller = InventoryPoller(
+    inventory_store,
+    get_async_chassis_session,
+    lambda: list(load_credentials().keys()),
+    POLL_INTERVALS,
+    max_concurrency=POLLER_MAX_CONCURRENCY
+)
+
+# opened on startup, see open_stores
+metrics_history = None
+
+port_change_feed = PortChangeFeed(max_events=PORT_CHANGE_BUFFER)
+inventory_store.add_listener(port_change_feed.update)
+inventory_store.add_removal_listener(port_change_feed.forget)
+
+port_stats_tracker = PortStatsTracker()
+inventory_store.add_listener(port_stats_tracker.update)
+inventory_store.add_removal_listener(port_stats_tracker.forget)
+
+inventory_query = InventoryQueryEngine()
+inventory_store.add_listener(inventory_query.update)
+inventory_store.add_removal_listener(inventory_query.forget)
+
+async def read_inventory(ip, resource, max_age=None, response=None, params=None):
+    """
+    Read a chassis resource from the background snapshot, falling back to a
+    live fetch if there is no snapshot yet or it is older than max_age.
+    
+    Args:
+        ip: IP address of the chassis
+        resource: One of summary, cards, ports, sensors, performance
+        max_age: Maximum acceptable snapshot age in seconds, None for any age
+        response: Optional response on which the X-Snapshot-Age header is set
+        params: Optional IxOS query filters for a live fetch; the filtered
+                listing is returned but not stored as the snapshot
+    
+    Returns:
+        The collected data; card, port and sensor listings read from a
+        snapshot are InventoryTables, see read_listing
+    """
+    snapshot = await inventory_poller.snapshot(ip, resource)
+    if snapshot is not None and (max_age is None or snapshot.age() <= max_age):
+        if response is not None:
+            response.headers["X-Snapshot-Age"] = "%.3f" % snapshot.age()
+        return snapshot.data
+    if response is not None:
+        response.headers["X-Snapshot-Age"] = "0"
+    if params:
+        return await inventory_poller.fetch(ip, resource, params)
+    return await inventory_poller.refresh(ip, resource)
+
+async def read_listing(request, resource, response=None, project=True):
+    """
+    Read a cards/ports/sensors listing with the filters and field projection
+    of a ChassisListingRequest applied.
+    
+    card_number is sent to the chassis as a cardNumber query parameter when
+    the listing has to be fetched live; the remaining filters and, unless
+    project is False, the projection are applied in a single pass over the
+    records.
+    """
+    supported = LISTING_FILTERS[resource]
+    unsupported = [
+        name for name in LISTING_FILTERS["ports"]
+        if name not in supported and getattr(request, name) is not None
+    ]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Filters {unsupported} are not supported for {resource}")
+    
+    params = {"cardNumber": request.card_number} if "card_number" in supported and request.card_number is not None else None
+    records = await read_inventory(request.ip, resource, request.max_age, response, params)
+    match = {key: getattr(request, name) for name, key in supported.items()}
+    fields = request.fields if project else None
+    if isinstance(records, InventoryTable):
+        # snapshot: only the selected records are rebuilt as dicts
+        return records.filter(match, fields)
+    return ixOSRestCaller.filter_records(records, match, fields)
+
+def stale_after(resource):
+    """
+    Age in seconds after which data of a polled resource is left out of
+    fleet-wide answers (unreachable chassis), None if the resource
+    is not polled.
+    """
+    interval = POLL_INTERVALS.get(resource, 0)
+    return 3 * interval if POLLER_ENABLED and interval > 0 else None
+
+def ndjson_response(records):
+    """
+    Stream records as NDJSON, serializing one record at a time.
+    """
+    return StreamingResponse(
+        (json.dumps(record) + "\n" for record in records),
+        media_type="application/x-ndjson"
+    )
+
+async def load_initial_credentials():
+    """
+    First credentials load after startup; marks the app ready when done.
+    """
+    started = time.perf_counter()
+    credentials = await run_in_threadpool(load_credentials)
+    startup_profile["credentials_seconds"] = round(time.perf_counter() - started, 4)
+    startup_profile["chassis_count"] = len(credentials)
+    mark_startup("ready")
+    credentials_ready.set()
+    logger.info(f"Ready, startup profile: {startup_profile}")
+
+@app.on_event("startup")
+async def open_stores():
+    """
+    Open the cache backend and the metrics history store; they create files
+    and a writer thread, so this is left to startup rather than import.
+    """
+    global cache_backend, metrics_history
+    cache_backend = make_cache_backend(CACHE_BACKEND, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES)
+    session_pool.key_cache = cache_backend
+    async_session_pool.key_cache = cache_backend
+    inventory_store.use_backend(cache_backend)
+    if HISTORY_PATH:
+        metrics_history = MetricsHistoryStore(HISTORY_PATH, retention=HISTORY_RETENTION)
+        inventory_store.add_listener(metrics_history.record)
+
+@app.on_event("startup")
+async def start_credentials_load():
+    mark_startup("startup")
+    if LAZY_STARTUP:
+        # keep a reference so the task is not garbage collected
+        app.state.credentials_load = asyncio.ensure_future(load_initial_credentials())
+    else:
+        await load_initial_credentials()
+
+@app.on_event("startup")
+async def start_inventory_poller():
+    if POLLER_ENABLED:
+        inventory_poller.start()
+
+@app.on_event("shutdown")
+async def stop_inventory_poller():
+    await inventory_poller.stop()
+    if metrics_history is not None:
+        await asyncio.to_thread(metrics_history.flush, 5)
+
 @app.post("/chassis/summary", operation_id="get_chassis_summary")
-def get_chassis_summary(credentials: ChassisCredentials) -> Dict[str, Any]:
+async def get_chassis_summary(credentials: ChassisCredentials, response: Response) -> Dict[str, Any]:
     """
     Get chassis summary information including hardware details and system metrics.
     
     Args:
         credentials (ChassisCredentials): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip, 
-            auth["username"], 
-            auth["password"], 
-            verbose=False
-        )
-        chassis_info = ixOSRestCaller.get_chassis_information(session)
-        chassis_info["chassisIp"] = credentials.ip
-        return chassis_info
+        return await read_inventory(credentials.ip, "summary", credentials.max_age, response)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -220,27 +573,23 @@ def get_chassis_summary(credentials: ChassisCredentials) -> Dict[str, Any]:
         }
 
 @app.post("/chassis/cards", operation_id="get_chassis_cards")
-def get_chassis_cards(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
+async def get_chassis_cards(credentials: ChassisListingRequest, response: Response) -> List[Dict[str, Any]]:
     """
     Get information about all cards in the chassis.
     
     Args:
-        credentials (ChassisCredentials): Chassis connection credentials in request body
+        credentials (ChassisListingRequest): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
+            - fields: Optional list of keys to return per card
+            - card_number: Optional card filter
+            - stream: If True, stream NDJSON card records and a trailer
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
-        return ixOSRestCaller.get_chassis_cards_information(
-            session, 
-            credentials.ip,
-            ""
-        )
+        cards = await read_listing(credentials, "cards", response)
+        if credentials.stream:
+            return ndjson_response(ixOSRestCaller.split_summary(cards, ixOSRestCaller.CARD_SUMMARY_KEYS))
+        return cards
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -257,28 +606,24 @@ def get_chassis_cards(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
         }]
 
 @app.post("/chassis/ports", operation_id="get_chassis_ports")
-def get_chassis_ports(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
+async def get_chassis_ports(credentials: ChassisListingRequest, response: Response) -> List[Dict[str, Any]]:
     """
     Get information about all ports in the chassis.
     
     Args:
-        credentials (ChassisCredentials): Chassis connection credentials in request body
+        credentials (ChassisListingRequest): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
+            - fields: Optional list of keys to return per port
+            - card_number, owner, link_state, speed: Optional port filters
+            - stream: If True, stream NDJSON port records and a trailer with
+              totalPorts/ownedPorts/freePorts
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
-        logger.info(f"Getting chassis ports for {credentials}")
-        return ixOSRestCaller.get_chassis_ports_information(
-            session,
-            credentials.ip,
-            ""
-        )
+        ports = await read_listing(credentials, "ports", response)
+        if credentials.stream:
+            return ndjson_response(ixOSRestCaller.split_summary(ports, ixOSRestCaller.PORT_SUMMARY_KEYS))
+        return ports
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -299,27 +644,17 @@ def get_chassis_ports(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
         }]
 
 @app.post("/chassis/licensing", operation_id="get_chassis_licensing")
-def get_chassis_licensing(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
+async def get_chassis_licensing(credentials: ChassisCredentials, response: Response) -> List[Dict[str, Any]]:
     """
     Get chassis licensing information.
     
     Args:
         credentials (ChassisCredentials): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
-        return ixOSRestCaller.get_license_activation(
-            session,
-            credentials.ip,
-            ""  # Chassis type will be determined by the caller
-        )
+        return await read_inventory(credentials.ip, "licenses", credentials.max_age, response)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -339,27 +674,22 @@ def get_chassis_licensing(credentials: ChassisCredentials) -> List[Dict[str, Any
         }]
 
 @app.post("/chassis/sensors", operation_id="get_chassis_sensors")
-def get_chassis_sensors(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
+async def get_chassis_sensors(credentials: ChassisListingRequest, response: Response) -> List[Dict[str, Any]]:
     """
     Get chassis sensor information.
     
     Args:
-        credentials (ChassisCredentials): Chassis connection credentials in request body
+        credentials (ChassisListingRequest): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
+            - fields: Optional list of keys to return per sensor
+            - stream: If True, stream NDJSON sensor records and a trailer
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
-        return ixOSRestCaller.get_sensor_information(
-            session,
-            credentials.ip,
-            ""  # Chassis type will be determined by the caller
-        )
+        sensors = await read_listing(credentials, "sensors", response)
+        if credentials.stream:
+            return ndjson_response(ixOSRestCaller.split_summary(sensors, ixOSRestCaller.SENSOR_SUMMARY_KEYS))
+        return sensors
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -375,23 +705,17 @@ def get_chassis_sensors(credentials: ChassisCredentials) -> List[Dict[str, Any]]
         }]
 
 @app.post("/chassis/performance", operation_id="get_chassis_performance")
-def get_chassis_performance(credentials: ChassisCredentials) -> Dict[str, Any]:
+async def get_chassis_performance(credentials: ChassisCredentials, response: Response) -> Dict[str, Any]:
     """
     Get chassis performance metrics.
     
     Args:
         credentials (ChassisCredentials): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
-        return ixOSRestCaller.get_perf_metrics(session, credentials.ip)
+        return await read_inventory(credentials.ip, "performance", credentials.max_age, response)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -403,6 +727,135 @@ def get_chassis_performance(credentials: ChassisCredentials) -> Dict[str, Any]:
             'lastUpdatedAt_UTC': datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
         }
 
+@app.post("/chassis/full", operation_id="get_chassis_full")
+async def get_chassis_full(request: ChassisFullRequest) -> Dict[str, Any]:
+    """
+    Describe a chassis in one call: summary, cards, ports, sensors and performance.
+    
+    Sections with a background snapshot no older than max_age are answered
+    from it. The others are fetched live in one round over a single session,
+    each distinct IxOS resource once and all at the same time, and stored as
+    the new snapshots.
+    
+    Args:
+        request (ChassisFullRequest): Chassis request in request body
+            - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
+            - sections: Optional subset of summary, cards, ports, sensors, performance
+        
+    Returns:
+        Dict containing chassisIp, one key per section holding the same data
+        as its own endpoint, "errors" for every section that failed and
+        "timing" with the source (snapshot or live), snapshot age or fetch
+        and processing seconds of every section and the total seconds
+    """
+    started = time.perf_counter()
+    unknown = [s for s in request.sections if s not in ixOSAsyncRestCaller.FULL_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections {unknown}; expected any of {list(ixOSAsyncRestCaller.FULL_SECTIONS)}"
+        )
+    await run_in_threadpool(get_chassis_auth, request.ip)
+    
+    document = {"chassisIp": request.ip}
+    errors = {}
+    timing = {}
+    live = []
+    for section in request.sections:
+        snapshot = await inventory_poller.snapshot(request.ip, section)
+        if snapshot is not None and (request.max_age is None or snapshot.age() <= request.max_age):
+            document[section] = snapshot.data.filter() if isinstance(snapshot.data, InventoryTable) else snapshot.data
+            timing[section] = {"source": "snapshot", "age_seconds": round(snapshot.age(), 3)}
+        else:
+            live.append(section)
+    
+    if live:
+        summary = await inventory_poller.snapshot(request.ip, "summary")
+        chassis_type = summary.data.get("chassisType", "") if summary is not None else ""
+        try:
+            session = await get_async_chassis_session(request.ip)
+            collected = await ixOSAsyncRestCaller.get_chassis_full(session, request.ip, chassis_type, live)
+        except Exception as e:
+            logger.error(f"Error getting chassis {request.ip}: {str(e)}")
+            collected = {"sections": {}, "errors": {section: str(e) for section in live}, "timing": {"sections": {}}}
+        for section in live:
+            if section in collected["sections"]:
+                document[section] = collected["sections"][section]
+                await inventory_poller.put_snapshot(request.ip, section, document[section])
+            timing[section] = dict(collected["timing"]["sections"].get(section, {}), source="live")
+        errors.update(collected["errors"])
+    
+    document["errors"] = errors
+    document["timing"] = {"sections": timing, "total_seconds": round(time.perf_counter() - started, 4)}
+    return document
+
+@app.post("/chassis/port_rates", operation_id="get_port_rates")
+async def get_port_rates(credentials: ChassisCredentials) -> Dict[str, Any]:
+    """
+    Get per-second frame, byte and CRC error rates of every port of a chassis.
+    
+    Rates come from the two latest /portstats samples of the background
+    poller; if there are none yet, the chassis is sampled twice, one second apart.
+    
+    Args:
+        credentials (ChassisCredentials): Chassis connection credentials in request body
+            - ip: IP address of the chassis
+    
+    Returns:
+        Dict containing intervalSeconds, sampledAt_UTC and per port the
+        <metric>PerSec rates; a rate is None when it cannot be computed
+    """
+    try:
+        for attempt in range(2):
+            if port_stats_tracker.sample_count(credentials.ip) >= 2:
+                break
+            if attempt:
+                await asyncio.sleep(1)
+            await inventory_poller.refresh(credentials.ip, "portstats")
+        return port_stats_tracker.rates(credentials.ip) or {"chassisIp": credentials.ip, "ports": []}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error getting port rates: {str(e)}")
+        return {
+            "chassisIp": credentials.ip,
+            "intervalSeconds": "NA",
+            "ports": [],
+            "lastUpdatedAt_UTC": datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+        }
+
+@app.post("/ports/top", operation_id="get_top_ports")
+def get_top_ports(request: Optional[TopPortsRequest] = None) -> List[Dict[str, Any]]:
+    """
+    Get the ports with the highest rate of a metric across all chassis, e.g.
+    the busiest ports (bytes) or the ports with rising CRC errors (crcErrors).
+    
+    Answered from the background port statistics samples; chassis whose
+    samples are stale are left out.
+    
+    Args:
+        request (TopPortsRequest): Optional ranking request in request body
+            - metric: bytes, frames, crcErrors, framesSent, framesReceived,
+              bytesSent or bytesReceived
+            - n: Number of ports returned
+            - ip: Optional chassis IP to rank the ports of
+            - smallest: Return the lowest rates instead
+    
+    Returns:
+        List of chassisIp, fullyQualifiedPortName and <metric>PerSec entries
+    """
+    request = request or TopPortsRequest()
+    if request.metric not in RATE_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric {request.metric}; expected any of {list(RATE_METRICS)}")
+    return port_stats_tracker.top(
+        request.metric,
+        request.n,
+        chassis_ip=request.ip,
+        smallest=request.smallest,
+        max_age=stale_after("portstats")
+    )
+
 @app.get("/chassis/list", operation_id="get_chassis_list")
 def get_chassis_list() -> List[str]:
     """
@@ -417,39 +870,134 @@ def get_chassis_list() -> List[str]:
         logger.error(f"Error getting chassis list: {str(e)}")
         return []
 
+@app.post("/fleet/inventory", operation_id="get_fleet_inventory")
+def get_fleet_inventory(request: Optional[FleetInventoryRequest] = None) -> Dict[str, Any]:
+    """
+    Get inventory from every configured chassis in a single call.
+    
+    All chassis are queried concurrently; a chassis that does not answer within
+    the deadline is reported as "Timed Out" instead of blocking the others.
+    
+    Args:
+        request (FleetInventoryRequest): Optional fleet request in request body
+            - resources: Any of summary, cards, ports, sensors, performance, license_host_ids
+            - max_concurrency: Maximum number of chassis queried at the same time
+            - chassis_deadline: Seconds allowed per chassis
+            - stream: If True, stream one NDJSON record per chassis as it completes
+        
+    Returns:
+        Dict containing one record per chassis and status counts
+    """
+    request = request or FleetInventoryRequest()
+    unknown = [r for r in request.resources if r not in fleetCollector.FLEET_RESOURCES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown resources {unknown}; expected any of {list(fleetCollector.FLEET_RESOURCES)}"
+        )
+    
+    records = fleetCollector.iter_fleet_inventory(
+        list(load_credentials().keys()),
+        get_chassis_session,
+        resources=request.resources,
+        max_workers=request.max_concurrency,
+        chassis_deadline=request.chassis_deadline
+    )
+    
+    if request.stream:
+        return ndjson_response(records)
+    
+    chassis = list(records)
+    status_counts = {}
+    for record in chassis:
+        status_counts[record["status"]] = status_counts.get(record["status"], 0) + 1
+    return {
+        "chassis": chassis,
+        "chassisCount": len(chassis),
+        "statusCounts": status_counts,
+        "lastUpdatedAt_UTC": datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+    }
+
+@app.post("/fleet/license_host_ids", operation_id="get_fleet_license_host_ids")
+def get_fleet_license_host_ids(request: Optional[LicenseHostIdsRequest] = None) -> Dict[str, Any]:
+    """
+    Get the license server host IDs of every configured chassis in a single call.
+    
+    Host IDs do not change, so they are retrieved once per chassis and then
+    answered from the cache; the retrievehostid operations of all license
+    servers of a chassis run at the same time.
+    
+    Args:
+        request (LicenseHostIdsRequest): Optional request body
+            - refresh: If True, retrieve the host IDs again instead of using the cache
+            - max_concurrency: Maximum number of chassis queried at the same time
+            - chassis_deadline: Seconds allowed per chassis
+        
+    Returns:
+        Dict containing one record per chassis with its hostId ("::" joined),
+        licenseServers and status
+    """
+    request = request or LicenseHostIdsRequest()
+    chassis_ips = list(load_credentials().keys())
+    if request.refresh:
+        for ip in chassis_ips:
+            host_id_cache.invalidate(ip)
+    
+    chassis = []
+    for record in fleetCollector.iter_fleet_inventory(
+        chassis_ips,
+        get_chassis_session,
+        resources=["license_host_ids"],
+        max_workers=request.max_concurrency,
+        chassis_deadline=request.chassis_deadline
+    ):
+        host_ids = record.get("license_host_ids", {})
+        chassis.append({
+            "chassisIp": record["chassisIp"],
+            "status": record["status"] if record["status"] != "partial" else "Failed",
+            "hostId": host_ids.get("hostId"),
+            "licenseServers": host_ids.get("licenseServers", []),
+            "elapsedSeconds": record["elapsedSeconds"],
+            "errors": record.get("errors", {})
+        })
+    return {
+        "chassis": sorted(chassis, key=lambda record: record["chassisIp"]),
+        "chassisCount": len(chassis),
+        "lastUpdatedAt_UTC": datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+    }
+
 @app.post("/chassis/lldp", operation_id="get_lldp_peer_data")
-def get_lldp_peer_data(credentials: ChassisCredentials) -> List[Dict[str, Any]]:
+async def get_lldp_peer_data(credentials: ChassisListingRequest, response: Response) -> List[Dict[str, Any]]:
     """
     Get LLDP peer data for each port on the chassis
     
     Args:
-        credentials (ChassisCredentials): Chassis connection credentials in request body
+        credentials (ChassisListingRequest): Chassis connection credentials in request body
             - ip: IP address of the chassis
+            - max_age: Optional maximum snapshot age in seconds (0 fetches live)
+            - fields: Optional list of keys to return per peer
+            - card_number, owner, link_state, speed: Optional filters on the local port
+            - stream: If True, stream NDJSON peer records and a trailer
         
     Returns:
         list: List of dictionaries containing LLDP peer data
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
         logger.info(f"Getting LLDP peer data for {credentials.ip}")
-        chassis_ports = ixOSRestCaller.get_chassis_ports_information(
-            session,
-            credentials.ip,
-            ""
+        # the projection applies to the peer records, not to the ports
+        chassis_ports = await read_listing(credentials, "ports", response, project=False)
+        # copy so the shared port snapshot is left untouched
+        lldp_peer_data = (
+            dict(port["lldpPeerData"], portName=port.get("fullyQualifiedPortName", port.get("portNumber")))
+            for port in chassis_ports if port.get("lldpPeerData")
         )
-        lldp_peer_data = []
-        for port in chassis_ports:
-            port_name = port.get("fullyQualifiedPortName", port.get("portNumber"))
-            if port.get("lldpPeerData"):
-                port["lldpPeerData"].update({"portName": port_name})
-                lldp_peer_data.append(port["lldpPeerData"])
-        return lldp_peer_data
+        if credentials.fields:
+            lldp_peer_data = ({k: peer[k] for k in credentials.fields if k in peer} for peer in lldp_peer_data)
+        if credentials.stream:
+            return ndjson_response(ixOSRestCaller.split_summary(
+                lldp_peer_data, (), chassisIp=credentials.ip,
+                lastUpdatedAt_UTC=datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")))
+        return list(lldp_peer_data)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -469,6 +1017,9 @@ def get_port_id(session, card_number: int, port_number: int) -> int:
     """
     Helper function to get the internal port ID from card and port numbers.
     
+    The ID comes from the session's cached port index, so the chassis is only
+    queried when the index is empty or was invalidated.
+    
     Args:
         session: IxRestSession object
         card_number: Card number on the chassis
@@ -480,13 +1031,13 @@ def get_port_id(session, card_number: int, port_number: int) -> int:
     Raises:
         HTTPException: If port is not found
     """
-    ports = session.get_ports(params={'cardNumber': card_number, 'portNumber': port_number}).data
-    if not ports:
+    port_id = session.get_port_id(card_number, port_number)
+    if port_id is None:
         raise HTTPException(
             status_code=404, 
             detail=f"Port {card_number}/{port_number} not found on chassis"
         )
-    return ports[0]['id']
+    return port_id
 
 @app.post("/chassis/take_port_ownership", operation_id="take_port_ownership")
 def take_port_ownership(credentials: PortOperationCredentials) -> Dict[str, Any]:
@@ -505,13 +1056,7 @@ def take_port_ownership(credentials: PortOperationCredentials) -> Dict[str, Any]
         Dict containing success status and response data
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
+        session = get_chassis_session(credentials.ip)
         
         # Look up the port ID using card and port numbers
         port_id = get_port_id(session, credentials.card_number, credentials.port_number)
@@ -558,13 +1103,7 @@ def release_port_ownership(credentials: PortOperationCredentials) -> Dict[str, A
         Dict containing success status and response data
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
+        session = get_chassis_session(credentials.ip)
         
         # Look up the port ID using card and port numbers
         port_id = get_port_id(session, credentials.card_number, credentials.port_number)
@@ -611,13 +1150,7 @@ def reboot_port(credentials: PortOperationCredentials) -> Dict[str, Any]:
         Dict containing success status and response data
     """
     try:
-        auth = get_chassis_auth(credentials.ip)
-        session = IxRestSession(
-            credentials.ip,
-            auth["username"],
-            auth["password"],
-            verbose=False
-        )
+        session = get_chassis_session(credentials.ip)
         
         # Look up the port ID using card and port numbers
         port_id = get_port_id(session, credentials.card_number, credentials.port_number)
@@ -647,6 +1180,221 @@ def reboot_port(credentials: PortOperationCredentials) -> Dict[str, Any]:
             "lastUpdatedAt_UTC": datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
         }
 
+def bulk_port_operation(request: BulkPortOperationRequest, operation: str) -> Dict[str, Any]:
+    """
+    Run one port operation on every port of a bulk request and summarize the outcome.
+    """
+    logger.info(f"Running {operation} on {len(request.ports)} ports")
+    results = bulkPortOperations.run_bulk_port_operation(
+        [(port.ip, port.card_number, port.port_number) for port in request.ports],
+        operation,
+        get_chassis_session,
+        # the request may lower the server's limit, never raise it
+        max_concurrency=min(request.max_concurrency, BULK_PORT_MAX_CONCURRENCY)
+    )
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "success": succeeded == len(results),
+        "operation": operation,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+        "lastUpdatedAt_UTC": datetime.utcnow().strftime("%m/%d/%Y, %H:%M:%S")
+    }
+
+@app.post("/chassis/bulk/take_port_ownership", operation_id="take_ports_ownership")
+def take_ports_ownership(request: BulkPortOperationRequest) -> Dict[str, Any]:
+    """
+    Take ownership of many ports, possibly across several chassis, in one call.
+    
+    Note: This operation is only supported on Linux-based chassis.
+    
+    Args:
+        request (BulkPortOperationRequest): Bulk port request in request body
+            - ports: List of {ip, card_number, port_number}
+            - max_concurrency: Maximum number of REST calls in flight
+        
+    Returns:
+        Dict containing overall success, counts and a result per port
+    """
+    return bulk_port_operation(request, "take_ownership")
+
+@app.post("/chassis/bulk/release_port_ownership", operation_id="release_ports_ownership")
+def release_ports_ownership(request: BulkPortOperationRequest) -> Dict[str, Any]:
+    """
+    Release ownership of many ports, possibly across several chassis, in one call.
+    
+    Note: This operation is only supported on Linux-based chassis.
+    
+    Args:
+        request (BulkPortOperationRequest): Bulk port request in request body
+            - ports: List of {ip, card_number, port_number}
+            - max_concurrency: Maximum number of REST calls in flight
+        
+    Returns:
+        Dict containing overall success, counts and a result per port
+    """
+    return bulk_port_operation(request, "release_ownership")
+
+@app.post("/chassis/bulk/reboot_port", operation_id="reboot_ports")
+def reboot_ports(request: BulkPortOperationRequest) -> Dict[str, Any]:
+    """
+    Reboot many ports, possibly across several chassis, in one call.
+    
+    Note: This operation is only supported on Linux-based chassis.
+    
+    Args:
+        request (BulkPortOperationRequest): Bulk port request in request body
+            - ports: List of {ip, card_number, port_number}
+            - max_concurrency: Maximum number of REST calls in flight
+        
+    Returns:
+        Dict containing overall success, counts and a result per port
+    """
+    return bulk_port_operation(request, "reboot")
+
+def operation_or_404(operation_id: str):
+    """
+    Look up an async operation handle by id.
+    """
+    operation = get_default_scheduler().get(operation_id)
+    if operation is None:
+        raise HTTPException(status_code=404, detail=f"Operation {operation_id} not found")
+    return operation
+
+@app.post("/operations/collect_logs", operation_id="start_collect_chassis_logs")
+def start_collect_chassis_logs(credentials: ChassisCredentials) -> Dict[str, Any]:
+    """
+    Start collecting chassis logs and return an operation handle right away.
+    
+    Poll the handle with get_operation_status or wait_for_operation; on success
+    the result is the URL of the collected log bundle.
+    
+    Args:
+        credentials (ChassisCredentials): Chassis connection credentials in request body
+            - ip: IP address of the chassis
+        
+    Returns:
+        Dict describing the operation, including its operationId and state
+    """
+    try:
+        session = get_chassis_session(credentials.ip)
+        return session.collect_chassis_logs(wait=False).to_dict()
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error starting log collection: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Error starting log collection on {credentials.ip}: {str(e)}")
+
+@app.post("/operations/license_activation", operation_id="start_license_retrieval")
+def start_license_retrieval(credentials: ChassisCredentials) -> Dict[str, Any]:
+    """
+    Start retrieving license information and return an operation handle right away.
+    
+    On success the operation result is the list of license records, as
+    returned by get_chassis_licensing, and it replaces the cached licenses
+    of the chassis.
+    
+    Args:
+        credentials (ChassisCredentials): Chassis connection credentials in request body
+            - ip: IP address of the chassis
+        
+    Returns:
+        Dict describing the operation, including its operationId and state
+    """
+    try:
+        session = get_chassis_session(credentials.ip)
+        operation = ixOSRestCaller.start_license_activation(
+            session, credentials.ip, inventory_store.chassis_type(credentials.ip))
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error starting license retrieval: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Error starting license retrieval on {credentials.ip}: {str(e)}")
+    
+    def cache_licenses(done):
+        if done.state == 'SUCCESS':
+            inventory_store.put(credentials.ip, "licenses", done.result)
+    operation.add_done_callback(cache_licenses)
+    return operation.to_dict()
+
+@app.post("/chassis/licensing/invalidate", operation_id="invalidate_license_cache")
+async def invalidate_license_cache(request: Optional[LicenseInvalidateRequest] = None) -> Dict[str, Any]:
+    """
+    Drop the cached licenses of one or every chassis and retrieve them again
+    in the background, e.g. after licenses were installed or removed.
+    Until the retrieval finishes, get_chassis_licensing fetches live and
+    fleet license queries answer from the previous licenses.
+    
+    Args:
+        request (LicenseInvalidateRequest): Optional request body
+            - ip: Chassis to invalidate, all configured chassis if omitted
+        
+    Returns:
+        Dict containing the invalidated chassis IPs
+    """
+    request = request or LicenseInvalidateRequest()
+    if request.ip is not None:
+        await run_in_threadpool(get_chassis_auth, request.ip)
+        chassis_ips = [request.ip]
+    else:
+        chassis_ips = list((await run_in_threadpool(load_credentials)).keys())
+    for ip in chassis_ips:
+        await run_in_threadpool(inventory_store.invalidate, ip, "licenses")
+        inventory_poller.schedule_refresh(ip, "licenses")
+    return {"invalidated": chassis_ips, "refreshing": True}
+
+@app.get("/operations", operation_id="list_operations")
+def list_operations() -> List[Dict[str, Any]]:
+    """
+    List recent async chassis operations and their states.
+    
+    Returns:
+        List of operation descriptions, most recent first
+    """
+    operations = sorted(get_default_scheduler().list(), key=lambda op: op.created_at, reverse=True)
+    return [operation.to_dict() for operation in operations]
+
+@app.get("/operations/{operation_id}", operation_id="get_operation_status")
+def get_operation_status(operation_id: str) -> Dict[str, Any]:
+    """
+    Get the state and, once finished, the result of an async chassis operation.
+    
+    Args:
+        operation_id: Id returned when the operation was started
+        
+    Returns:
+        Dict describing the operation
+    """
+    return operation_or_404(operation_id).to_dict()
+
+@app.post("/operations/{operation_id}/wait", operation_id="wait_for_operation")
+async def wait_for_operation(operation_id: str, request: Optional[OperationWaitRequest] = None) -> Dict[str, Any]:
+    """
+    Wait until an async chassis operation finishes or the timeout expires.
+    
+    Args:
+        operation_id: Id returned when the operation was started
+        request (OperationWaitRequest): Optional wait settings in request body
+            - timeout: Maximum seconds to wait (default 30)
+        
+    Returns:
+        Dict describing the operation; state is still IN_PROGRESS on timeout
+    """
+    operation = operation_or_404(operation_id)
+    timeout = (request or OperationWaitRequest()).timeout
+    
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+    operation.add_done_callback(
+        lambda op: loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(None))
+    )
+    try:
+        await asyncio.wait_for(finished, timeout)
+    except asyncio.TimeoutError:
+        pass
+    return operation.to_dict()
+
 @app.post("/credentials/refresh", operation_id="refresh_credentials")
 def refresh_credentials() -> Dict[str, Any]:
     """
@@ -656,80 +1404,359 @@ def refresh_credentials() -> Dict[str, Any]:
     Returns:
         Dict containing refresh status and source of credentials
     """
-    global _credentials_cache
-    
-    # Clear cache to force refresh
-    _credentials_cache["data"] = None
-    _credentials_cache["timestamp"] = 0
+    service_available = credentials_provider.refresh()
+    credentials = credentials_provider.current()
     
-    # Try service first
-    service_credentials = fetch_credentials_from_service()
-    
-    if service_credentials is not None:
-        _credentials_cache["data"] = service_credentials
-        _credentials_cache["timestamp"] = time.time()
+    if service_available:
         return {
             "success": True,
             "source": "credentials_service",
             "service_url": CREDENTIALS_SERVICE_URL,
-            "chassis_count": len(service_credentials),
-            "chassis_ips": list(service_credentials.keys()),
+            "chassis_count": len(credentials),
+            "chassis_ips": list(credentials.keys()),
             "message": "Credentials refreshed from credentials service"
         }
     
-    # Fall back to file
-    file_credentials = load_credentials_from_file()
-    _credentials_cache["data"] = file_credentials
-    _credentials_cache["timestamp"] = time.time() - (_credentials_cache["ttl"] / 2)
-    
+    status = credentials_provider.status()
     return {
         "success": True,
-        "source": "config.json",
+        "source": status["source"],
         "service_url": CREDENTIALS_SERVICE_URL,
         "service_available": False,
-        "chassis_count": len(file_credentials),
-        "chassis_ips": list(file_credentials.keys()),
-        "message": "Credentials loaded from config.json (credentials service unavailable)"
+        "chassis_count": len(credentials),
+        "chassis_ips": list(credentials.keys()),
+        "message": ("Credentials loaded from config.json (credentials service unavailable)"
+                    if status["source"] == "config.json" else
+                    f"Credentials service unavailable, keeping the credentials fetched "
+                    f"{status['cache_age_seconds']}s ago")
     }
 
 @app.get("/credentials/status", operation_id="get_credentials_status")
 def get_credentials_status() -> Dict[str, Any]:
     """
     Get the current status of credentials including source and cache information.
+    Answered from the provider state, without contacting the credentials service.
+    
+    Returns:
+        Dict containing credentials status information: source, the outcome
+        of the last service fetch, cache age, consecutive service failures and
+        seconds until the service is tried again
+    """
+    return credentials_provider.status()
+
+@app.get("/inventory/status", operation_id="get_inventory_status")
+def get_inventory_status() -> Dict[str, Any]:
+    """
+    Get the state of the background inventory snapshots.
+    
+    Returns:
+        Dict containing the polling intervals and, per chassis and resource,
+        the snapshot age and last refresh error
+    """
+    return {
+        "poller_enabled": POLLER_ENABLED,
+        "poll_intervals_seconds": POLL_INTERVALS,
+        "snapshots": inventory_store.status(),
+        "cache": cache_backend.stats() if cache_backend is not None else None,
+        "history": metrics_history.stats() if metrics_history is not None else None,
+        "query_indexes": inventory_query.stats()
+    }
+
+@app.post("/inventory/query", operation_id="query_inventory")
+def query_inventory(request: InventoryQueryRequest) -> Dict[str, Any]:
+    """
+    Find ports, cards or licenses across all chassis in one call, e.g. the
+    free 100G ports of the fleet or every card of a given type.
+    
+    Answered from indexes over the background snapshots, without querying
+    the chassis.
+    
+    Args:
+        request (InventoryQueryRequest): Query in request body
+            - resource: ports, cards or licenses
+            - where: Field -> value conditions, e.g. {"owner": "Free", "speed": "100000"}
+            - ip: Optional chassis to query
+            - fields: Optional list of keys to return per record
+            - limit: Maximum number of records returned
     
     Returns:
-        Dict containing credentials status information
+        Dict containing the total number of matches, the matching records
+        (up to limit) and whether the records were truncated
+    """
+    if request.resource not in QUERY_RESOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown resource {request.resource}; expected any of {list(QUERY_RESOURCES)}")
+    return inventory_query.query(
+        request.resource,
+        request.where,
+        chassis_ip=request.ip,
+        fields=request.fields,
+        limit=request.limit,
+        max_age=stale_after(request.resource)
+    )
+
+@app.post("/inventory/aggregate", operation_id="aggregate_inventory")
+def aggregate_inventory(request: InventoryAggregateRequest) -> Dict[str, Any]:
     """
-    current_time = time.time()
-    cache_age = current_time - _credentials_cache["timestamp"] if _credentials_cache["timestamp"] > 0 else None
-    cache_valid = cache_age is not None and cache_age < _credentials_cache["ttl"]
+    Count ports, cards or licenses across all chassis, grouped by a field,
+    e.g. free ports per chassis or ports per speed.
     
-    # Check if service is available
-    service_available = fetch_credentials_from_service() is not None
+    Answered from indexes over the background snapshots, without querying
+    the chassis.
     
-    credentials = load_credentials()
+    Args:
+        request (InventoryAggregateRequest): Aggregation in request body
+            - resource: ports, cards or licenses
+            - where: Field -> value conditions, e.g. {"owner": "Free"}
+            - group_by: Field to count by, e.g. chassisIp, speed, owner, cardType
+            - ip: Optional chassis to count the records of
     
+    Returns:
+        Dict containing the total count and a list of {value, count} groups,
+        largest first
+    """
+    if request.resource not in QUERY_RESOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown resource {request.resource}; expected any of {list(QUERY_RESOURCES)}")
+    return inventory_query.aggregate(
+        request.resource,
+        request.where,
+        group_by=request.group_by,
+        chassis_ip=request.ip,
+        max_age=stale_after(request.resource)
+    )
+
+@app.post("/inventory/lldp/search", operation_id="find_lldp_neighbors")
+def find_lldp_neighbors(request: LldpNeighborRequest) -> List[Dict[str, Any]]:
+    """
+    Find the chassis ports connected to a switch or host, by the LLDP system
+    name the ports report for their peer.
+    
+    Args:
+        request (LldpNeighborRequest): Search in request body
+            - system_name: Peer system name, matched case-insensitively
+            - exact: Match the whole name instead of a substring
+    
+    Returns:
+        List of chassisIp, fullyQualifiedPortName, cardNumber, portNumber,
+        linkState, owner and lldpPeerData entries
+    """
+    return inventory_query.find_lldp_neighbors(request.system_name, request.exact, max_age=stale_after("ports"))
+
+@app.post("/inventory/licenses/expiring", operation_id="get_expiring_licenses")
+def get_expiring_licenses(request: Optional[ExpiringLicensesRequest] = None) -> List[Dict[str, Any]]:
+    """
+    Get the licenses of all chassis that are expired or expire within a number
+    of days, soonest first.
+    
+    Args:
+        request (ExpiringLicensesRequest): Optional query in request body
+            - within_days: 0 for licenses already expired or expiring today
+            - ip: Optional chassis to return the licenses of
+            - part_number: Optional license part number
+    
+    Returns:
+        List of license records with an added daysToExpiry
+    """
+    request = request or ExpiringLicensesRequest()
+    return inventory_query.expiring_licenses(
+        request.within_days,
+        chassis_ip=request.ip,
+        part_number=request.part_number,
+        max_age=stale_after("licenses")
+    )
+
+@app.post("/ports/changes", operation_id="get_port_changes")
+def get_port_changes(request: Optional[PortChangesRequest] = None) -> Dict[str, Any]:
+    """
+    Get the port changes (owner, link state, speed, transceiver, ...) detected
+    since a cursor, instead of re-listing and comparing all ports.
+    
+    Changes are detected on every port refresh of the background poller.
+    
+    Args:
+        request (PortChangesRequest): Optional cursor request in request body
+            - ip: Optional chassis IP to return changes of
+            - since: Cursor from the previous call (0 for all buffered changes)
+            - limit: Maximum number of changes returned
+        
+    Returns:
+        Dict containing:
+            - events: Changed, added or removed ports with old/new field values
+            - cursor: Pass as since on the next call
+            - truncated: True if changes after since are no longer buffered
+              and the ports should be listed again
+    """
+    request = request or PortChangesRequest()
+    return port_change_feed.changes(request.since, request.ip, request.limit)
+
+@app.get("/ports/changes/stream", operation_id="stream_port_changes")
+async def stream_port_changes(request: Request, ip: Optional[str] = None, since: Optional[int] = None):
+    """
+    Stream port changes as server-sent events.
+    
+    Every event carries its cursor as the SSE id, so a reconnecting client
+    resumes through the Last-Event-ID header; without it the stream starts
+    with the changes after since, or with new changes only.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = port_change_feed.latest()
+    
+    async def events(cursor):
+        while not await request.is_disconnected():
+            batch = port_change_feed.changes(cursor, ip)
+            cursor = batch["cursor"]
+            for event in batch["events"]:
+                yield f"id: {event['seq']}\nevent: port_change\ndata: {json.dumps(event)}\n\n"
+            if not batch["events"] and not await port_change_feed.wait(cursor, 15):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(events(since), media_type="text/event-stream")
+
+def history_or_503():
+    if metrics_history is None:
+        raise HTTPException(status_code=503, detail="Metrics history is disabled (IXOS_HISTORY_PATH is empty)")
+    return metrics_history
+
+@app.get("/history/metrics", operation_id="list_history_metrics")
+def list_history_metrics(ip: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    List the metrics with recorded history.
+    
+    Args:
+        ip: Optional chassis IP to list the metrics of one chassis only
+        
+    Returns:
+        Dict of chassis IP to its metric names
+    """
+    return history_or_503().metrics(ip)
+
+@app.post("/history/query", operation_id="get_metric_history")
+def get_metric_history(request: MetricHistoryRequest) -> Dict[str, Any]:
+    """
+    Get the recorded history of one chassis metric, e.g. the CPU of a chassis
+    over the last 6 hours. Answered from local data, the chassis is not queried.
+    
+    Args:
+        request (MetricHistoryRequest): History query in request body
+            - ip: IP address of the chassis
+            - metric: cpu_utilization, mem_utilization or sensor.<sensor name>
+            - window: Seconds back from now (default 6 hours)
+            - resolution: raw, 1m, 5m or 1h; picked from the window if omitted
+        
+    Returns:
+        Dict containing the resolution and the points; raw points have ts and
+        value, roll-up points ts, min, max, avg and count (ts in epoch seconds)
+    """
+    history = history_or_503()
+    end = time.time()
+    try:
+        result = history.query(request.ip, request.metric, end - request.window, end, request.resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result.update({
+        "chassisIp": request.ip,
+        "metric": request.metric,
+        "window": request.window
+    })
+    return result
+
+@app.get("/sessions/status", operation_id="get_session_status")
+def get_session_status() -> Dict[str, Any]:
+    """
+    Get the status of the chassis session pool and HTTP connection reuse.
+    
+    Returns:
+        Dict containing session pool counters, per chassis the number of
+        requests sent over new versus reused connections, and the number of
+        concurrent identical GETs collapsed into one chassis request
+    """
     return {
-        "credentials_service_url": CREDENTIALS_SERVICE_URL,
-        "credentials_service_available": service_available,
-        "credentials_service_timeout": CREDENTIALS_SERVICE_TIMEOUT,
-        "cache_ttl_seconds": _credentials_cache["ttl"],
-        "cache_age_seconds": round(cache_age, 2) if cache_age else None,
-        "cache_valid": cache_valid,
-        "chassis_count": len(credentials),
-        "chassis_ips": list(credentials.keys())
+        "session_pool": session_pool.stats(),
+        "async_session_pool": async_session_pool.stats(),
+        "connections": session_pool.connection_stats(),
+        "port_indexes": port_index_stats(),
+        "license_host_ids": host_id_cache.stats(),
+        "single_flight": single_flight_stats()
     }
 
+@app.get("/chassis/health", operation_id="get_chassis_health")
+def get_chassis_health(ip: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Get the reachability of the chassis as seen by the circuit breaker.
+    Requests to a chassis whose breaker is open fail immediately; the chassis
+    is probed in the background until it answers again.
+    
+    Args:
+        ip: Optional chassis IP to get the health of one chassis only
+        
+    Returns:
+        List of per-chassis health: state (closed, open or half_open),
+        consecutive and total failures, rejected requests, last error,
+        smoothed latency and the seconds until the next attempt when open
+    """
+    return chassis_health.status(ip)
+
+@app.get("/metrics", operation_id="get_prometheus_metrics", response_class=PlainTextResponse)
+def get_prometheus_metrics() -> str:
+    """
+    Chassis request, collector and async operation metrics in the Prometheus
+    text exposition format, for scraping.
+    """
+    return request_metrics.render()
+
+@app.get("/metrics/slowest", operation_id="get_slowest_calls")
+def get_slowest_calls(top: int = 5) -> Dict[str, Any]:
+    """
+    Summarize where time goes when talking to the chassis: the slowest
+    endpoints, chassis and collectors, measured since the server started.
+    
+    Args:
+        top: Number of entries per list (default 5)
+        
+    Returns:
+        Dict containing endpoints, chassis, collectors and processing, each
+        ranked by p95 duration with request count, average, p50, p95 and
+        error count, plus the duration and number of polls of async operations
+    """
+    if top < 1:
+        raise HTTPException(status_code=400, detail="top must be at least 1")
+    return request_metrics.slowest(top)
+
+@app.get("/ready", operation_id="get_readiness")
+def get_readiness(response: Response) -> Dict[str, Any]:
+    """
+    Readiness probe: 200 once the first credentials load finished, 503 before.
+    
+    Returns:
+        Dict containing the readiness and the startup profile, i.e. the
+        seconds after app.py started loading at which imports, route
+        definitions, the MCP server, the startup event and the first
+        credentials load finished
+    """
+    ready = credentials_ready.is_set()
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "lazy_startup": LAZY_STARTUP, "startup_profile": dict(startup_profile)}
+
+mark_startup("routes")
+
 # Initialize MCP after all routes are defined
 mcp = FastApiMCP(
     app,
     name="IxNetwork Inventory MCP",
-    description="MCP tools for managing IxNetwork chassis inventory and metrics"
+    description="MCP tools for managing IxNetwork chassis inventory and metrics",
+    # an endless event stream cannot be answered as a tool result and the
+    # Prometheus exposition is meant for scrapers, get_slowest_calls summarizes it
+    # the readiness probe is meant for the container orchestrator
+    exclude_operations=["stream_port_changes", "get_prometheus_metrics", "get_readiness"]
 )
 
 # Mount MCP server with streaming support at /mcp endpoint
 # Using default mount path '/mcp' and default router (the main FastAPI app)
 mcp.mount()
+mark_startup("mcp")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,279 @@
+"""
+End-to-end benchmark of the API and the MCP layer against simulated chassis
+
+Starts benchmarks/mock_ixos_server.py with N simulated chassis and app.py
+under uvicorn, each in its own process, sends the requests of every scenario
+with the given concurrency, once as plain HTTP calls and once as MCP tool
+calls, and reports p50/p99 latency, requests per second, errors and the
+memory of the app process. No Ixia hardware is needed.
+
+Per-chassis scenarios cycle through the simulated chassis. By default they are
+answered from the background snapshots like in production; --live sends
+max_age=0 so that every call reaches a chassis.
+
+Usage (from the repository root):
+    python benchmarks/bench_app.py --chassis 20 --requests 200 --concurrency 16
+    python benchmarks/bench_app.py --chassis 50 --latency-ms 50 --live --scenarios summary,ports --no-mcp
+    python benchmarks/bench_app.py --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOCK_SERVER = os.path.join(ROOT, 'benchmarks', 'mock_ixos_server.py')
+
+# name -> (HTTP method, path, MCP tool, per-chassis, request body)
+SCENARIOS = {
+    'summary': ('POST', '/chassis/summary', 'get_chassis_summary', True, {}),
+    'cards': ('POST', '/chassis/cards', 'get_chassis_cards', True, {}),
+    'ports': ('POST', '/chassis/ports', 'get_chassis_ports', True, {}),
+    'sensors': ('POST', '/chassis/sensors', 'get_chassis_sensors', True, {}),
+    'licensing': ('POST', '/chassis/licensing', 'get_chassis_licensing', True, {}),
+    'performance': ('POST', '/chassis/performance', 'get_chassis_performance', True, {}),
+    'full': ('POST', '/chassis/full', 'get_chassis_full', True, {}),
+    'chassis_list': ('GET', '/chassis/list', 'get_chassis_list', False, None),
+    'fleet_query': ('POST', '/inventory/query', 'query_inventory', False,
+                    {'resource': 'ports', 'where': {'linkState': 'UP', 'speed': '100000'}, 'limit': 100}),
+    'fleet_aggregate': ('POST', '/inventory/aggregate', 'aggregate_inventory', False,
+                        {'resource': 'ports', 'group_by': 'speed'}),
+}
+DEFAULT_SCENARIOS = 'summary,cards,ports,sensors,chassis_list,fleet_query,fleet_aggregate'
+
+# app.py is loaded by path: "import app" would pick the app/ package of the web interface
+APP_LAUNCHER = '''
+import importlib.util, sys, uvicorn
+sys.path.insert(0, sys.argv[1])
+spec = importlib.util.spec_from_file_location("ixos_app", sys.argv[1] + "/app.py")
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+uvicorn.run(module.app, host="127.0.0.1", port=int(sys.argv[2]), log_level="warning")
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_fleet(args, workdir):
+    """
+    start the simulated chassis; returns the process and the chassis addresses
+    """
+    process = subprocess.Popen([
+        sys.executable, MOCK_SERVER, '--chassis', str(args.chassis), '--base-port', '0',
+        '--cards', str(args.cards), '--ports-per-card', str(args.ports_per_card),
+        '--latency-ms', str(args.latency_ms), '--latency-jitter-ms', str(args.latency_jitter_ms),
+        '--failure-rate', str(args.failure_rate), '--config', os.path.join(workdir, 'config.json')
+    ], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Simulated chassis:'):
+        process.kill()
+        raise SystemExit('mock IxOS server failed to start')
+    return process, line.split(':', 1)[1].strip().split(', ')
+
+
+def start_app(args, workdir, port):
+    """
+    start app.py under uvicorn with config.json of the simulated chassis
+    """
+    env = dict(os.environ)
+    env.update({
+        # no credentials service, config.json of workdir is used
+        'CREDENTIALS_SERVICE_URL': 'http://127.0.0.1:9/unavailable',
+        'CREDENTIALS_SERVICE_TIMEOUT': '1',
+        'IXOS_HISTORY_PATH': os.path.join(workdir, 'metrics_history.db'),
+        'IXOS_CACHE_PATH': os.path.join(workdir, 'ixos_cache.db'),
+        'IXOS_POLLER_ENABLED': 'false' if args.no_poller else 'true',
+    })
+    process = subprocess.Popen([sys.executable, '-c', APP_LAUNCHER, ROOT, str(port)],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('app.py exited with status %d' % process.returncode)
+        try:
+            if httpx.get('http://127.0.0.1:%d/ready' % port, timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise SystemExit('app.py did not start within 60 seconds')
+
+
+def process_memory(pid):
+    """
+    current and peak resident memory of a process in MiB (Linux only)
+    """
+    memory = {'rss_mib': None, 'peak_rss_mib': None}
+    try:
+        with open('/proc/%d/status' % pid) as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key = 'rss_mib' if line.startswith('VmRSS') else 'peak_rss_mib'
+                    memory[key] = round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def request_body(scenario, ip, live):
+    _, _, _, per_chassis, body = SCENARIOS[scenario]
+    if body is None:
+        return None
+    body = dict(body)
+    if per_chassis:
+        body['ip'] = ip
+        if live:
+            body['max_age'] = 0
+    return body
+
+
+async def drive(call, count, concurrency, chassis):
+    """
+    run call(ip) count times with at most concurrency calls in flight;
+    call returns True on success
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await call(chassis[i % len(chassis)])
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def bench_http(base_url, scenario, args, chassis):
+    method, path, _, _, _ = SCENARIOS[scenario]
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        async def call(ip):
+            response = await client.request(method, path, json=request_body(scenario, ip, args.live))
+            return response.status_code == 200
+        return await drive(call, args.requests, args.concurrency, chassis)
+
+
+async def bench_mcp(base_url, scenario, args, chassis):
+    # the mcp package is installed with fastapi-mcp
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    _, _, tool, _, _ = SCENARIOS[scenario]
+    async with sse_client(base_url + '/mcp', timeout=args.timeout, sse_read_timeout=args.timeout) as streams:
+        async with ClientSession(*streams) as session:
+            await session.initialize()
+
+            async def call(ip):
+                result = await session.call_tool(tool, request_body(scenario, ip, args.live) or {})
+                return not result.isError
+            return await drive(call, args.requests, args.concurrency, chassis)
+
+
+def summarize(scenario, transport, latencies, errors, wall):
+    return {
+        'scenario': scenario,
+        'transport': transport,
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'requests_per_second': round(len(latencies) / wall, 1) if wall else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chassis', type=int, default=10, help='number of simulated chassis')
+    parser.add_argument('--cards', type=int, default=4, help='cards per chassis')
+    parser.add_argument('--ports-per-card', type=int, default=16, help='ports per card')
+    parser.add_argument('--latency-ms', type=float, default=10, help='latency of every simulated chassis request')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help='random extra chassis latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of chassis requests answered with 500')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and transport')
+    parser.add_argument('--concurrency', type=int, default=16, help='requests in flight')
+    parser.add_argument('--timeout', type=float, default=120, help='client timeout in seconds')
+    parser.add_argument('--scenarios', default=DEFAULT_SCENARIOS,
+                        help='comma separated, any of %s' % ', '.join(SCENARIOS))
+    parser.add_argument('--live', action='store_true', help='send max_age=0 so every call reaches a chassis')
+    parser.add_argument('--no-poller', action='store_true', help='disable the background inventory poller')
+    parser.add_argument('--no-mcp', action='store_true', help='skip the MCP tool calls')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds to let the poller collect snapshots')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error('unknown scenarios %s; expected any of %s' % (unknown, list(SCENARIOS)))
+
+    workdir = tempfile.mkdtemp(prefix='bench_app_')
+    fleet, chassis = start_fleet(args, workdir)
+    app = None
+    try:
+        port = free_port()
+        app = start_app(args, workdir, port)
+        base_url = 'http://127.0.0.1:%d' % port
+        time.sleep(args.warmup)
+        memory_before = process_memory(app.pid)
+
+        results = []
+        for scenario in scenarios:
+            results.append(summarize(scenario, 'http', *asyncio.run(bench_http(base_url, scenario, args, chassis))))
+            if not args.no_mcp:
+                results.append(summarize(scenario, 'mcp', *asyncio.run(bench_mcp(base_url, scenario, args, chassis))))
+        memory_after = process_memory(app.pid)
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait()
+        fleet.terminate()
+        fleet.wait()
+
+    print('%d chassis, %d ports each, %.0f ms chassis latency, concurrency %d%s' % (
+        args.chassis, args.cards * args.ports_per_card, args.latency_ms, args.concurrency,
+        ', live' if args.live else ''))
+    print('%-16s %-9s %8s %7s %10s %10s %10s' % ('scenario', 'transport', 'requests', 'errors', 'p50 ms', 'p99 ms', 'req/s'))
+    for r in results:
+        print('%-16s %-9s %8d %7d %10s %10s %10s' % (
+            r['scenario'], r['transport'], r['requests'], r['errors'], r['p50_ms'], r['p99_ms'], r['requests_per_second']))
+    print('app memory: %s MiB after warm-up, %s MiB at the end, %s MiB peak' % (
+        memory_before['rss_mib'], memory_after['rss_mib'], memory_after['peak_rss_mib']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results,
+                       'memory': {'after_warmup': memory_before, 'end': memory_after}}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
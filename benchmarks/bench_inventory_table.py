@@ -0,0 +1,141 @@
+"""
+Memory and serialization benchmark of the columnar inventory tables
+
+Builds the port listings of a simulated fleet with process_ports_information
+and compares keeping them as lists of dicts with keeping them as
+InventoryTables: retained memory, JSON size and encode/decode time of the
+shared cache representation, filter time and the time of a full listing
+response, which for tables includes rebuilding the records.
+
+Usage (from the repository root):
+    python benchmarks/bench_inventory_table.py --chassis 100 --cards 8 --ports-per-card 32
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import IxOSRestCallerModifier as ixOSRestCaller
+from IxOSInventoryTable import InventoryTable
+
+LINK_STATES = ("UP", "DOWN", "NO_PHY")
+SPEEDS = ("10000", "25000", "100000", "400000")
+OWNERS = ("", "", "", "ixnetwork/alice", "ixnetwork/bob")
+TRANSCEIVERS = (("QSFP-DD-400G-SR8", "Amphenol"), ("QSFP28-100G-SR4", "Finisar"), (None, None))
+
+
+def make_port_listing(chassis_ip, cards, ports_per_card, rng):
+    """
+    /ports entries of one simulated chassis
+    """
+    ports = []
+    for card in range(1, cards + 1):
+        for port in range(1, ports_per_card + 1):
+            model, manufacturer = rng.choice(TRANSCEIVERS)
+            entry = {
+                "id": card * 1000 + port,
+                "cardNumber": card,
+                "portNumber": port,
+                "fullyQualifiedPortName": "%s;%d;%d" % (chassis_ip, card, port),
+                "owner": rng.choice(OWNERS),
+                "linkState": rng.choice(LINK_STATES),
+                "speed": rng.choice(SPEEDS),
+                "phyMode": "COPPER" if port % 2 else "FIBER",
+                "type": "NOVUS100GE8Q28",
+                "transceiverModel": model,
+                "transceiverManufacturer": manufacturer,
+            }
+            if port % 4 == 0:
+                entry["lldpPeerData"] = {"systemName": "leaf-%d" % card, "portId": "Ethernet%d" % port}
+            ports.append(entry)
+    return ports
+
+
+def make_fleet(chassis, cards, ports_per_card, seed=1):
+    rng = random.Random(seed)
+    fleet = {}
+    for i in range(chassis):
+        ip = "10.%d.%d.%d" % (i // 65536, i // 256 % 256, i % 256)
+        listing = make_port_listing(ip, cards, ports_per_card, rng)
+        fleet[ip] = ixOSRestCaller.process_ports_information(listing, ip, "Ixia XGS12")
+    return fleet
+
+
+def retained_memory(build):
+    """
+    bytes still allocated after build() returned, with its result kept alive
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chassis', type=int, default=100, help='number of simulated chassis')
+    parser.add_argument('--cards', type=int, default=8, help='cards per chassis')
+    parser.add_argument('--ports-per-card', type=int, default=32, help='ports per card')
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs, the best one is reported')
+    args = parser.parse_args()
+
+    list_bytes, fleet = retained_memory(lambda: make_fleet(args.chassis, args.cards, args.ports_per_card))
+    # the records of the fleet are released once converted, as in the snapshot store
+    table_bytes, tables = retained_memory(lambda: {
+        ip: InventoryTable.from_records(records)
+        for ip, records in make_fleet(args.chassis, args.cards, args.ports_per_card).items()
+    })
+    ports = sum(len(records) for records in fleet.values())
+
+    list_json = {ip: json.dumps(records) for ip, records in fleet.items()}
+    table_json = {ip: json.dumps(table.to_dict()) for ip, table in tables.items()}
+    match = {"owner": "Free", "linkState": "UP"}
+
+    results = [
+        ("retained memory (MiB)", list_bytes / 2 ** 20, table_bytes / 2 ** 20),
+        ("cache JSON size (MiB)",
+         sum(map(len, list_json.values())) / 2 ** 20, sum(map(len, table_json.values())) / 2 ** 20),
+        ("cache encode (ms)",
+         timed(lambda: [json.dumps(r) for r in fleet.values()], args.repeat) * 1000,
+         timed(lambda: [json.dumps(t.to_dict()) for t in tables.values()], args.repeat) * 1000),
+        ("cache decode (ms)",
+         timed(lambda: [json.loads(s) for s in list_json.values()], args.repeat) * 1000,
+         timed(lambda: [InventoryTable.from_dict(json.loads(s)) for s in table_json.values()], args.repeat) * 1000),
+        ("filter owner+linkState (ms)",
+         timed(lambda: [ixOSRestCaller.filter_records(r, match) for r in fleet.values()], args.repeat) * 1000,
+         timed(lambda: [t.filter(match) for t in tables.values()], args.repeat) * 1000),
+        # what a listing endpoint does: rebuild the records (tables only) and encode them like FastAPI
+        ("API response (ms)",
+         timed(lambda: [json.dumps(jsonable_encoder(r)) for r in fleet.values()], args.repeat) * 1000,
+         timed(lambda: [json.dumps(jsonable_encoder(list(t))) for t in tables.values()], args.repeat) * 1000),
+    ]
+
+    print("%d chassis, %d ports" % (args.chassis, ports))
+    print("%-30s %12s %12s %8s" % ("", "dict rows", "table", "ratio"))
+    for name, baseline, columnar in results:
+        print("%-30s %12.2f %12.2f %7.2fx" % (name, baseline, columnar, baseline / columnar if columnar else 0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Cold-start benchmark of app.py against simulated chassis
+
+Starts benchmarks/mock_ixos_server.py once, then starts app.py under uvicorn
+--runs times in a fresh process and measures, from the moment the process was
+spawned:
+
+    bind:        the server accepts TCP connections
+    first_call:  the first get_chassis_summary call, sent as soon as the
+                 server accepts connections, is answered
+    ready:       /ready answers 200, i.e. the first credentials load finished
+    first_mcp:   an MCP client connected, initialized and called a tool
+                 (with --mcp)
+
+plus the startup profile reported by /ready (imports, routes, mcp, startup
+and ready phases as seen from inside the process). A credentials service
+answering after --credentials-delay seconds can be simulated to show its
+effect on bind and readiness; by default it is unreachable and config.json is
+used. --eager starts the app with IXOS_LAZY_STARTUP=false for comparison.
+
+Usage (from the repository root):
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 5 --credentials-delay 3
+    python benchmarks/bench_startup.py --runs 5 --credentials-delay 3 --eager --mcp
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from bench_app import APP_LAUNCHER, ROOT, free_port, percentile, start_fleet
+
+PHASES = ('bind', 'first_call', 'ready', 'first_mcp')
+
+
+def start_credentials_service(config_path, delay):
+    """
+    serve the credentials of config.json in the credentials service format,
+    answering every request after delay seconds; returns the server and its URL
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+    body = json.dumps({
+        'success': True,
+        'credentials': [dict(ip=ip, **auth) for ip, auth in config.items()]
+    }).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:%d/api/config/credentials' % server.server_address[1]
+
+
+def wait_until(condition, deadline, process):
+    """
+    poll condition() until it is true; seconds since the first poll
+    """
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('app.py exited with status %d' % process.returncode)
+        try:
+            if condition():
+                return
+        except (OSError, httpx.HTTPError):
+            pass
+        time.sleep(0.005)
+    raise SystemExit('app.py did not start in time')
+
+
+def accepts_connections(port):
+    with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+        return True
+
+
+async def first_mcp_call(base_url, ip, timeout):
+    # the mcp package is installed with fastapi-mcp
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    async with sse_client(base_url + '/mcp', timeout=timeout, sse_read_timeout=timeout) as streams:
+        async with ClientSession(*streams) as session:
+            await session.initialize()
+            result = await session.call_tool('get_chassis_summary', {'ip': ip})
+            if result.isError:
+                raise SystemExit('MCP tool call failed: %s' % result.content)
+
+
+def cold_start(args, workdir, env, chassis):
+    """
+    start app.py once and measure its startup phases in seconds
+    """
+    port = free_port()
+    base_url = 'http://127.0.0.1:%d' % port
+    spawned = time.monotonic()
+    deadline = spawned + args.timeout
+    process = subprocess.Popen([sys.executable, '-c', APP_LAUNCHER, ROOT, str(port)],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timings = {}
+    try:
+        wait_until(lambda: accepts_connections(port), deadline, process)
+        timings['bind'] = time.monotonic() - spawned
+
+        response = httpx.post(base_url + '/chassis/summary', json={'ip': chassis[0]}, timeout=args.timeout)
+        if response.status_code != 200:
+            raise SystemExit('first call failed with %d: %s' % (response.status_code, response.text))
+        timings['first_call'] = time.monotonic() - spawned
+
+        readiness = {}
+
+        def ready():
+            response = httpx.get(base_url + '/ready', timeout=1)
+            readiness.update(response.json())
+            return response.status_code == 200
+        wait_until(ready, deadline, process)
+        timings['ready'] = time.monotonic() - spawned
+
+        if args.mcp:
+            asyncio.run(first_mcp_call(base_url, chassis[0], args.timeout))
+            timings['first_mcp'] = time.monotonic() - spawned
+        return timings, readiness.get('startup_profile', {})
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summarize(values):
+    if not values:
+        return None
+    return {
+        'median_ms': round(percentile(values, 0.5) * 1000, 1),
+        'min_ms': round(min(values) * 1000, 1),
+        'max_ms': round(max(values) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='number of cold starts')
+    parser.add_argument('--chassis', type=int, default=10, help='number of simulated chassis')
+    parser.add_argument('--cards', type=int, default=4, help='cards per chassis')
+    parser.add_argument('--ports-per-card', type=int, default=16, help='ports per card')
+    parser.add_argument('--latency-ms', type=float, default=10, help='latency of every simulated chassis request')
+    parser.add_argument('--credentials-delay', type=float, default=None,
+                        help='simulate a credentials service answering after this many seconds '
+                             '(default: no credentials service, config.json is used)')
+    parser.add_argument('--eager', action='store_true', help='load credentials before accepting connections')
+    parser.add_argument('--no-poller', action='store_true', help='disable the background inventory poller')
+    parser.add_argument('--mcp', action='store_true', help='also measure the first MCP tool call')
+    parser.add_argument('--timeout', type=float, default=60, help='seconds allowed per cold start')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+    # start_fleet of bench_app reads these
+    args.latency_jitter_ms = 0
+    args.failure_rate = 0.0
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    fleet, chassis = start_fleet(args, workdir)
+    credentials_service = None
+    try:
+        env = dict(os.environ)
+        env.update({
+            'CREDENTIALS_SERVICE_URL': 'http://127.0.0.1:9/unavailable',
+            'CREDENTIALS_SERVICE_TIMEOUT': str(int(args.credentials_delay or 0) + 5),
+            'IXOS_HISTORY_PATH': os.path.join(workdir, 'metrics_history.db'),
+            'IXOS_CACHE_PATH': os.path.join(workdir, 'ixos_cache.db'),
+            'IXOS_POLLER_ENABLED': 'false' if args.no_poller else 'true',
+            'IXOS_LAZY_STARTUP': 'false' if args.eager else 'true',
+        })
+        if args.credentials_delay is not None:
+            credentials_service, env['CREDENTIALS_SERVICE_URL'] = start_credentials_service(
+                os.path.join(workdir, 'config.json'), args.credentials_delay)
+
+        runs = []
+        for _ in range(args.runs):
+            timings, profile = cold_start(args, workdir, env, chassis)
+            runs.append({'timings': timings, 'startup_profile': profile})
+    finally:
+        if credentials_service is not None:
+            credentials_service.shutdown()
+        fleet.terminate()
+        fleet.wait()
+
+    results = {phase: summarize([run['timings'][phase] for run in runs if phase in run['timings']])
+               for phase in PHASES}
+    profile_phases = []
+    for run in runs:
+        profile_phases.extend(p for p in run['startup_profile'] if p not in profile_phases)
+    profile = {phase: summarize([run['startup_profile'][phase] for run in runs
+                                 if isinstance(run['startup_profile'].get(phase), float)])
+               for phase in profile_phases}
+
+    print('%d cold starts, %s startup, %s' % (
+        args.runs, 'eager' if args.eager else 'lazy',
+        'credentials service answering after %.1fs' % args.credentials_delay
+        if args.credentials_delay is not None else 'no credentials service'))
+    print('%-28s %10s %10s %10s' % ('since process spawn', 'median ms', 'min ms', 'max ms'))
+    for phase in PHASES:
+        if results[phase]:
+            print('%-28s %10s %10s %10s' % (phase, results[phase]['median_ms'], results[phase]['min_ms'],
+                                             results[phase]['max_ms']))
+    print('%-28s %10s %10s %10s' % ('since app.py started loading', 'median ms', 'min ms', 'max ms'))
+    for phase, summary in profile.items():
+        if summary:
+            print('%-28s %10s %10s %10s' % (phase, summary['median_ms'], summary['min_ms'], summary['max_ms']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results, 'startup_profile': profile, 'runs': runs},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+"""
+Simulated IxOS REST chassis for offline benchmarking.
+
+Serves the subset of the IxOS REST API used by this project over HTTPS:
+    - /platform/api/v1/auth/session
+    - /chassis/api/v2/ixos/{chassis,cards,ports,sensors,perfcounters,portstats}
+    - port/card/chassis operations answered with the 202 async-operation flow
+    - /platform/api/v2/licensing/servers and its retrievehostid/retrievelicenses operations
+
+Every simulated chassis listens on its own port of 127.0.0.1, so the chassis
+address used by the app is "127.0.0.1:<port>".
+
+Usage:
+    python benchmarks/mock_ixos_server.py --chassis 10 --cards 4 --ports-per-card 16 --latency-ms 20
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+IXOS_PREFIX = '/chassis/api/v2/ixos'
+LICENSING_PREFIX = '/platform/api/v2/licensing'
+AUTH_URI = '/platform/api/v1/auth/session'
+
+
+class SimulatedChassis(object):
+    """
+    In-memory state of one simulated chassis.
+    Constructor arguments:
+        address:            chassis address as seen by clients (host:port)
+        cards:              number of cards
+        ports_per_card:     number of ports on each card
+        latency_ms:         latency injected into every request
+        latency_jitter_ms:  random extra latency of up to this many ms
+        failure_rate:       probability (0..1) of answering a request with 500
+        stall_rate:         probability (0..1) of stalling a request for
+                            stall_seconds before answering, to trigger
+                            client timeouts
+        operation_polls:    number of IN_PROGRESS answers before an async
+                            operation completes
+        license_servers:    number of license servers
+        username/password:  accepted credentials
+    """
+
+    def __init__(self, address, cards=4, ports_per_card=16, latency_ms=0, latency_jitter_ms=0, failure_rate=0.0,
+                 stall_rate=0.0, stall_seconds=15, operation_polls=1, license_servers=1,
+                 username='admin', password='admin'):
+        self.address = address
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.operation_polls = operation_polls
+        self.username = username
+        self.password = password
+        self.api_keys = set()
+        self.operations = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.request_count = 0
+        self.auth_count = 0
+
+        self.chassis = {
+            'id': 1,
+            'type': 'Ixia XGS12',
+            'managementIp': address,
+            'serialNumber': 'SIM-%s' % address,
+            'controllerSerialNumber': 'CTRL-%s' % address,
+            'numberOfPhysicalCards': cards,
+            'state': 'UP',
+            'ixosApplications': [
+                {'name': 'IxOS', 'version': '10.00.0.1'},
+                {'name': 'IxNetwork Protocols', 'version': '10.00.0.1'},
+                {'name': 'IxOS REST', 'version': '10.00.0.1'},
+            ]
+        }
+        self.cards = []
+        self.ports = []
+        for card_number in range(1, cards + 1):
+            card_id = 100 + card_number
+            self.cards.append({
+                'id': card_id,
+                'parentId': 1,
+                'cardNumber': card_number,
+                'serialNumber': 'CARD-%d' % card_number,
+                'type': 'NOVUS100GE8Q28',
+                'state': 'UP',
+                'numberOfPorts': ports_per_card,
+            })
+            for port_number in range(1, ports_per_card + 1):
+                self.ports.append({
+                    'id': card_number * 1000 + port_number,
+                    'parentId': card_id,
+                    'cardNumber': card_number,
+                    'portNumber': port_number,
+                    'fullyQualifiedPortName': '%s;%d;%d' % (address, card_number, port_number),
+                    'owner': '',
+                    'linkState': random.choice(['UP', 'DOWN']),
+                    'speed': random.choice(['100000', '40000', '10000']),
+                    'type': 'NOVUS100GE8Q28',
+                    'phyMode': 'COPPER',
+                    'transceiverModel': 'QSFP28-SR4',
+                    'transceiverManufacturer': 'SIM',
+                    'lldpPeerData': {
+                        'portId': 'Ethernet%d/%d' % (card_number, port_number),
+                        'portDescription': 'sim uplink',
+                        'systemMac': '00:11:22:33:%02x:%02x' % (card_number, port_number),
+                        'systemIp': '192.0.2.%d' % card_number,
+                        'systemName': 'switch-%d' % card_number,
+                    },
+                    'resourceGroupId': card_number,
+                    'isTransceiverCapable': True,
+                    'autoNegotiation': False,
+                })
+        self.license_servers = [{'id': i, 'host': 'localhost'} for i in range(1, license_servers + 1)]
+        self.licenses = [{
+            'hostId': 'HOST-%s' % address,
+            'partNumber': '909-%04d' % i,
+            'activationCode': 'AC-%04d' % i,
+            'quantity': 1,
+            'description': 'Simulated license %d' % i,
+            'maintenanceDate': '2027-01-01',
+            'expiryDate': '2027-0%d-01' % (1 + i % 9),
+            'isExpired': False,
+        } for i in range(1, 6)]
+
+    def new_api_key(self):
+        key = '%s-%d' % (self.address, next(self._ids))
+        with self.lock:
+            self.api_keys.add(key)
+            self.auth_count += 1
+        return key
+
+    def start_operation(self, result):
+        operation_id = next(self._ids)
+        with self.lock:
+            self.operations[operation_id] = {'polls_left': self.operation_polls, 'result': result}
+        return operation_id
+
+    def sensors(self):
+        return [{
+            'id': i, 'parentId': 1, 'type': 'Temperature', 'unit': 'CELSIUS',
+            'name': 'Sensor %d' % i, 'value': round(random.uniform(30, 60), 1),
+            'criticalValue': 90, 'maxValue': 100, 'minValue': 0,
+            'adapterName': 'sim', 'sensorSetName': 'sim', 'cpuName': 'cpu0',
+        } for i in range(1, 9)]
+
+    def perfcounters(self):
+        return [{
+            'memoryInUseBytes': random.randint(2, 6) * 1024 ** 3,
+            'memoryTotalBytes': 8 * 1024 ** 3,
+            'cpuUsagePercent': round(random.uniform(1, 80), 1),
+        }]
+
+    def portstats(self):
+        now = time.time()
+        return [{
+            'id': port['id'],
+            'portId': port['id'],
+            'fullyQualifiedPortName': port['fullyQualifiedPortName'],
+            'framesSent': int(now * 1000) + port['id'],
+            'framesReceived': int(now * 900) + port['id'],
+            'bytesSent': int(now * 128000),
+            'bytesReceived': int(now * 115200),
+            'crcErrors': int(now) % 7 if port['portNumber'] == 1 else 0,
+        } for port in self.ports]
+
+
+def _filter(rows, query):
+    for key, values in query.items():
+        rows = [row for row in rows if str(row.get(key)) in values]
+    return rows
+
+
+def make_handler(chassis):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None):
+            payload = b'' if body is None else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _accepted(self, result):
+            operation_id = chassis.start_operation(result)
+            self._send(202, {
+                'id': operation_id,
+                'state': 'IN_PROGRESS',
+                'url': 'https://%s%s/operations/%d' % (chassis.address, IXOS_PREFIX, operation_id)
+            })
+
+        def _handle(self, method):
+            with chassis.lock:
+                chassis.request_count += 1
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'null') if length else None
+            delay = chassis.latency_ms + random.uniform(0, chassis.latency_jitter_ms)
+            if chassis.stall_rate and random.random() < chassis.stall_rate:
+                delay += chassis.stall_seconds * 1000.0
+            if delay:
+                time.sleep(delay / 1000.0)
+            if chassis.failure_rate and random.random() < chassis.failure_rate:
+                return self._send(500, {'message': 'injected failure'})
+
+            url = urlparse(self.path)
+            path = url.path
+            query = parse_qs(url.query)
+
+            if path == AUTH_URI and method == 'POST':
+                if not body or body.get('username') != chassis.username or body.get('password') != chassis.password:
+                    return self._send(401, {'message': 'invalid credentials'})
+                return self._send(200, {'apiKey': chassis.new_api_key()})
+
+            if self.headers.get('x-api-key') not in chassis.api_keys:
+                return self._send(401, {'message': 'invalid api key'})
+
+            match = re.match(r'^%s/operations/(\d+)(/result)?$' % IXOS_PREFIX, path)
+            if match and method == 'GET':
+                operation = chassis.operations.get(int(match.group(1)))
+                if operation is None:
+                    return self._send(404, {'message': 'unknown operation'})
+                if match.group(2):
+                    return self._send(200, operation['result'])
+                if operation['polls_left'] > 0:
+                    operation['polls_left'] -= 1
+                    return self._send(200, {'state': 'IN_PROGRESS', 'url': 'https://%s%s' % (chassis.address, path)})
+                return self._send(200, {
+                    'state': 'SUCCESS',
+                    'resultUrl': 'https://%s%s/result' % (chassis.address, path)
+                })
+
+            if method == 'GET':
+                resources = {
+                    IXOS_PREFIX + '/chassis': lambda: [chassis.chassis],
+                    IXOS_PREFIX + '/cards': lambda: chassis.cards,
+                    IXOS_PREFIX + '/ports': lambda: chassis.ports,
+                    IXOS_PREFIX + '/sensors': chassis.sensors,
+                    IXOS_PREFIX + '/perfcounters': chassis.perfcounters,
+                    IXOS_PREFIX + '/portstats': chassis.portstats,
+                    IXOS_PREFIX + '/services': lambda: [],
+                    LICENSING_PREFIX + '/servers': lambda: chassis.license_servers,
+                }
+                if path in resources:
+                    return self._send(200, _filter(resources[path](), query))
+
+            if method == 'POST':
+                match = re.match(r'^%s/ports/(\d+)/operations/(\w+)$' % IXOS_PREFIX, path)
+                if match:
+                    port = next((p for p in chassis.ports if p['id'] == int(match.group(1))), None)
+                    if port is None:
+                        return self._send(404, {'message': 'unknown port'})
+                    if match.group(2) == 'takeownership':
+                        port['owner'] = 'benchmark'
+                    elif match.group(2) == 'releaseownership':
+                        port['owner'] = ''
+                    return self._accepted({'portId': port['id']})
+                if re.match(r'^%s/(cards|chassis)/(\d+)/operations/(\w+)$' % IXOS_PREFIX, path):
+                    return self._accepted({'message': 'done'})
+                match = re.match(r'^%s/servers/(\d+)/operations/(retrievehostid|retrievelicenses)$' % LICENSING_PREFIX, path)
+                if match:
+                    if match.group(2) == 'retrievehostid':
+                        return self._accepted({'hostId': 'HOST-%s-%s' % (chassis.address, match.group(1))})
+                    return self._accepted(chassis.licenses)
+
+            return self._send(404, {'message': 'not found: %s %s' % (method, path)})
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+    return Handler
+
+
+def create_certificate(directory):
+    """
+    create a throw-away self-signed certificate with the openssl CLI
+    """
+    cert = os.path.join(directory, 'mock_ixos.pem')
+    key = os.path.join(directory, 'mock_ixos.key')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=localhost', '-keyout', key, '-out', cert
+    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return cert, key
+
+
+class MockIxOSFleet(object):
+    """
+    Runs one HTTPS server per simulated chassis in background threads.
+    """
+
+    def __init__(self, count=1, base_port=0, host='127.0.0.1', **chassis_kwargs):
+        self.host = host
+        self.count = count
+        self.base_port = base_port
+        self.chassis_kwargs = chassis_kwargs
+        self.servers = []
+        self.chassis = {}
+        self._tmpdir = None
+
+    def start(self):
+        self._tmpdir = tempfile.mkdtemp(prefix='mock_ixos_')
+        cert, key = create_certificate(self._tmpdir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        for i in range(self.count):
+            port = self.base_port + i if self.base_port else 0
+            server = ThreadingHTTPServer((self.host, port), None)
+            server.daemon_threads = True
+            address = '%s:%d' % (self.host, server.server_address[1])
+            chassis = SimulatedChassis(address, **self.chassis_kwargs)
+            server.RequestHandlerClass = make_handler(chassis)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+            self.chassis[address] = chassis
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def credentials(self):
+        return {address: {'username': c.username, 'password': c.password}
+                for address, c in self.chassis.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chassis', type=int, default=1, help='number of simulated chassis')
+    parser.add_argument('--base-port', type=int, default=9443, help='port of the first chassis, 0 for any free ports')
+    parser.add_argument('--cards', type=int, default=4)
+    parser.add_argument('--ports-per-card', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=0, help='latency injected into every request')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help='random extra latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of requests answered with 500')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='share of requests stalled for --stall-seconds')
+    parser.add_argument('--stall-seconds', type=float, default=15)
+    parser.add_argument('--operation-polls', type=int, default=1, help='IN_PROGRESS answers per async operation')
+    parser.add_argument('--license-servers', type=int, default=1)
+    parser.add_argument('--config', help='write a config.json for the simulated chassis to this path')
+    args = parser.parse_args()
+
+    fleet = MockIxOSFleet(
+        args.chassis, base_port=args.base_port, cards=args.cards, ports_per_card=args.ports_per_card,
+        latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms, failure_rate=args.failure_rate,
+        stall_rate=args.stall_rate, stall_seconds=args.stall_seconds, operation_polls=args.operation_polls, license_servers=args.license_servers
+    ).start()
+    if args.config:
+        with open(args.config, 'w') as f:
+            json.dump(fleet.credentials(), f, indent=2)
+    print('Simulated chassis: %s' % ', '.join(fleet.chassis), flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fleet.stop()
+
+
+if __name__ == '__main__':
+    main()
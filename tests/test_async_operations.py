@@ -0,0 +1,131 @@
+"""
+Failure paths of the AsyncOperationScheduler: every operation has to finish,
+whatever the status poll or the result callback does.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RestApi.IxOSAsyncOperations import AsyncOperationScheduler
+
+
+class FakeResponse(object):
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+
+class FakeSession(object):
+    """
+    answers every status poll with the next entry of responses; an exception
+    instance is raised instead of returned
+    """
+    chassis_ip = '10.0.0.1'
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def http_request(self, method, uri, payload=None, params=None, retry_auth=True, wait_for_completion=True):
+        self.requests.append((method, uri, wait_for_completion))
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+IN_PROGRESS = {'state': 'IN_PROGRESS', 'url': 'https://10.0.0.1/operations/1'}
+
+
+def scheduler():
+    return AsyncOperationScheduler(min_interval=0.01, max_interval=0.02)
+
+
+def test_bodiless_status_poll_fails_operation():
+    session = FakeSession([FakeResponse(None, status_code=500)])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=5)
+    assert operation.wait(2)
+    assert operation.state == 'FAILED'
+    assert '500' in operation.error
+
+
+def test_non_dict_status_body_fails_operation():
+    session = FakeSession([FakeResponse('<html>error</html>')])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=5)
+    assert operation.wait(2)
+    assert operation.state == 'FAILED'
+
+
+def test_poll_exception_fails_operation():
+    session = FakeSession([RuntimeError('connection reset')])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=5)
+    assert operation.wait(2)
+    assert operation.state == 'FAILED'
+    assert operation.error == 'connection reset'
+
+
+def test_polls_do_not_wait_for_nested_operations():
+    session = FakeSession([FakeResponse({'state': 'SUCCESS', 'resultUrl': 'https://10.0.0.1/result'})])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=5)
+    assert operation.wait(2)
+    assert all(wait_for_completion is False for _, _, wait_for_completion in session.requests)
+
+
+def test_operation_that_never_finishes_times_out():
+    session = FakeSession([FakeResponse(IN_PROGRESS)])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=0.1)
+    assert operation.wait(2)
+    assert operation.state == 'TIMEOUT'
+
+
+def test_non_dict_submit_body_fails_operation():
+    operation = scheduler().submit(FakeSession([FakeResponse(None)]), None, 'op', timeout=5)
+    assert operation.wait(2)
+    assert operation.state == 'FAILED'
+
+
+def test_chassis_error_is_reported():
+    session = FakeSession([FakeResponse({'state': 'ERROR', 'message': 'no license server'})])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=5)
+    assert operation.wait(2)
+    assert operation.state == 'ERROR'
+    assert operation.error == 'no license server'
+
+
+def test_failing_callback_fails_operation():
+    def on_complete(result_url):
+        raise ValueError('no result')
+
+    session = FakeSession([FakeResponse({'state': 'SUCCESS', 'resultUrl': 'https://10.0.0.1/result'})])
+    operation = scheduler().submit(session, IN_PROGRESS, 'op', timeout=5, on_complete=on_complete)
+    assert operation.wait(2)
+    assert operation.state == 'FAILED'
+    assert operation.error == 'no result'
+
+
+def test_blocked_callbacks_do_not_hold_up_polling():
+    release = threading.Event()
+
+    def on_complete(result_url):
+        release.wait(5)
+        return result_url
+
+    ops = scheduler()
+    done = {'state': 'SUCCESS', 'resultUrl': 'https://10.0.0.1/result'}
+    # more blocked callbacks than there are polling workers
+    blocked = [ops.submit(FakeSession([FakeResponse(done)]), IN_PROGRESS, 'op', timeout=5, on_complete=on_complete)
+               for _ in range(4)]
+    operation = ops.submit(FakeSession([FakeResponse(IN_PROGRESS), FakeResponse(done)]), IN_PROGRESS, 'op',
+                           timeout=5)
+    try:
+        assert operation.wait(2)
+        assert operation.state == 'SUCCESS'
+        assert operation.result == 'https://10.0.0.1/result'
+    finally:
+        release.set()
+    for blocked_operation in blocked:
+        assert blocked_operation.wait(2)
+        assert blocked_operation.state == 'SUCCESS'
@@ -0,0 +1,72 @@
+"""
+Refresh leases of the cache backends and of the inventory poller.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from IxOSCacheBackend import LRUCacheBackend, SQLiteCacheBackend
+from IxOSInventoryPoller import InventoryPoller, InventorySnapshotStore
+
+
+def test_lease_has_one_owner_until_released(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+    assert first.acquire_lease("refresh/a", 60)
+    assert not second.acquire_lease("refresh/a", 60)
+    # the holder renews its own lease
+    assert first.acquire_lease("refresh/a", 60)
+
+    second.release_lease("refresh/a")
+    assert not second.acquire_lease("refresh/a", 60)
+    first.release_lease("refresh/a")
+    assert second.acquire_lease("refresh/a", 60)
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+    assert first.acquire_lease("refresh/a", 0.05)
+    time.sleep(0.1)
+    assert second.acquire_lease("refresh/a", 60)
+    assert not first.acquire_lease("refresh/a", 60)
+
+
+def test_memory_lease_is_renewed_by_its_owner():
+    backend = LRUCacheBackend()
+    assert backend.acquire_lease("refresh/a", 60)
+    assert backend.acquire_lease("refresh/a", 60)
+    backend.release_lease("refresh/a")
+    assert backend.stats()["leases"] == 0
+
+
+def test_slow_refresh_keeps_its_lease_and_is_not_repeated(tmp_path):
+    path = str(tmp_path / "cache.db")
+    fetches = []
+
+    def poller():
+        store = InventorySnapshotStore(SQLiteCacheBackend(path))
+        poller = InventoryPoller(store, None, lambda: [], {}, refresh_timeout=0.3)
+
+        async def fetch(chassis_ip, resource, params=None):
+            fetches.append(poller)
+            # outlasts refresh_timeout several times over
+            await asyncio.sleep(1)
+            return {"chassisIp": chassis_ip}
+        poller.fetch = fetch
+        return poller
+
+    async def run():
+        first, second = poller(), poller()
+        refresh = asyncio.create_task(first.refresh("10.0.0.1", "summary"))
+        await asyncio.sleep(0.1)
+        data = await second.refresh("10.0.0.1", "summary")
+        assert data == {"chassisIp": "10.0.0.1"}
+        await refresh
+
+    asyncio.run(run())
+    assert len(fetches) == 1
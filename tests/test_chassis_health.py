@@ -0,0 +1,127 @@
+"""
+Circuit breaker state machine and adaptive read timeout of ChassisHealth.
+"""
+
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RestApi.IxOSChassisHealth import ChassisHealthRegistry, CLOSED, OPEN, HALF_OPEN
+from RestApi.IxOSRestInterface import IxRestSession
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ChassisHealthRegistry(failure_threshold=3, open_seconds=10, max_open_seconds=40)
+    # no background prober in tests
+    monkeypatch.setattr(registry, 'start_prober', lambda: None)
+    return registry
+
+
+def expire(health):
+    health._open_until = 0.0
+
+
+def test_breaker_opens_after_threshold_failures(registry):
+    health = registry.get('10.0.0.1')
+    for _ in range(2):
+        health.record_failure('timeout')
+        assert health.state == CLOSED and health.allow_request()
+    health.record_failure('timeout')
+    assert health.state == OPEN
+    assert not health.allow_request()
+    assert health.rejected == 1
+
+
+def test_success_resets_consecutive_failures(registry):
+    health = registry.get('10.0.0.1')
+    health.record_failure('timeout')
+    health.record_failure('timeout')
+    health.record_success(0.1)
+    health.record_failure('timeout')
+    assert health.state == CLOSED
+
+
+def test_single_trial_after_open_period(registry):
+    health = registry.get('10.0.0.1')
+    for _ in range(3):
+        health.record_failure('timeout')
+    expire(health)
+    assert health.allow_request()
+    assert health.state == HALF_OPEN
+    # only one trial at a time
+    assert not health.allow_request()
+
+
+def test_successful_trial_closes_breaker(registry):
+    health = registry.get('10.0.0.1')
+    for _ in range(3):
+        health.record_failure('timeout')
+    expire(health)
+    assert health.allow_request()
+    health.record_success(0.1)
+    assert health.state == CLOSED
+    assert health.allow_request()
+
+
+def test_failed_trial_doubles_open_period(registry):
+    health = registry.get('10.0.0.1')
+    for _ in range(3):
+        health.record_failure('timeout')
+    for expected in (20, 40, 40):
+        expire(health)
+        assert health.allow_request()
+        health.record_failure('timeout')
+        assert health.state == OPEN
+        assert health._open_seconds == expected
+
+
+def test_probe_results(registry):
+    health = registry.get('10.0.0.1')
+    for _ in range(3):
+        health.record_failure('timeout')
+    health.probe_result(False)
+    assert health._open_seconds == 20 and not health.allow_request()
+    health.probe_result(True)
+    assert health.allow_request() and health.state == HALF_OPEN
+
+
+def test_read_timeout_per_endpoint(registry):
+    health = registry.get('10.0.0.1')
+    ports, chassis = ('GET', '/ports'), ('GET', '/chassis')
+    for _ in range(20):
+        health.record_success(0.1, chassis)
+        health.record_success(8.0, ports)
+    assert health.read_timeout(5, 30, chassis) == 5
+    assert health.read_timeout(5, 30, ports) > 8
+    # unknown endpoint: maximum until its latency is known
+    assert health.read_timeout(5, 30, ('GET', '/sensors')) == 30
+
+
+class TimingOutSession(IxRestSession):
+    """
+    IxRestSession whose chassis never answers
+    """
+
+    def __init__(self, registry, get_retries):
+        super(TimingOutSession, self).__init__('10.0.0.1', api_key='key', get_retries=get_retries, retry_backoff=0)
+        self.health = registry.get('10.0.0.1')
+        self.attempts = 0
+
+        def request(*args, **kwargs):
+            self.attempts += 1
+            raise requests.exceptions.ReadTimeout('read timed out')
+        self._http.request = request
+
+
+def test_retried_request_counts_as_one_failure(registry):
+    session = TimingOutSession(registry, get_retries=2)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session._send('GET', 'https://10.0.0.1/chassis/api/v2/ixos/chassis', None, None, {})
+    assert session.attempts == 3
+    assert session.health.failures == 1
+    assert session.health.state == CLOSED
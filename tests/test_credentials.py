@@ -0,0 +1,122 @@
+"""
+Caching and outage backoff of the credentials provider.
+"""
+
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import IxOSCredentials
+from IxOSCredentials import CredentialsProvider, CredentialsServiceError
+
+SERVICE = {"10.0.0.1": {"username": "admin", "password": "secret"}}
+FILE = {"10.0.0.9": {"username": "admin", "password": "file"}}
+
+
+class FakeService(object):
+    """
+    stands in for fetch_credentials_from_service
+    """
+
+    def __init__(self, monkeypatch):
+        self.available = True
+        self.calls = 0
+        self.release = None
+        monkeypatch.setattr(IxOSCredentials, "fetch_credentials_from_service", self)
+
+    def __call__(self, url, timeout):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        if not self.available:
+            raise CredentialsServiceError("Credentials service not available at %s" % url)
+        return dict(SERVICE)
+
+
+def provider(tmp_path, **kwargs):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(FILE))
+    return CredentialsProvider("http://credentials", config_path=str(path), **kwargs)
+
+
+def wait_for_refresh(credentials):
+    if credentials._refresher is not None:
+        credentials._refresher.join(5)
+
+
+def test_unavailable_service_is_backed_off_exponentially(tmp_path, monkeypatch):
+    service = FakeService(monkeypatch)
+    service.available = False
+    credentials = provider(tmp_path, ttl=0, outage_backoff=10, max_outage_backoff=25)
+
+    # config.json is served while the service never answered
+    assert credentials.get() == FILE
+    assert credentials.status()["retry_in_seconds"] == 10
+    for _ in range(5):
+        credentials.get()
+    assert service.calls == 1
+
+    for retry_in in (20, 25, 25):
+        credentials._retry_at = 0.0
+        credentials.get()
+        wait_for_refresh(credentials)
+        assert 0 < credentials.status()["retry_in_seconds"] <= retry_in
+        assert credentials.status()["retry_in_seconds"] > retry_in - 1
+    assert service.calls == 4
+    assert credentials.status()["consecutive_failures"] == 4
+    assert credentials.status()["credentials_service_available"] is False
+
+
+def test_last_service_credentials_are_served_during_an_outage(tmp_path, monkeypatch):
+    service = FakeService(monkeypatch)
+    credentials = provider(tmp_path, ttl=0, outage_backoff=10)
+    assert credentials.get() == SERVICE
+
+    service.available = False
+    credentials.get()
+    wait_for_refresh(credentials)
+    assert credentials.get() == SERVICE
+    status = credentials.status()
+    assert status["source"] == "credentials_service"
+    assert status["consecutive_failures"] == 1
+
+    # an explicit refresh ignores the backoff and a success resets it
+    service.available = True
+    assert credentials.refresh()
+    assert credentials.status()["consecutive_failures"] == 0
+    assert credentials.status()["retry_in_seconds"] is None
+
+
+def test_stale_credentials_are_served_while_refreshing(tmp_path, monkeypatch):
+    service = FakeService(monkeypatch)
+    credentials = provider(tmp_path, ttl=0)
+    credentials.get()
+
+    service.release = threading.Event()
+    try:
+        # returns right away, the refresh waits for the service in the background
+        assert credentials.get() == SERVICE
+        assert credentials.get() == SERVICE
+        assert credentials.status()["refreshing"]
+    finally:
+        service.release.set()
+    wait_for_refresh(credentials)
+    assert service.calls == 2
+
+
+def test_config_file_is_read_again_only_when_modified(tmp_path, monkeypatch):
+    service = FakeService(monkeypatch)
+    service.available = False
+    credentials = provider(tmp_path)
+    first = credentials.get()
+    assert first == FILE
+    assert credentials.current() is first
+
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(SERVICE))
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert credentials.current() == SERVICE
@@ -0,0 +1,68 @@
+"""
+Chassis removed from the configuration are forgotten by the snapshot
+listeners.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from IxOSInventoryPoller import InventorySnapshotStore
+from IxOSInventoryQuery import InventoryQueryEngine
+from IxOSPortChangeFeed import PortChangeFeed
+from IxOSPortStats import PortStatsTracker
+
+
+def ports(owner):
+    return [{"fullyQualifiedPortName": "1.%d" % n, "cardNumber": 1, "portNumber": n, "owner": owner,
+             "speed": "100000", "linkState": "UP"} for n in (1, 2)]
+
+
+def licenses(expiry):
+    return [{"partNumber": "930-0001", "isExpired": False, "expiryDate": expiry}]
+
+
+def store_with_listeners():
+    store = InventorySnapshotStore()
+    query, feed, stats = InventoryQueryEngine(), PortChangeFeed(), PortStatsTracker()
+    for listener in (query, feed, stats):
+        store.add_listener(listener.update)
+        store.add_removal_listener(listener.forget)
+    return store, query, feed, stats
+
+
+def test_prune_forgets_removed_chassis():
+    store, query, feed, stats = store_with_listeners()
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        store.put(ip, "ports", ports(""))
+        store.put(ip, "licenses", licenses("01-Jan-2030"))
+        store.put(ip, "portstats", [{"fullyQualifiedPortName": "1.1", "framesSent": 1}])
+
+    store.prune(["10.0.0.1"])
+
+    assert store.get("10.0.0.2", "ports") is None
+    assert query.query("ports", chassis_ip="10.0.0.2")["total"] == 0
+    assert query.query("ports")["total"] == 2
+    assert query.stats()["ports"]["chassis"] == 1
+    assert query.stats()["licenses"]["chassis"] == 1
+    assert [ip for _, ip, _ in query._expiry] == ["10.0.0.1"]
+    assert stats.sample_count("10.0.0.2") == 0
+    assert stats.sample_count("10.0.0.1") == 1
+
+    # a chassis added back starts a new baseline instead of reporting changes
+    # against the listing from before its removal
+    since = feed.latest()
+    store.put("10.0.0.2", "ports", ports("someone"))
+    assert feed.changes(since)["events"] == []
+
+
+def test_prune_notifies_once():
+    store = InventorySnapshotStore()
+    removed = []
+    store.add_removal_listener(removed.append)
+    store.put("10.0.0.1", "ports", ports(""))
+    store.mark_error("10.0.0.2", "ports", "timeout")
+    store.prune([])
+    store.prune([])
+    assert removed == ["10.0.0.1", "10.0.0.2"]
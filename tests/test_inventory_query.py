@@ -0,0 +1,105 @@
+"""
+Fleet-wide queries of the inventory query engine.
+"""
+
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from IxOSInventoryQuery import InventoryQueryEngine
+
+TODAY = date(2026, 10, 18)
+
+
+def ports(ip, count, owner="", speed="100000", link_state="UP", lldp=None):
+    return [{"chassisIp": ip, "fullyQualifiedPortName": "%s/1.%d" % (ip, n), "cardNumber": 1, "portNumber": n,
+             "owner": owner, "speed": speed, "linkState": link_state, "lldpPeerData": lldp}
+            for n in range(1, count + 1)]
+
+
+def engine():
+    engine = InventoryQueryEngine()
+    now = time.time()
+    engine.update("10.0.0.1", "ports", ports("10.0.0.1", 3) + ports("10.0.0.1", 2, owner="alice", speed=40000),
+                  collected_at=now)
+    engine.update("10.0.0.2", "ports", ports("10.0.0.2", 2, link_state="down"), collected_at=now)
+    # last collected an hour ago, e.g. an unreachable chassis
+    engine.update("10.0.0.3", "ports", ports("10.0.0.3", 4), collected_at=now - 3600)
+    return engine
+
+
+def test_query_matches_indexed_and_scanned_fields():
+    result = engine().query("ports", where={"owner": "", "linkState": "up", "portNumber": 2})
+    assert result["total"] == 2
+    assert sorted(r["chassisIp"] for r in result["records"]) == ["10.0.0.1", "10.0.0.3"]
+    assert not result["truncated"]
+
+
+def test_query_values_are_matched_as_strings():
+    result = engine().query("ports", where={"speed": "40000", "owner": "ALICE"}, fields=["fullyQualifiedPortName"])
+    assert result["records"] == [{"fullyQualifiedPortName": "10.0.0.1/1.1"},
+                                 {"fullyQualifiedPortName": "10.0.0.1/1.2"}]
+
+
+def test_query_limit_truncates_records_but_not_total():
+    result = engine().query("ports", limit=4)
+    assert result["total"] == 11
+    assert len(result["records"]) == 4
+    assert result["truncated"]
+
+
+def test_max_age_leaves_out_stale_chassis():
+    query = engine()
+    assert query.query("ports", max_age=60)["total"] == 7
+    groups = query.aggregate("ports", max_age=60)["groups"]
+    assert {g["value"]: g["count"] for g in groups} == {"10.0.0.1": 5, "10.0.0.2": 2}
+
+
+def test_aggregate_by_indexed_and_other_fields():
+    query = engine()
+    by_speed = query.aggregate("ports", group_by="speed")
+    assert by_speed["total"] == 11
+    assert by_speed["groups"] == [{"value": "100000", "count": 9}, {"value": 40000, "count": 2}]
+
+    by_port = query.aggregate("ports", where={"linkState": "UP"}, group_by="portNumber", chassis_ip="10.0.0.1")
+    assert {g["value"]: g["count"] for g in by_port["groups"]} == {1: 2, 2: 2, 3: 1}
+
+
+def test_updates_replace_the_previous_snapshot():
+    query = engine()
+    query.update("10.0.0.1", "ports", ports("10.0.0.1", 1), collected_at=time.time())
+    assert query.query("ports", where={"owner": "alice"})["total"] == 0
+    assert query.query("ports", chassis_ip="10.0.0.1")["total"] == 1
+
+
+def test_expiring_licenses_soonest_first():
+    query = InventoryQueryEngine()
+    now = time.time()
+    query.update("10.0.0.1", "licenses", [
+        {"partNumber": "930-0001", "expiryDate": "2026-10-25"},
+        {"partNumber": "930-0002", "expiryDate": "01-Oct-2026"},
+        {"partNumber": "930-0003", "expiryDate": "Permanent"},
+    ], collected_at=now)
+    query.update("10.0.0.2", "licenses", [{"partNumber": "930-0001", "expiryDate": "10/20/2026"}],
+                 collected_at=now - 3600)
+
+    expired = query.expiring_licenses(today=TODAY)
+    assert [(r["partNumber"], r["daysToExpiry"]) for r in expired] == [("930-0002", -17)]
+
+    soon = query.expiring_licenses(within_days=30, today=TODAY)
+    assert [r["daysToExpiry"] for r in soon] == [-17, 2, 7]
+
+    fresh = query.expiring_licenses(within_days=30, max_age=60, part_number="930-0001", today=TODAY)
+    assert [r["daysToExpiry"] for r in fresh] == [7]
+
+
+def test_unknown_resource_is_rejected():
+    try:
+        InventoryQueryEngine().query("sensors")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("sensors are not indexed")
@@ -0,0 +1,116 @@
+"""
+Columnar inventory tables rebuild the records they were built from.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from IxOSInventoryTable import InventoryTable, to_table
+from IxOSRestCallerModifier import filter_records
+
+RECORDS = [
+    {"chassisIp": "10.0.0.1", "cardNumber": 1, "portNumber": 1, "owner": "", "linkState": "UP",
+     "lldpPeerData": {"systemName": "switch-a"}},
+    # other key order and no lldpPeerData
+    {"chassisIp": "10.0.0.1", "portNumber": 2, "cardNumber": 1, "linkState": "down", "owner": "alice"},
+    # no owner, an extra key
+    {"chassisIp": "10.0.0.1", "cardNumber": 2, "portNumber": 1, "linkState": "UP", "speed": 100000,
+     "lldpPeerData": None},
+    {"chassisIp": "10.0.0.1", "cardNumber": 2, "portNumber": 2, "owner": "bob", "linkState": "UP",
+     "lldpPeerData": {"systemName": "switch-b"}},
+]
+
+
+def assert_identical(rebuilt, records):
+    assert rebuilt == records
+    # same key order and same value types, not only equal values
+    assert [list(r) for r in rebuilt] == [list(r) for r in records]
+    assert [[type(v) for v in r.values()] for r in rebuilt] == [[type(v) for v in r.values()] for r in records]
+
+
+def test_records_with_mixed_layouts_are_rebuilt_identically():
+    table = InventoryTable.from_records(RECORDS)
+    assert len(table) == 4
+    assert_identical(list(table), RECORDS)
+    assert table[-1] == RECORDS[-1]
+    assert table.column("owner") == ["", "alice", None, "bob"]
+
+
+def test_rebuilt_records_are_new_dicts():
+    table = InventoryTable.from_records(RECORDS)
+    record = table[0]
+    record["owner"] = "changed"
+    assert table[0]["owner"] == ""
+    assert RECORDS[0]["owner"] == ""
+
+
+def test_equal_values_of_different_types_keep_their_type():
+    records = [{"value": 1}, {"value": True}, {"value": 1.0}, {"value": 2}]
+    table = InventoryTable.from_records(records)
+    assert_identical(list(table), records)
+    assert [type(v) for v in table.distinct("value")] == [int, bool, float, int]
+    # compared as strings, like filter_records: "1" is neither True nor 1.0
+    assert table.filter({"value": "1"}) == filter_records(records, {"value": "1"}) == [{"value": 1}]
+
+
+def test_constant_and_unhashable_columns():
+    records = [{"chassisIp": "10.0.0.1", "peers": [n]} for n in range(3)]
+    table = InventoryTable.from_records(records)
+    assert table.distinct("chassisIp") == ["10.0.0.1"]
+    assert_identical(list(table), records)
+    assert table.column("peers") == [[0], [1], [2]]
+
+
+def test_dict_round_trip_through_json():
+    table = InventoryTable.from_records(RECORDS + [{"value": 1}, {"value": True}, {"value": 1.0}])
+    rebuilt = InventoryTable.from_dict(json.loads(json.dumps(table.to_dict())))
+    assert_identical(list(rebuilt), list(table))
+    assert rebuilt.keys() == table.keys()
+
+
+def test_filter_gives_the_same_result_as_filter_records():
+    table = InventoryTable.from_records(RECORDS)
+    for match, fields in [
+        (None, None),
+        ({"linkState": "up"}, None),
+        ({"cardNumber": "2", "linkState": "UP"}, ["portNumber", "owner"]),
+        # records without the key compare as "none"
+        ({"owner": None, "speed": "none"}, None),
+        ({"speed": 100000}, ["speed", "chassisIp"]),
+        ({"missing": "none"}, ["lldpPeerData"]),
+        ({"missing": "x"}, None),
+    ]:
+        expected = filter_records(RECORDS, match, fields)
+        assert_identical(table.filter(match, fields), expected)
+
+
+def test_empty_listing():
+    table = InventoryTable.from_records([])
+    assert list(table) == []
+    assert table.filter({"owner": "alice"}) == []
+    assert list(InventoryTable.from_dict(table.to_dict())) == []
+
+
+def test_only_listings_of_table_resources_are_converted():
+    assert isinstance(to_table("ports", RECORDS), InventoryTable)
+    summary = {"chassisIp": "10.0.0.1"}
+    assert to_table("summary", summary) is summary
+    assert to_table("ports", None) is None
+
+
+def test_groups_merge_equal_values_of_different_types():
+    table = InventoryTable.from_records([{"value": 1}, {"value": True}, {"value": 1.0}, {"value": 2}])
+    groups = table.groups("value")
+    assert list(groups[1]) == [0, 1, 2]
+    assert list(groups[2]) == [3]
+
+
+def test_groups_of_constant_missing_and_unhashable_columns():
+    records = [{"chassisIp": "10.0.0.1", "peers": [n]} for n in range(3)]
+    table = InventoryTable.from_records(records)
+    assert list(table.groups("chassisIp")["10.0.0.1"]) == [0, 1, 2]
+    assert list(table.groups("missing")[None]) == [0, 1, 2]
+    assert list(table.groups("peers")["[1]"]) == [1]
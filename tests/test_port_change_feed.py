@@ -0,0 +1,89 @@
+"""
+Port change events computed from consecutive port listings.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from IxOSPortChangeFeed import PortChangeFeed
+
+
+def port(number, owner="", link_state="UP", speed="100000"):
+    return {"fullyQualifiedPortName": "1.%d" % number, "cardNumber": 1, "portNumber": number,
+            "owner": owner, "linkState": link_state, "speed": speed}
+
+
+def test_first_listing_only_sets_the_baseline():
+    feed = PortChangeFeed()
+    feed.update("10.0.0.1", "ports", [port(1), port(2)])
+    feed.update("10.0.0.1", "sensors", [{"name": "temp"}])
+    assert feed.changes() == {"events": [], "cursor": 0, "truncated": False}
+
+
+def test_changed_added_and_removed_ports():
+    feed = PortChangeFeed()
+    feed.update("10.0.0.1", "ports", [port(1), port(2)])
+    feed.update("10.0.0.1", "ports", [port(1, owner="alice", link_state="DOWN"), port(3)])
+
+    events = feed.changes()["events"]
+    assert [(e["port"], e["change"]) for e in events] == [("1.1", "changed"), ("1.3", "added"), ("1.2", "removed")]
+    assert events[0]["fields"] == {"owner": {"old": "", "new": "alice"}, "linkState": {"old": "UP", "new": "DOWN"}}
+    assert events[1]["fields"]["speed"] == {"old": None, "new": "100000"}
+    assert events[2]["fields"]["owner"] == {"old": "", "new": None}
+    assert [e["seq"] for e in events] == [1, 2, 3]
+
+    # an unchanged listing adds nothing
+    feed.update("10.0.0.1", "ports", [port(1, owner="alice", link_state="DOWN"), port(3)])
+    assert feed.latest() == 3
+
+
+def test_cursor_pages_through_events_of_one_chassis():
+    feed = PortChangeFeed()
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        feed.update(ip, "ports", [port(1), port(2)])
+    feed.update("10.0.0.1", "ports", [port(1, owner="a"), port(2, owner="a")])
+    feed.update("10.0.0.2", "ports", [port(1, owner="b"), port(2, owner="b")])
+
+    first = feed.changes(limit=1)
+    assert [e["seq"] for e in first["events"]] == [1]
+    rest = feed.changes(first["cursor"])
+    assert [e["seq"] for e in rest["events"]] == [2, 3, 4]
+    assert rest["cursor"] == 4
+    assert feed.changes(rest["cursor"])["events"] == []
+
+    only = feed.changes(chassis_ip="10.0.0.2")
+    assert [e["seq"] for e in only["events"]] == [3, 4]
+    assert only["cursor"] == 4
+
+
+def test_cursor_behind_the_buffer_is_reported_as_truncated():
+    feed = PortChangeFeed(max_events=2)
+    feed.update("10.0.0.1", "ports", [port(1)])
+    for owner in ("a", "b", "c"):
+        feed.update("10.0.0.1", "ports", [port(1, owner=owner)])
+    result = feed.changes(0)
+    assert result["truncated"]
+    assert [e["seq"] for e in result["events"]] == [2, 3]
+    assert not feed.changes(1)["truncated"]
+
+
+def test_wait_wakes_up_on_a_change_from_another_thread():
+    feed = PortChangeFeed()
+    feed.update("10.0.0.1", "ports", [port(1)])
+
+    async def run():
+        assert not await feed.wait(feed.latest(), 0.05)
+        update = threading.Timer(0.05, feed.update, ("10.0.0.1", "ports", [port(1, owner="a")]))
+        update.start()
+        try:
+            assert await feed.wait(feed.latest(), 5)
+        finally:
+            update.join()
+        # events after the cursor are already there
+        assert await feed.wait(0, 0)
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+"""
+Lookups of the per-chassis port ID index.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RestApi.IxOSPortIndex import PortIdIndex
+
+PORTS = [
+    {"id": 11, "cardNumber": 1, "portNumber": 1, "fullyQualifiedPortName": "1.1"},
+    {"id": 12, "cardNumber": 1, "portNumber": 2, "fullyQualifiedPortName": "1.2"},
+]
+
+
+class Loader(object):
+    def __init__(self, ports):
+        self.ports = ports
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.ports
+
+
+def test_known_port_is_loaded_once():
+    index, loader = PortIdIndex('10.0.0.1'), Loader(PORTS)
+    assert index.lookup(1, 2, loader) == 12
+    assert index.lookup(1, 1, loader) == 11
+    assert loader.calls == 1
+
+
+def test_unknown_port_does_not_reload_again():
+    index, loader = PortIdIndex('10.0.0.1'), Loader(PORTS)
+    for _ in range(5):
+        assert index.lookup(9, 9, loader) is None
+        assert index.lookup_name("9.9", loader) is None
+    # one load for the empty index, one reload for the unknown name
+    assert loader.calls == 2
+    assert index.stats()["misses"] == 8
+
+
+def test_missing_ports_are_retried_after_a_load_or_invalidation():
+    index, loader = PortIdIndex('10.0.0.1'), Loader(PORTS)
+    assert index.lookup(2, 1, loader) is None
+
+    # a newly inserted card shows up in the next full listing
+    loader.ports = PORTS + [{"id": 21, "cardNumber": 2, "portNumber": 1}]
+    index.load(loader.ports)
+    assert index.lookup(2, 1, loader) == 21
+
+    index.invalidate()
+    assert index.lookup(3, 1, loader) is None
+    assert index.lookup(3, 1, loader) is None
+    assert loader.calls == 2
@@ -0,0 +1,165 @@
+"""
+API key sharing and idle eviction of the session pools.
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from IxOSCacheBackend import LRUCacheBackend
+from RestApi.IxOSRestInterface import IxRestSession
+from RestApi.IxOSRestSessionPool import IxRestSessionPool, AsyncIxRestSessionPool, _api_key_cache_key
+
+KEY = ('10.0.0.1', 'admin', 'secret')
+_keys = itertools.count(1)
+
+
+class OfflineSession(IxRestSession):
+    """
+    IxRestSession logging in without a chassis
+    """
+
+    def authenticate(self, username="admin", password="admin"):
+        self.api_key = 'key-%d' % next(_keys)
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncOfflineSession(object):
+    def __init__(self, chassis_address, username=None, password=None, api_key=None, **kwargs):
+        self.api_key = api_key
+        self.on_reauthenticate = None
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    async def open(self):
+        if not self.api_key:
+            self.api_key = 'key-%d' % next(_keys)
+        return self
+
+    async def reauthenticate(self, stale_api_key=None):
+        self.api_key = 'key-%d' % next(_keys)
+        if self.on_reauthenticate is not None:
+            await self.on_reauthenticate(self.api_key)
+
+    async def aclose(self):
+        pass
+
+
+def test_session_is_reused():
+    pool = IxRestSessionPool(session_factory=OfflineSession)
+    assert pool.get_session(*KEY) is pool.get_session(*KEY)
+    assert pool.stats()["misses"] == 1
+
+
+def test_evicted_sync_session_is_closed_only_once_its_requests_finished():
+    pool = IxRestSessionPool(idle_timeout=0, session_factory=OfflineSession)
+    session = pool.get_session(*KEY)
+    session.in_flight = 1
+    session.last_used = 0
+    time.sleep(0.01)
+    # evicts the idle session, which is still sending a request
+    other = pool.get_session(*KEY)
+    assert other is not session
+    assert not getattr(session, 'closed', False)
+    assert pool.stats()["retired"] == 1
+
+    session.in_flight = 0
+    pool.invalidate('10.0.0.2')
+    assert session.closed
+    assert pool.stats()["retired"] == 0
+
+
+def test_recent_requests_keep_a_sync_session_from_being_evicted():
+    pool = IxRestSessionPool(idle_timeout=60, session_factory=OfflineSession)
+    session = pool.get_session(*KEY)
+    # checked out long ago, but used by a request just now
+    pool._last_used[KEY] -= 120
+    session.last_used = time.monotonic()
+    assert pool.get_session(*KEY) is session
+
+
+def test_invalidate_keeps_the_login_lock():
+    pool = IxRestSessionPool(session_factory=OfflineSession)
+    pool.get_session(*KEY)
+    lock = pool._key_locks[KEY]
+    pool.invalidate()
+    assert pool._key_locks[KEY] is lock
+
+
+def test_new_session_publishes_its_key():
+    cache = LRUCacheBackend()
+    session = IxRestSessionPool(session_factory=OfflineSession, key_cache=cache).get_session(*KEY)
+    assert cache.get(_api_key_cache_key(KEY))[0] == session.api_key
+
+
+def test_reauthenticated_key_replaces_stale_cached_key():
+    cache = LRUCacheBackend()
+    cache.set(_api_key_cache_key(KEY), 'stale')
+    session = IxRestSessionPool(session_factory=OfflineSession, key_cache=cache).get_session(*KEY)
+    assert session.api_key == 'stale'
+
+    session.reauthenticate(stale_api_key='stale')
+    assert session.api_key != 'stale'
+    assert cache.get(_api_key_cache_key(KEY))[0] == session.api_key
+
+    # a second pool, e.g. in another worker, starts with the new key
+    other = IxRestSessionPool(session_factory=OfflineSession, key_cache=cache).get_session(*KEY)
+    assert other.api_key == session.api_key
+
+
+def test_async_reauthenticated_key_replaces_stale_cached_key():
+    async def run():
+        cache = LRUCacheBackend()
+        cache.set(_api_key_cache_key(KEY), 'stale')
+        pool = AsyncIxRestSessionPool(session_factory=AsyncOfflineSession, key_cache=cache)
+        session = await pool.get_session(*KEY)
+        assert session.api_key == 'stale'
+        await session.reauthenticate(stale_api_key='stale')
+        assert cache.get(_api_key_cache_key(KEY))[0] == session.api_key != 'stale'
+
+    asyncio.run(run())
+
+
+def test_evicted_session_is_closed_only_once_its_requests_finished():
+    async def run():
+        closed = []
+
+        class Session(AsyncOfflineSession):
+            async def aclose(self):
+                closed.append(self)
+
+        pool = AsyncIxRestSessionPool(idle_timeout=0, session_factory=Session)
+        session = await pool.get_session(*KEY)
+        session.in_flight = 1
+        session.last_used = 0
+        await asyncio.sleep(0.01)
+        # evicts the idle session, which is still sending a request
+        other = await pool.get_session(*KEY)
+        assert other is not session
+        assert closed == []
+        assert pool.stats()["retired"] == 1
+
+        session.in_flight = 0
+        await pool.get_session('10.0.0.2', 'admin', 'secret')
+        assert session in closed
+        assert pool.stats()["retired"] == 0
+
+    asyncio.run(run())
+
+
+def test_recent_requests_keep_a_session_from_being_evicted():
+    async def run():
+        pool = AsyncIxRestSessionPool(idle_timeout=60, session_factory=AsyncOfflineSession)
+        session = await pool.get_session(*KEY)
+        # checked out long ago, but used by a request just now
+        pool._last_used[KEY] -= 120
+        session.last_used = time.monotonic()
+        assert await pool.get_session(*KEY) is session
+
+    asyncio.run(run())